@@ -0,0 +1,141 @@
+"""
+API Server Entry Point - Cali SAE
+Local HTTP processing service for integration with other systems (ERP)
+
+Usage:
+    python api_server.py [--host 127.0.0.1] [--port 8765] [--workers 2]
+"""
+import argparse
+import multiprocessing
+
+# Domain layer
+from src.domain.use_cases.process_invoices import ProcessInvoices
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.domain.use_cases.process_paisano_invoices import ProcessPaisanoInvoices
+
+# Infrastructure layer
+from src.infrastructure.database.sqlite_report_repository import SQLiteReportRepository
+from src.infrastructure.database.sqlite_run_cache_repository import SQLiteRunCacheRepository
+from src.infrastructure.database.sqlite_throughput_repository import SQLiteThroughputRepository
+from src.infrastructure.database.paisano_conversion_repository import (
+    PaisanoConversionRepository,
+)
+from src.infrastructure.parsers.xml_invoice_parser import XMLInvoiceParser
+from src.infrastructure.parsers.string_pool import StringPool
+from src.infrastructure.exporters.invoice_exporter import InvoiceExporter
+from src.infrastructure.exporters.jcr_reggis_exporter import JCRReggisExporter
+from src.infrastructure.storage.invoice_buffer import SpillingInvoiceBuffer
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+from src.infrastructure.processing.admission import AdmissionController
+from src.infrastructure.processing.preflight import PreflightScanner
+
+# Presentation layer
+from src.presentation.api.processing_service import (
+    ProcessingService,
+    COMPANY_AGROBUITRON,
+    COMPANY_JCR,
+    COMPANY_PAISANO,
+)
+from src.presentation.api.http_server import create_server
+
+
+class ApiApplication:
+    """HTTP service application with dependency injection"""
+
+    VERSION = "2.1.0"
+    DB_PATH = "facturas_users.db"
+    INVOICE_MEMORY_BUDGET_MB = 512
+
+    def __init__(self, max_workers: int = 2):
+        self.report_repository = SQLiteReportRepository(self.DB_PATH)
+        self.paisano_conversion_repository = PaisanoConversionRepository(self.DB_PATH)
+        self.run_cache_repository = SQLiteRunCacheRepository(self.DB_PATH, code_version=self.VERSION)
+        # Per-file time limits from config.json app_settings
+        self.work_scheduler = InvoiceWorkScheduler.from_config()
+        # Shared by every run of this process (config.json app_settings)
+        self.admission_controller = AdmissionController.from_config(
+            job_memory_cap_mb=self.INVOICE_MEMORY_BUDGET_MB
+        )
+        # Checks inputs before a run and estimates it from past throughput
+        self.preflight_scanner = PreflightScanner(SQLiteThroughputRepository(self.DB_PATH))
+
+        self.service = ProcessingService(self.use_case_factories(), max_workers=max_workers)
+
+    def use_case_factories(self) -> dict:
+        # Use cases are created per job so concurrent jobs never share an exporter
+        return {
+            COMPANY_AGROBUITRON: self.create_process_invoices,
+            COMPANY_JCR: self.create_process_jcr_invoices,
+            COMPANY_PAISANO: self.create_process_paisano_invoices,
+        }
+
+    def create_invoice_buffer(self) -> SpillingInvoiceBuffer:
+        return SpillingInvoiceBuffer(memory_budget_mb=self.INVOICE_MEMORY_BUDGET_MB)
+
+    def create_process_invoices(self) -> ProcessInvoices:
+        return ProcessInvoices(
+            self.report_repository,
+            XMLInvoiceParser(),
+            InvoiceExporter(),
+            invoice_buffer_factory=self.create_invoice_buffer,
+            work_scheduler=self.work_scheduler,
+            run_cache=self.run_cache_repository,
+            admission_controller=self.admission_controller,
+            preflight_scanner=self.preflight_scanner,
+            string_pool_factory=StringPool,
+        )
+
+    def create_process_jcr_invoices(self) -> ProcessJCRInvoices:
+        return ProcessJCRInvoices(
+            self.report_repository,
+            None,  # csv_parser - will be created per file
+            JCRReggisExporter(),
+            invoice_buffer_factory=self.create_invoice_buffer,
+            run_cache=self.run_cache_repository,
+            admission_controller=self.admission_controller,
+            preflight_scanner=self.preflight_scanner,
+            work_scheduler=self.work_scheduler,
+            string_pool_factory=StringPool,
+        )
+
+    def create_process_paisano_invoices(self) -> ProcessPaisanoInvoices:
+        return ProcessPaisanoInvoices(
+            self.report_repository,
+            XMLInvoiceParser(),
+            JCRReggisExporter(),
+            self.paisano_conversion_repository,
+            invoice_buffer_factory=self.create_invoice_buffer,
+            work_scheduler=self.work_scheduler,
+            run_cache=self.run_cache_repository,
+            admission_controller=self.admission_controller,
+            preflight_scanner=self.preflight_scanner,
+            string_pool_factory=StringPool,
+        )
+
+    def run(self, host: str, port: int) -> None:
+        server = create_server(self.service, host, port)
+        print(f"Servicio de procesamiento escuchando en http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.service.shutdown()
+
+
+def main():
+    """API server entry point"""
+    multiprocessing.freeze_support()
+
+    arg_parser = argparse.ArgumentParser(description="Servicio HTTP local de procesamiento de facturas")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--workers", type=int, default=2, help="Trabajos simultáneos")
+    args = arg_parser.parse_args()
+
+    ApiApplication(max_workers=args.workers).run(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Backfill Entry Point - Cali SAE
+Regenerates historical outputs from a <company>/<dd-mm-YYYY>/ folder tree
+
+Usage:
+    python backfill.py data --name reproceso-2024 --company JCR --municipality Cali --iva 5
+    python backfill.py data --name reproceso-2024 --workers 4 --io-limit 20 --from 01-01-2024 --to 31-12-2024
+"""
+import argparse
+import multiprocessing
+from datetime import datetime
+
+from src.infrastructure.processing.backfill_store import BackfillTaskStore
+from src.presentation.api.backfill_runner import BackfillRunner, DAY_FORMAT
+from src.presentation.api.job_runner import COMPANY_JCR
+
+from api_server import ApiApplication
+
+
+def main():
+    """Backfill entry point"""
+    multiprocessing.freeze_support()
+
+    arg_parser = argparse.ArgumentParser(description="Reprocesamiento histórico por días")
+    arg_parser.add_argument("root", help="Carpeta con <empresa>/<dd-mm-YYYY>/")
+    arg_parser.add_argument("--name", required=True, help="Nombre del backfill; repetirlo reanuda los días pendientes")
+    arg_parser.add_argument("--company", action="append", help="Empresa a procesar (repetible)")
+    arg_parser.add_argument("--from", dest="date_from", help="Primer día (dd-mm-YYYY)")
+    arg_parser.add_argument("--to", dest="date_to", help="Último día (dd-mm-YYYY)")
+    arg_parser.add_argument("--workers", type=int, default=2, help="Días procesados a la vez")
+    arg_parser.add_argument("--io-limit", type=float, default=0, help="MB/s máximos de entrada (0 = sin límite)")
+    arg_parser.add_argument("--municipality", default="", help="Municipio (Juan Camilo Rosas)")
+    arg_parser.add_argument("--iva", default="0", help="IVA por defecto (Juan Camilo Rosas)")
+    args = arg_parser.parse_args()
+
+    app = ApiApplication()
+    runner = BackfillRunner(
+        BackfillTaskStore(ApiApplication.DB_PATH),
+        app.use_case_factories(),
+        max_workers=args.workers,
+        io_limit_mb_s=args.io_limit
+    )
+
+    tasks = runner.plan(
+        args.root,
+        args.name,
+        companies=args.company,
+        date_from=datetime.strptime(args.date_from, DAY_FORMAT) if args.date_from else None,
+        date_to=datetime.strptime(args.date_to, DAY_FORMAT) if args.date_to else None
+    )
+    if not args.municipality and any(task.company == COMPANY_JCR for task in tasks):
+        print("Error: Debe indicar el municipio (--municipality) para Juan Camilo Rosas")
+        return
+
+    summary = runner.run(
+        args.name,
+        tasks,
+        params={'municipality': args.municipality, 'iva_percentage': args.iva}
+    )
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
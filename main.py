@@ -4,6 +4,7 @@ Sistema de Facturas Electrónicas
 Clean Architecture with PyQt6
 """
 import sys
+import multiprocessing
 from datetime import datetime
 from PyQt6.QtWidgets import QApplication
 
@@ -18,13 +19,21 @@ from src.domain.entities.user import User
 # Infrastructure layer
 from src.infrastructure.database.sqlite_user_repository import SQLiteUserRepository
 from src.infrastructure.database.sqlite_report_repository import SQLiteReportRepository
+from src.infrastructure.database.sqlite_run_cache_repository import SQLiteRunCacheRepository
+from src.infrastructure.database.sqlite_throughput_repository import SQLiteThroughputRepository
 from src.infrastructure.database.paisano_conversion_repository import (
     PaisanoConversionRepository,
 )
 from src.infrastructure.parsers.xml_invoice_parser import XMLInvoiceParser
+from src.infrastructure.parsers.string_pool import StringPool
 from src.infrastructure.exporters.invoice_exporter import InvoiceExporter
 from src.infrastructure.exporters.csv_exporter import CSVExporter
 from src.infrastructure.exporters.jcr_reggis_exporter import JCRReggisExporter
+from src.infrastructure.storage.invoice_buffer import SpillingInvoiceBuffer
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+from src.infrastructure.processing.admission import AdmissionController
+from src.infrastructure.processing.preflight import PreflightScanner
+from src.infrastructure.processing.parse_cache import SpeculativeParseCache
 from src.infrastructure.updater.github_updater import GitHubUpdater
 from src.infrastructure.updater.update_state import UpdateState
 
@@ -40,6 +49,8 @@ class Application:
 
     VERSION = "2.1.0"
     DB_PATH = "facturas_users.db"
+    # Parsed invoices kept in RAM per run before spilling to a temp file
+    INVOICE_MEMORY_BUDGET_MB = 512
 
     def __init__(self):
         self.app = QApplication(sys.argv)
@@ -50,12 +61,24 @@ class Application:
         self.user_repository = SQLiteUserRepository(self.DB_PATH)
         self.report_repository = SQLiteReportRepository(self.DB_PATH)
         self.paisano_conversion_repository = PaisanoConversionRepository(self.DB_PATH)
+        self.run_cache_repository = SQLiteRunCacheRepository(self.DB_PATH, code_version=self.VERSION)
 
         # Initialize infrastructure services
         self.xml_parser = XMLInvoiceParser()
         self.invoice_exporter = InvoiceExporter()
         self.csv_exporter = CSVExporter()
         self.jcr_reggis_exporter = JCRReggisExporter()
+        # Per-file time limits from config.json app_settings
+        self.work_scheduler = InvoiceWorkScheduler.from_config()
+        # Shared by every run of this process (config.json app_settings)
+        self.admission_controller = AdmissionController.from_config(
+            job_memory_cap_mb=self.INVOICE_MEMORY_BUDGET_MB
+        )
+        # Checks inputs before a run and estimates it from past throughput
+        self.preflight_scanner = PreflightScanner(SQLiteThroughputRepository(self.DB_PATH))
+        # Inputs parsed in the background as soon as they are selected, under
+        # the same per-file time limits (config.json app_settings)
+        self.parse_cache = SpeculativeParseCache.from_config()
         self.github_updater = GitHubUpdater(
             repo_owner="LuisVeraVR", repo_name="cali-sae"
         )
@@ -78,18 +101,36 @@ class Application:
         """Run the application"""
         self.bootstrap()
         self.show_main_window()
-        return self.app.exec()
+        exit_code = self.app.exec()
+        self.parse_cache.shutdown()
+        return exit_code
 
     def bootstrap(self):
         """Initialize use cases and controllers"""
         self.process_invoices_use_case = ProcessInvoices(
-            self.report_repository, self.xml_parser, self.invoice_exporter
+            self.report_repository,
+            self.xml_parser,
+            self.invoice_exporter,
+            invoice_buffer_factory=self.create_invoice_buffer,
+            work_scheduler=self.work_scheduler,
+            run_cache=self.run_cache_repository,
+            admission_controller=self.admission_controller,
+            parse_cache=self.parse_cache,
+            preflight_scanner=self.preflight_scanner,
+            string_pool_factory=StringPool,
         )
 
         self.process_jcr_invoices_use_case = ProcessJCRInvoices(
             self.report_repository,
             None,  # csv_parser - will be created per file
             self.jcr_reggis_exporter,
+            invoice_buffer_factory=self.create_invoice_buffer,
+            run_cache=self.run_cache_repository,
+            admission_controller=self.admission_controller,
+            parse_cache=self.parse_cache,
+            preflight_scanner=self.preflight_scanner,
+            work_scheduler=self.work_scheduler,
+            string_pool_factory=StringPool,
         )
 
         self.process_paisano_invoices_use_case = ProcessPaisanoInvoices(
@@ -97,6 +138,13 @@ class Application:
             self.xml_parser,
             self.jcr_reggis_exporter,
             self.paisano_conversion_repository,
+            invoice_buffer_factory=self.create_invoice_buffer,
+            work_scheduler=self.work_scheduler,
+            run_cache=self.run_cache_repository,
+            admission_controller=self.admission_controller,
+            parse_cache=self.parse_cache,
+            preflight_scanner=self.preflight_scanner,
+            string_pool_factory=StringPool,
         )
 
         self.get_reports_use_case = GetReports(self.report_repository)
@@ -118,6 +166,8 @@ class Application:
             self.current_user,
             self.paisano_conversion_repository,
             update_state=self.update_state,
+            parse_cache=self.parse_cache,
+            preflight_scanner=self.preflight_scanner,
         )
 
         # Initialize reports controller
@@ -125,6 +175,10 @@ class Application:
             self.get_reports_use_case, self.export_reports_use_case
         )
 
+    def create_invoice_buffer(self) -> SpillingInvoiceBuffer:
+        """Create a per-run invoice buffer bounded by the memory budget"""
+        return SpillingInvoiceBuffer(memory_budget_mb=self.INVOICE_MEMORY_BUDGET_MB)
+
     def show_main_window(self):
         """Show main application window"""
         self.main_window = MainWindow(self.main_controller, self.reports_controller)
@@ -145,6 +199,8 @@ class Application:
 
 def main():
     """Main entry point"""
+    # Required for worker processes in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     app = Application()
     sys.exit(app.run())
 
@@ -0,0 +1,77 @@
+"""
+Spool Worker Entry Point - Cali SAE
+Processes jobs from a shared spool folder; start more workers to add capacity
+
+Usage:
+    python spool_worker.py --spool \\\\servidor\\spool
+    python spool_worker.py --spool \\\\servidor\\spool --submit JCR archivo.csv --municipality Cali
+"""
+import argparse
+import multiprocessing
+
+from src.infrastructure.processing.job_spool import JobSpool
+from src.presentation.api.job_runner import validate_job
+from src.presentation.api.spool_worker import SpoolWorker
+
+from api_server import ApiApplication
+
+
+def submit(spool: JobSpool, args) -> None:
+    """Queue a job and wait for its result"""
+    params = {
+        'municipality': args.municipality or '',
+        'iva_percentage': args.iva_percentage,
+        'force': args.force,
+    }
+    try:
+        company = validate_job(args.submit, args.paths, params)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return
+
+    job = spool.submit(company, args.paths, params, username=args.username)
+    print(f"Trabajo {job.id} encolado")
+    if not args.wait:
+        return
+
+    job = spool.wait(job.id)
+    print(job.message)
+    if job.output_path:
+        print(f"Resultado: {spool.resolve(job.output_path)}")
+
+
+def main():
+    """Spool worker entry point"""
+    multiprocessing.freeze_support()
+
+    arg_parser = argparse.ArgumentParser(description="Worker de procesamiento con carpeta compartida")
+    arg_parser.add_argument("--spool", required=True, help="Carpeta compartida del spool")
+    arg_parser.add_argument("--stale-after", type=float, default=120.0,
+                            help="Segundos sin heartbeat antes de re-encolar un trabajo")
+    arg_parser.add_argument("--submit", metavar="EMPRESA", help="Encolar un trabajo en lugar de procesar")
+    arg_parser.add_argument("paths", nargs="*", help="Archivos o carpetas del trabajo a encolar")
+    arg_parser.add_argument("--municipality")
+    arg_parser.add_argument("--iva-percentage", default="0")
+    arg_parser.add_argument("--username", default="SPOOL")
+    arg_parser.add_argument("--force", action="store_true", help="Reprocesar aunque exista un resultado idéntico")
+    arg_parser.add_argument("--wait", action="store_true", help="Esperar el resultado del trabajo")
+    args = arg_parser.parse_args()
+
+    spool = JobSpool(args.spool, stale_after=args.stale_after)
+    if args.submit:
+        submit(spool, args)
+        return
+
+    worker = SpoolWorker(
+        spool,
+        ApiApplication().use_case_factories(),
+        heartbeat_interval=max(1.0, args.stale_after / 4)
+    )
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
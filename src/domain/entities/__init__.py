@@ -5,5 +5,6 @@ from .user import User
 from .product import Product
 from .invoice import Invoice
 from .report import Report
+from .cached_run import CachedRun
 
-__all__ = ['User', 'Product', 'Invoice', 'Report']
+__all__ = ['User', 'Product', 'Invoice', 'Report', 'CachedRun']
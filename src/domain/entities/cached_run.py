@@ -0,0 +1,27 @@
+"""
+Cached Run entity - Result of a previous run that can be served again
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+
+# First line of the message returned when a run is served from the cache
+REUSED_RUN_NOTICE = "Resultado reutilizado de un procesamiento idéntico"
+
+
+@dataclass
+class CachedRun:
+    """Output of a run identified by the fingerprint of its inputs"""
+
+    fingerprint: str  # Hash of input files, company, parameters and code/catalog version
+    company: str
+    output_path: str
+    records_processed: int
+    created_at: datetime
+
+    def reuse_message(self) -> str:
+        """Success message for a run served from the cache"""
+        return (
+            f"{REUSED_RUN_NOTICE} ({self.created_at.strftime('%d/%m/%Y %H:%M')}):\n"
+            f"{self.output_path}"
+        )
@@ -5,6 +5,8 @@ from dataclasses import dataclass
 from decimal import Decimal
 from typing import Optional
 
+from ..services.decimal_format import format_decimal
+
 
 @dataclass
 class Product:
@@ -30,8 +32,7 @@ class Product:
 
     def format_decimal(self, value: Decimal, decimals: int = 5) -> str:
         """Format decimal with comma as decimal separator"""
-        formatted = f"{value:.{decimals}f}"
-        return formatted.replace('.', ',')
+        return format_decimal(value, decimals)
 
     def get_formatted_quantity(self) -> str:
         """Get converted quantity formatted with 5 decimals and comma"""
@@ -3,5 +3,6 @@ Domain repository interfaces
 """
 from .user_repository import UserRepositoryInterface
 from .report_repository import ReportRepositoryInterface
+from .run_cache_repository import RunCacheRepositoryInterface
 
-__all__ = ['UserRepositoryInterface', 'ReportRepositoryInterface']
+__all__ = ['UserRepositoryInterface', 'ReportRepositoryInterface', 'RunCacheRepositoryInterface']
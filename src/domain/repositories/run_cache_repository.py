@@ -0,0 +1,25 @@
+"""
+Run Cache Repository Interface - Defines the contract for run memoization
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from ..entities.cached_run import CachedRun
+
+
+class RunCacheRepositoryInterface(ABC):
+    """Abstract interface for the cache of previous runs"""
+
+    @abstractmethod
+    def fingerprint(self, company: str, paths: List[str], params: Dict) -> str:
+        """Fingerprint of a run: input file hashes, company, parameters and code version"""
+        pass
+
+    @abstractmethod
+    def find(self, fingerprint: str) -> Optional[CachedRun]:
+        """Get a recent run with this fingerprint"""
+        pass
+
+    @abstractmethod
+    def save(self, run: CachedRun) -> None:
+        """Store the result of a run"""
+        pass
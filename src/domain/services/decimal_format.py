@@ -0,0 +1,79 @@
+"""
+Decimal Format - Amounts with a fixed number of decimals and a decimal comma
+
+Every exported amount is written with 5 decimals and a comma as decimal
+separator. Going through float first rounds large peso amounts and ties at
+the last decimal differently from the Decimal itself, so values are rounded
+with Decimal.quantize (half-even, like formatting the Decimal) in a context
+wide enough for any amount. The same few quantities and prices repeat on
+thousands of lines, so each formatter also remembers the text of the values
+it already formatted.
+"""
+from decimal import Context, Decimal, InvalidOperation, MAX_EMAX, MAX_PREC, MIN_EMIN, ROUND_HALF_EVEN
+from typing import Dict
+
+
+DECIMALS = 5
+MEMO_SIZE = 4096
+
+# quantize() fails in the default context once a value has more than 28 digits
+_CONTEXT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN, rounding=ROUND_HALF_EVEN)
+
+
+class DecimalFormatter:
+    """Formats numbers with a fixed number of decimals and a comma as decimal separator"""
+
+    def __init__(self, decimals: int = DECIMALS, memo_size: int = MEMO_SIZE):
+        """
+        Initialize formatter
+
+        Args:
+            decimals: Digits after the decimal comma
+            memo_size: Distinct values remembered (the memo starts over when full)
+        """
+        self.decimals = decimals
+        self.memo_size = memo_size
+
+        self._quantum = Decimal(1).scaleb(-decimals)
+        self._memo: Dict[Decimal, str] = {}
+
+    def format(self, value) -> str:
+        """
+        Format one Decimal, int or float (floats are rounded from their exact binary value)
+
+        Returns:
+            Text such as '1234,50000'
+        """
+        if not value:
+            # -0 equals 0 (same memo entry) but keeps its sign, like f"{value:.5f}"
+            return self._format_uncached(value)
+        try:
+            return self._memo[value]
+        except KeyError:
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            text = self._memo[value] = self._format_uncached(value)
+            return text
+
+    def _format_uncached(self, value) -> str:
+        if not isinstance(value, Decimal):
+            value = Decimal(value)
+        try:
+            rounded = value.quantize(self._quantum, ROUND_HALF_EVEN, _CONTEXT)
+            # str() is faster but switches to exponent notation below 1E-6
+            text = str(rounded) if self.decimals <= 6 else format(rounded, 'f')
+        except InvalidOperation:
+            # Infinity and signaling NaN cannot be quantized
+            text = f"{value:.{self.decimals}f}"
+        return text.replace('.', ',')
+
+
+_formatters: Dict[int, DecimalFormatter] = {DECIMALS: DecimalFormatter(DECIMALS)}
+
+
+def format_decimal(value, decimals: int = DECIMALS) -> str:
+    """value with decimals decimals and a comma as decimal separator, e.g. 2.5 -> '2,50000'"""
+    formatter = _formatters.get(decimals)
+    if formatter is None:
+        formatter = _formatters.setdefault(decimals, DecimalFormatter(decimals))
+    return formatter.format(value)
@@ -0,0 +1,253 @@
+"""
+Invoice Run - Lifecycle shared by the invoice processing use cases
+
+Reuse of identical runs, pre-flight scan, admission, invoice buffer, string
+pool, report and the summaries of the run message. Each use case only parses
+its inputs and exports the invoices.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+from datetime import datetime
+from pathlib import Path
+from ..entities.cached_run import CachedRun
+from ..entities.invoice import Invoice
+from ..entities.report import Report
+from ..repositories.report_repository import ReportRepositoryInterface
+from ..repositories.run_cache_repository import RunCacheRepositoryInterface
+
+
+@dataclass(frozen=True)
+class FileError:
+    """Input file left out of a run parsed without work scheduler"""
+
+    path: str
+    reason: str
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).name
+
+
+class InvoiceRunUseCase:
+    """Base of the use cases that parse input files into invoices and export them"""
+
+    def __init__(
+        self,
+        report_repository: ReportRepositoryInterface,
+        invoice_buffer_factory: Optional[Callable[[], Any]] = None,  # SpillingInvoiceBuffer factory
+        work_scheduler=None,  # InvoiceWorkScheduler - parallel parsing
+        run_cache: Optional[RunCacheRepositoryInterface] = None,
+        admission_controller=None,  # AdmissionController - process-wide file/memory limits
+        parse_cache=None,  # SpeculativeParseCache - inputs parsed in the background when selected
+        preflight_scanner=None,  # PreflightScanner - integrity check and throughput history
+        string_pool_factory: Optional[Callable[[], Any]] = None  # StringPool factory - one pool per run
+    ):
+        self.report_repository = report_repository
+        self.invoice_buffer_factory = invoice_buffer_factory
+        self.work_scheduler = work_scheduler
+        self.run_cache = run_cache
+        self.admission_controller = admission_controller
+        self.parse_cache = parse_cache
+        self.preflight_scanner = preflight_scanner
+        self.string_pool_factory = string_pool_factory
+
+    def _run(
+        self,
+        company: str,
+        username: str,
+        paths: List[str],
+        parse: Callable[[list, List[str]], Iterable[List[Invoice]]],
+        export: Callable[[Any], Tuple[str, str]],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        force: bool = False,
+        fingerprint_options: Optional[dict] = None,
+        report_filename: Optional[str] = None
+    ) -> tuple[bool, str, int]:
+        """
+        Parse, export and report one run
+
+        Args:
+            company: Company of the run
+            username: Username of the person processing
+            paths: Input files of the run
+            parse: parse(failures, warnings) yields the invoices of each input
+                file; skipped files go to failures
+            export: export(invoices) returns (output file, run message)
+            progress_callback: Optional callback for progress updates (current, total)
+            force: Process again even if an identical run was already exported
+            fingerprint_options: Options that change the output (None: the run is not reused)
+            report_filename: Names shown in the report (defaults to the input files)
+
+        Returns:
+            Tuple of (success, message, records_processed)
+        """
+        total_files = len(paths)
+
+        fingerprint = None
+        if self.run_cache and fingerprint_options is not None:
+            fingerprint = self.run_cache.fingerprint(company, paths, fingerprint_options)
+            cached = None if force else self._find_cached_run(fingerprint)
+            if cached:
+                if progress_callback:
+                    progress_callback(total_files, total_files)
+                return True, cached.reuse_message(), cached.records_processed
+
+        # Broken inputs fail the run before anything is parsed
+        preflight = self._preflight(company, paths)
+        if preflight and preflight.errors:
+            return False, preflight.error_message(), 0
+
+        # Created inside the try: a failing buffer or pool must still release the ticket
+        admission = None
+        all_invoices = None
+        started = time.monotonic()
+        failures = []  # Files left out; the rest of the run goes on
+        warnings = []  # Doubtful values in the parsed files (numbers off format, unknown dates)
+
+        try:
+            admission = self._admit(company, paths)
+            all_invoices = self._create_invoice_buffer()
+            string_pool = self._create_string_pool()
+
+            # The single interning point: parsers never see the pool
+            for invoices in parse(failures, warnings):
+                all_invoices.extend(self._intern_invoices(string_pool, invoices))
+
+            failures_summary = self._failures_summary(failures)
+
+            if not all_invoices:
+                message = "No se encontraron facturas validas en los archivos"
+                if failures_summary:
+                    message += f"\n{failures_summary}"
+                return False, message, 0
+
+            try:
+                output_file, message = export(all_invoices)
+            except Exception as e:
+                return False, f"Error al exportar datos: {str(e)}", 0
+
+            for summary in (self._memory_summary(all_invoices, string_pool), failures_summary,
+                            self._warnings_summary(warnings)):
+                if summary:
+                    message += f"\n{summary}"
+
+            # Calculate total records (sum of all products in all invoices)
+            total_records = sum(invoice.get_product_count() for invoice in all_invoices)
+
+            # Calculate total file size
+            total_size = sum(Path(path).stat().st_size for path in paths if Path(path).exists())
+
+            report = Report(
+                id=None,
+                username=username,
+                company=company,
+                filename=report_filename or ", ".join([Path(f).name for f in paths]),
+                records_processed=total_records,
+                created_at=datetime.now(),
+                file_size=total_size
+            )
+            self.report_repository.create(report)
+
+            # A partial run is not reused: the skipped files must be processed again
+            if fingerprint and not failures:
+                self._save_cached_run(fingerprint, company, output_file, total_records)
+
+            self._record_throughput(company, paths, time.monotonic() - started, total_records)
+
+            if progress_callback:
+                progress_callback(total_files, total_files)
+
+            return True, message, total_records
+        finally:
+            self._release_invoice_buffer(all_invoices)
+            self._release_admission(admission)
+
+    # --- Helpers ---
+    def _preflight(self, company: str, paths: List[str]):
+        """Pre-flight scan of the inputs (None when no scanner is configured)"""
+        if self.preflight_scanner:
+            return self.preflight_scanner.scan(company, paths)
+        return None
+
+    def _record_throughput(self, company: str, paths: List[str], seconds: float, records: int) -> None:
+        """Feed the measured run time to the estimates of future pre-flight scans"""
+        if self.preflight_scanner:
+            self.preflight_scanner.record_run(company, paths, seconds, records)
+
+    def _find_cached_run(self, fingerprint: str) -> Optional[CachedRun]:
+        """Recent identical run whose output still exists"""
+        cached = self.run_cache.find(fingerprint)
+        if cached and Path(cached.output_path).is_file():
+            return cached
+        return None
+
+    def _save_cached_run(self, fingerprint: str, company: str, output_file: str, records: int) -> None:
+        try:
+            self.run_cache.save(CachedRun(
+                fingerprint=fingerprint,
+                company=company,
+                output_path=str(output_file),
+                records_processed=records,
+                created_at=datetime.now()
+            ))
+        except Exception as e:
+            # The export already succeeded, a cache failure only costs a rerun
+            print(f"Error saving run cache: {str(e)}")
+
+    def _admit(self, company: str, paths: List[str]):
+        """Wait until the process-wide admission controller has room for this run"""
+        if self.admission_controller:
+            # One file open per parsing worker (one large file can be split between
+            # several workers), or one at a time without the scheduler
+            open_files = self.work_scheduler.max_workers if self.work_scheduler else 1
+            return self.admission_controller.admit(company, paths, open_files)
+        return None
+
+    def _release_admission(self, ticket) -> None:
+        if ticket:
+            ticket.release()
+
+    def _create_invoice_buffer(self):
+        """Create the container for parsed invoices (spills to disk when configured)"""
+        if self.invoice_buffer_factory:
+            return self.invoice_buffer_factory()
+        return []
+
+    def _release_invoice_buffer(self, invoices) -> None:
+        # None when the buffer could not be created
+        close = getattr(invoices, 'close', None)
+        if close:
+            close()
+
+    def _create_string_pool(self):
+        """Create the pool that shares repeated text between the invoices of a run (None when not configured)"""
+        if self.string_pool_factory:
+            return self.string_pool_factory()
+        return None
+
+    def _intern_invoices(self, string_pool, invoices: List[Invoice]) -> List[Invoice]:
+        if string_pool is not None:
+            string_pool.intern_invoices(invoices)
+        return invoices
+
+    def _memory_summary(self, invoices, string_pool) -> str:
+        """Run message lines of the invoice buffer and the string pool (empty when they saved nothing)"""
+        texts = [source.summary() for source in (invoices, string_pool) if hasattr(source, 'summary')]
+        return "\n".join(text for text in texts if text)
+
+    def _failures_summary(self, failures) -> str:
+        """Files skipped because they could not be parsed, hung or crashed a parsing worker"""
+        if not failures:
+            return ""
+        lines = [f"Advertencia: {len(failures)} archivo(s) omitido(s) por errores o por bloquear el procesamiento:"]
+        lines.extend(f"- {failure.name}: {failure.reason}" for failure in failures)
+        return "\n".join(lines)
+
+    def _warnings_summary(self, warnings: List[str]) -> str:
+        """Values the parsers had doubts about; the invoices were exported anyway"""
+        if not warnings:
+            return ""
+        lines = ["Advertencia: revise estos valores de los archivos:"]
+        lines.extend(f"- {warning}" for warning in warnings)
+        return "\n".join(lines)
@@ -1,15 +1,14 @@
 """
 Process Invoices Use Case
 """
-from typing import List, Callable, Optional
-from datetime import datetime
-from pathlib import Path
+from typing import Any, Iterator, List, Callable, Optional
 from ..entities.invoice import Invoice
-from ..entities.report import Report
 from ..repositories.report_repository import ReportRepositoryInterface
+from ..repositories.run_cache_repository import RunCacheRepositoryInterface
+from .invoice_run import FileError, InvoiceRunUseCase
 
 
-class ProcessInvoices:
+class ProcessInvoices(InvoiceRunUseCase):
     """
     Use case for processing invoices from ZIP files containing XML files
     """
@@ -18,9 +17,25 @@ class ProcessInvoices:
         self,
         report_repository: ReportRepositoryInterface,
         xml_parser,  # Will be injected from infrastructure
-        file_exporter  # Will be injected from infrastructure
+        file_exporter,  # Will be injected from infrastructure
+        invoice_buffer_factory: Optional[Callable[[], Any]] = None,  # SpillingInvoiceBuffer factory
+        work_scheduler=None,  # InvoiceWorkScheduler - parallel parsing across all ZIP members
+        run_cache: Optional[RunCacheRepositoryInterface] = None,
+        admission_controller=None,  # AdmissionController - process-wide file/memory limits
+        parse_cache=None,  # SpeculativeParseCache - inputs parsed in the background when selected
+        preflight_scanner=None,  # PreflightScanner - integrity check and throughput history
+        string_pool_factory: Optional[Callable[[], Any]] = None  # StringPool factory - one pool per run
     ):
-        self.report_repository = report_repository
+        super().__init__(
+            report_repository,
+            invoice_buffer_factory=invoice_buffer_factory,
+            work_scheduler=work_scheduler,
+            run_cache=run_cache,
+            admission_controller=admission_controller,
+            parse_cache=parse_cache,
+            preflight_scanner=preflight_scanner,
+            string_pool_factory=string_pool_factory
+        )
         self.xml_parser = xml_parser
         self.file_exporter = file_exporter
 
@@ -32,7 +47,8 @@ class ProcessInvoices:
         output_format: str = 'csv',  # 'csv' or 'excel'
         excel_file: Optional[str] = None,
         excel_sheet: Optional[str] = None,
-        progress_callback: Optional[Callable[[int, int], None]] = None
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        force: bool = False
     ) -> tuple[bool, str, int]:
         """
         Process invoice ZIP files and export data
@@ -45,6 +61,7 @@ class ProcessInvoices:
             excel_file: Path to Excel file (if output_format is 'excel')
             excel_sheet: Sheet name in Excel (if output_format is 'excel')
             progress_callback: Optional callback for progress updates (current, total)
+            force: Process again even if an identical run was already exported
 
         Returns:
             Tuple of (success, message, records_processed)
@@ -55,60 +72,76 @@ class ProcessInvoices:
         if output_format == 'excel' and not excel_file:
             return False, "Debe seleccionar un archivo Excel", 0
 
-        all_invoices: List[Invoice] = []
-        total_files = len(zip_files)
+        def parse(failures, warnings):
+            return self._iter_parsed(zip_files, progress_callback, failures)
+
+        def export(invoices):
+            if output_format == 'csv':
+                output_file = self.file_exporter.export_to_csv(invoices, company)
+            else:  # excel
+                self.file_exporter.export_to_excel(invoices, excel_file, excel_sheet)
+                output_file = excel_file
+            return output_file, f"Datos exportados exitosamente en:\n{output_file}"
+
+        return self._run(
+            company,
+            username,
+            zip_files,
+            parse,
+            export,
+            progress_callback,
+            force,
+            # Only CSV runs are reused; Excel runs append to a workbook the user chose
+            fingerprint_options={'output_format': output_format} if output_format == 'csv' else None
+        )
+
+    # --- Helpers ---
+    def _iter_parsed(
+        self,
+        zip_files: List[str],
+        progress_callback: Optional[Callable[[int, int], None]],
+        failures: list
+    ) -> Iterator[List[Invoice]]:
+        """Yield the invoices of each ZIP file in order, in parallel when a scheduler is set"""
+        if self.work_scheduler:
+            # Parse members of the ZIP files not parsed in the background yet in
+            # parallel, largest first; results still arrive in the order the
+            # files were selected
+            prefetched = [self._take_prefetched(zip_file) for zip_file in zip_files]
+            parsed = self.work_scheduler.parse(
+                [f for f, invoices in zip(zip_files, prefetched) if invoices is None],
+                progress_callback,
+                failures
+            )
+            try:
+                for invoices in prefetched:
+                    if invoices is None:
+                        _, invoices = next(parsed)
+                    yield invoices
+            finally:
+                parsed.close()
+            return
 
         # Parse all ZIP files
+        total_files = len(zip_files)
         for idx, zip_file in enumerate(zip_files):
             if progress_callback:
                 progress_callback(idx, total_files)
 
             try:
-                invoices = self.xml_parser.parse_zip_file(zip_file)
-                all_invoices.extend(invoices)
+                invoices = self._take_prefetched(zip_file)
+                if invoices is None:
+                    invoices = self.xml_parser.parse_zip_file(zip_file)
             except Exception as e:
                 # Continue processing other files even if one fails
                 print(f"Error processing {zip_file}: {str(e)}")
+                failures.append(FileError(zip_file, str(e)))
                 continue
+            yield invoices
 
-        if not all_invoices:
-            return False, "No se encontraron facturas validas en los archivos", 0
-
-        # Export invoices
-        try:
-            if output_format == 'csv':
-                output_file = self.file_exporter.export_to_csv(all_invoices, company)
-                message = f"Datos exportados exitosamente en:\n{output_file}"
-            else:  # excel
-                self.file_exporter.export_to_excel(
-                    all_invoices,
-                    excel_file,
-                    excel_sheet
-                )
-                message = f"Datos exportados exitosamente en:\n{excel_file}"
-        except Exception as e:
-            return False, f"Error al exportar datos: {str(e)}", 0
-
-        # Calculate total records (sum of all products in all invoices)
-        total_records = sum(invoice.get_product_count() for invoice in all_invoices)
-
-        # Calculate total file size
-        total_size = sum(Path(zip_file).stat().st_size for zip_file in zip_files if Path(zip_file).exists())
-
-        # Create report
-        report = Report(
-            id=None,
-            username=username,
-            company=company,
-            filename=", ".join([Path(f).name for f in zip_files]),
-            records_processed=total_records,
-            created_at=datetime.now(),
-            file_size=total_size
-        )
-
-        self.report_repository.create(report)
-
-        if progress_callback:
-            progress_callback(total_files, total_files)
+    def _take_prefetched(self, zip_file: str) -> Optional[List[Invoice]]:
+        """Invoices parsed in the background when the file was selected, if still valid"""
+        if self.parse_cache:
+            return self.parse_cache.take('zip', zip_file)
+        return None
 
-        return True, message, total_records
@@ -2,15 +2,14 @@
 Process JCR Invoices Use Case
 Processes Juan Camilo Rosas invoices from CSV/TXT files
 """
-from typing import List, Callable, Optional
-from datetime import datetime
-from pathlib import Path
+from typing import Any, List, Callable, Optional
 from ..entities.invoice import Invoice
-from ..entities.report import Report
 from ..repositories.report_repository import ReportRepositoryInterface
+from ..repositories.run_cache_repository import RunCacheRepositoryInterface
+from .invoice_run import FileError, InvoiceRunUseCase
 
 
-class ProcessJCRInvoices:
+class ProcessJCRInvoices(InvoiceRunUseCase):
     """
     Use case for processing Juan Camilo Rosas invoices from CSV/TXT files
     """
@@ -18,10 +17,26 @@ class ProcessJCRInvoices:
     def __init__(
         self,
         report_repository: ReportRepositoryInterface,
-        csv_parser,  # JCRCsvParser - injected from infrastructure (not used directly here)
-        reggis_exporter  # JCRReggisExporter - injected from infrastructure
+        csv_parser,  # JCRCsvParser class - instantiated per file when there is no work scheduler
+        reggis_exporter,  # JCRReggisExporter - injected from infrastructure
+        invoice_buffer_factory: Optional[Callable[[], Any]] = None,  # SpillingInvoiceBuffer factory
+        run_cache: Optional[RunCacheRepositoryInterface] = None,
+        admission_controller=None,  # AdmissionController - process-wide file/memory limits
+        parse_cache=None,  # SpeculativeParseCache - inputs parsed in the background when selected
+        preflight_scanner=None,  # PreflightScanner - integrity check and throughput history
+        work_scheduler=None,  # InvoiceWorkScheduler - CSV/TXT files parsed in parallel
+        string_pool_factory: Optional[Callable[[], Any]] = None  # StringPool factory - one pool per run
     ):
-        self.report_repository = report_repository
+        super().__init__(
+            report_repository,
+            invoice_buffer_factory=invoice_buffer_factory,
+            work_scheduler=work_scheduler,
+            run_cache=run_cache,
+            admission_controller=admission_controller,
+            parse_cache=parse_cache,
+            preflight_scanner=preflight_scanner,
+            string_pool_factory=string_pool_factory
+        )
         self.csv_parser = csv_parser
         self.reggis_exporter = reggis_exporter
 
@@ -31,7 +46,8 @@ class ProcessJCRInvoices:
         municipality: str,
         iva_percentage: str,
         username: str,
-        progress_callback: Optional[Callable[[int, int], None]] = None
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        force: bool = False
     ) -> tuple[bool, str, int]:
         """
         Process Juan Camilo Rosas invoice CSV/TXT files and export to Reggis format
@@ -42,6 +58,7 @@ class ProcessJCRInvoices:
             iva_percentage: IVA percentage to use
             username: Username of the person processing
             progress_callback: Optional callback for progress updates (current, total)
+            force: Process again even if an identical run was already exported
 
         Returns:
             Tuple of (success, message, records_processed)
@@ -49,81 +66,92 @@ class ProcessJCRInvoices:
         if not csv_files:
             return False, "No se seleccionaron archivos CSV/TXT", 0
 
-        all_invoices: List[Invoice] = []
-        original_quantities = {}  # Store original quantities for export
-        total_files = len(csv_files)
-
-        # Parse all CSV/TXT files
-        for idx, csv_file in enumerate(csv_files):
-            if progress_callback:
-                progress_callback(idx, total_files)
-
-            try:
-                # Create parser instance for this file
-                from ...infrastructure.parsers.jcr_csv_parser import JCRCsvParser
-
-                parser = JCRCsvParser(csv_file, iva_percentage=iva_percentage)
-                invoices = parser.parse()
-
-                # Store original quantities before conversion
+        def parse(failures, warnings):
+            # Original quantities travel on each product (product.original_quantity),
+            # so no side dictionary has to be kept alive for the export
+            parsed = self._iter_parsed(csv_files, iva_percentage, progress_callback, failures, warnings)
+            for _, invoices in parsed:
                 for invoice in invoices:
-                    for product in invoice.products:
-                        key = (invoice.invoice_number, product.name)
-                        original_quantities[key] = product.original_quantity
-
                     # Set municipality if not already set
                     if not invoice.seller_municipality:
                         invoice.seller_municipality = municipality
-
-                all_invoices.extend(invoices)
-
-            except Exception as e:
-                # Continue processing other files even if one fails
-                print(f"Error processing {csv_file}: {str(e)}")
-                return False, f"Error procesando archivo {Path(csv_file).name}: {str(e)}", 0
-
-        if not all_invoices:
-            return False, "No se encontraron facturas validas en los archivos", 0
-
-        # Export invoices to Reggis format
-        try:
-            # Update exporter with municipality and IVA
-            self.reggis_exporter.municipality = municipality
-            self.reggis_exporter.iva_percentage = iva_percentage
-
-            output_file = self.reggis_exporter.export_to_reggis_csv(
-                all_invoices,
-                original_quantities
-            )
-            message = f"Datos exportados exitosamente al formato Reggis:\n{output_file}"
-
-        except Exception as e:
-            return False, f"Error al exportar datos: {str(e)}", 0
-
-        # Calculate total records (sum of all products in all invoices)
-        total_records = sum(invoice.get_product_count() for invoice in all_invoices)
-
-        # Calculate total file size
-        total_size = sum(
-            Path(csv_file).stat().st_size
-            for csv_file in csv_files
-            if Path(csv_file).exists()
-        )
-
-        # Create report
-        report = Report(
-            id=None,
-            username=username,
-            company="JUAN CAMILO ROSAS",
-            filename=", ".join([Path(f).name for f in csv_files]),
-            records_processed=total_records,
-            created_at=datetime.now(),
-            file_size=total_size
+                yield invoices
+
+        def export(invoices):
+            # Per-run options are arguments: the exporter is shared with other runs
+            output_file = self.reggis_exporter.export_to_reggis_csv(invoices, municipality=municipality)
+            return output_file, f"Datos exportados exitosamente al formato Reggis:\n{output_file}"
+
+        return self._run(
+            "JUAN CAMILO ROSAS",
+            username,
+            csv_files,
+            parse,
+            export,
+            progress_callback,
+            force,
+            fingerprint_options={'municipality': municipality, 'iva_percentage': iva_percentage}
         )
 
-        self.report_repository.create(report)
-
-        if progress_callback:
-            progress_callback(total_files, total_files)
+    # --- Helpers ---
+    def _iter_parsed(
+        self,
+        csv_files: List[str],
+        iva_percentage: str,
+        progress_callback: Optional[Callable[[int, int], None]],
+        failures: list,
+        warnings: List[str]
+    ):
+        """Yield (path, invoices) for each file in order, in parallel when a scheduler is set"""
+        # Files parsed in the background since they were selected are ready
+        prefetched = [self._take_prefetched(csv_file, iva_percentage, warnings) for csv_file in csv_files]
+
+        if self.work_scheduler:
+            parsed = self.work_scheduler.parse_csv_files(
+                [f for f, invoices in zip(csv_files, prefetched) if invoices is None],
+                iva_percentage,
+                progress_callback,
+                failures,
+                warnings
+            )
+            try:
+                for csv_file, invoices in zip(csv_files, prefetched):
+                    if invoices is None:
+                        _, invoices = next(parsed)
+                    yield csv_file, invoices
+            finally:
+                parsed.close()
+            return
+
+        parser_class = self._get_parser_class()
+        total_files = len(csv_files)
+        for idx, csv_file in enumerate(csv_files):
+            if progress_callback:
+                progress_callback(idx, total_files)
 
-        return True, message, total_records
+            invoices = prefetched[idx]
+            if invoices is None:
+                try:
+                    # Parsed whole so that a file failing halfway adds nothing
+                    parser = parser_class(csv_file, iva_percentage=iva_percentage)
+                    invoices = parser.parse()
+                except Exception as e:
+                    # Continue processing other files even if one fails
+                    print(f"Error processing {csv_file}: {str(e)}")
+                    failures.append(FileError(csv_file, str(e)))
+                    continue
+                warnings.extend(getattr(parser, 'warnings', []))
+            yield csv_file, invoices
+
+    def _get_parser_class(self):
+        if self.csv_parser:
+            return self.csv_parser
+        from ...infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+        return JCRCsvParser
+
+    def _take_prefetched(self, csv_file: str, iva_percentage: str, warnings: List[str]) -> Optional[List[Invoice]]:
+        """Invoices parsed in the background when the file was selected, if still valid"""
+        if self.parse_cache:
+            # The default IVA is applied while parsing, so it must match the selection's
+            return self.parse_cache.take('jcr', csv_file, iva_percentage, warnings)
+        return None
@@ -2,18 +2,18 @@
 Process El Paisano Invoices Use Case
 Parses XML invoices from folders and exports to Reggis CSV
 """
-from typing import List, Callable, Optional
+from typing import Any, List, Callable, Optional
 from decimal import Decimal
-from datetime import datetime
 from pathlib import Path
 import unicodedata
 
 from ..entities.invoice import Invoice
-from ..entities.report import Report
 from ..repositories.report_repository import ReportRepositoryInterface
+from ..repositories.run_cache_repository import RunCacheRepositoryInterface
+from .invoice_run import FileError, InvoiceRunUseCase
 
 
-class ProcessPaisanoInvoices:
+class ProcessPaisanoInvoices(InvoiceRunUseCase):
     """Use case for processing El Paisano invoices from XML/PDF files"""
 
     # Conversion map: Product name -> Kilos per unit
@@ -86,9 +86,25 @@ class ProcessPaisanoInvoices:
         report_repository: ReportRepositoryInterface,
         xml_parser,  # XMLInvoiceParser
         reggis_exporter,  # JCRReggisExporter (Reggis CSV exporter)
-        conversion_repository=None  # PaisanoConversionRepository
+        conversion_repository=None,  # PaisanoConversionRepository
+        invoice_buffer_factory: Optional[Callable[[], Any]] = None,  # SpillingInvoiceBuffer factory
+        work_scheduler=None,  # InvoiceWorkScheduler - parallel XML parsing
+        run_cache: Optional[RunCacheRepositoryInterface] = None,
+        admission_controller=None,  # AdmissionController - process-wide file/memory limits
+        parse_cache=None,  # SpeculativeParseCache - inputs parsed in the background when selected
+        preflight_scanner=None,  # PreflightScanner - integrity check and throughput history
+        string_pool_factory: Optional[Callable[[], Any]] = None  # StringPool factory - one pool per run
     ):
-        self.report_repository = report_repository
+        super().__init__(
+            report_repository,
+            invoice_buffer_factory=invoice_buffer_factory,
+            work_scheduler=work_scheduler,
+            run_cache=run_cache,
+            admission_controller=admission_controller,
+            parse_cache=parse_cache,
+            preflight_scanner=preflight_scanner,
+            string_pool_factory=string_pool_factory
+        )
         self.xml_parser = xml_parser
         self.reggis_exporter = reggis_exporter
         self.conversion_repository = conversion_repository
@@ -98,7 +114,8 @@ class ProcessPaisanoInvoices:
         self,
         input_paths: List[str],
         username: str,
-        progress_callback: Optional[Callable[[int, int], None]] = None
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        force: bool = False
     ) -> tuple[bool, str, int]:
         """
         Process XML invoices (folders or individual files) and export to Reggis CSV
@@ -107,6 +124,7 @@ class ProcessPaisanoInvoices:
             input_paths: List of folder paths or XML file paths
             username: Username of the person processing
             progress_callback: Optional callback for progress updates (current, total)
+            force: Process again even if an identical run was already exported
 
         Returns:
             Tuple of (success, message, records_processed)
@@ -114,109 +132,122 @@ class ProcessPaisanoInvoices:
         if not input_paths:
             return False, "No se seleccionaron archivos o carpetas", 0
 
-        all_invoices: List[Invoice] = []
         files_to_process = self._expand_input_paths(input_paths)
         total_items = len(files_to_process)
 
         if not total_items:
             return False, "No se encontraron archivos XML", 0
 
-        # Reload catalog each run to pick up new conversions
-        self._reload_catalog()
+        # Reload catalog each run to pick up new conversions; the run only uses
+        # its own snapshot, so a concurrent reload cannot change it midway
+        catalog = self._reload_catalog()
+
+        paths = [str(f) for f in files_to_process]
+        missing_products = 0
+
+        def parse(failures, warnings):
+            nonlocal missing_products
+            for path, invoices in self._iter_parsed(files_to_process, progress_callback, failures):
+                try:
+                    # Convert before buffering: buffered invoices may already be on disk
+                    for invoice in invoices:
+                        missing_products += self._convert_invoice(invoice, catalog)
+                except Exception as exc:
+                    print(f"Error processing {path}: {exc}")
+                    failures.append(FileError(str(path), str(exc)))
+                    continue
+                yield invoices
+
+        def export(invoices):
+            # Municipality comes from each invoice; original quantities travel
+            # on each product (product.original_quantity)
+            output_file = self.reggis_exporter.export_to_reggis_csv(
+                invoices,
+                company="EL PAISANO",
+                municipality=""
+            )
+            message = f"Datos exportados exitosamente al formato Reggis:\n{output_file}"
+            if missing_products:
+                message += f"\nAdvertencia: {missing_products} productos sin factor de conversion (usado 1:1)."
+            return output_file, message
+
+        return self._run(
+            "EL PAISANO",
+            username,
+            paths,
+            parse,
+            export,
+            progress_callback,
+            force,
+            # The conversion catalog changes results, so it is part of the fingerprint
+            fingerprint_options={'catalog': sorted((name, str(factor)) for name, factor, _ in catalog)},
+            report_filename=", ".join([Path(f).name for f in input_paths])
+        )
 
-        for idx, path in enumerate(files_to_process):
-            if progress_callback:
-                progress_callback(idx, total_items)
+    def _convert_invoice(self, invoice: Invoice, catalog: Optional[list] = None) -> int:
+        """
+        Apply conversion factors to kilos and recompute unit prices in place
 
-            try:
-                invoices = self._parse_input_path(path)
-                all_invoices.extend(invoices)
-            except Exception as exc:
-                print(f"Error processing {path}: {exc}")
-                continue
+        Args:
+            invoice: Parsed invoice
+            catalog: Catalog snapshot of the run (defaults to the last one loaded)
 
-        if not all_invoices:
-            return False, "No se encontraron facturas validas en los archivos", 0
+        Returns:
+            Number of products without a conversion factor (exported 1:1)
+        """
+        missing_products = 0
 
-        try:
-            # Apply conversion factors to kilos and recompute unit price
-            original_quantities = {}
-            missing_products = 0
-
-            for invoice in all_invoices:
-                for product in invoice.products:
-                    # Guardar cantidad original si no está ya establecida (viene del XML)
-                    if product.original_quantity is None:
-                        product.original_quantity = product.quantity
-
-                    original_qty = product.original_quantity
-
-                    # Get conversion factor (catalog first, then heuristics)
-                    # NUEVO: Ajustar factor según la unidad original (UND, P25, CJ, etc.)
-                    factor = self._calculate_conversion_factor_with_unit(
-                        product.name,
-                        product.original_unit_code or product.unit_of_measure
-                    )
-                    if factor == Decimal("1"):
-                        missing_products += 1
+        for product in invoice.products:
+            # Guardar cantidad original si no está ya establecida (viene del XML)
+            if product.original_quantity is None:
+                product.original_quantity = product.quantity
 
-                    # Force underlying code
-                    product.underlying_code = "SPN-1"
+            original_qty = product.original_quantity
 
-                    # Convert quantity to kg: kilos_totales = Factor * Cantidad_Factura
-                    converted_qty = original_qty * factor
-                    product.quantity = converted_qty
+            # Get conversion factor (catalog first, then heuristics)
+            # NUEVO: Ajustar factor según la unidad original (UND, P25, CJ, etc.)
+            factor = self._calculate_conversion_factor_with_unit(
+                product.name,
+                product.original_unit_code or product.unit_of_measure,
+                catalog
+            )
+            if factor == Decimal("1"):
+                missing_products += 1
 
-                    # NUEVO: Detectar aceites y cambiar unidad a LT (litros)
-                    if self._is_oil_product(product.name):
-                        product.unit_of_measure = "Lt" if factor != Decimal("1") else "Un"
-                    else:
-                        product.unit_of_measure = "Kg" if factor != Decimal("1") else "Un"
+            # Force underlying code
+            product.underlying_code = "SPN-1"
 
-                    # Recalculate unit price based on converted quantity
-                    if converted_qty > 0:
-                        product.unit_price = product.total_price / converted_qty
+            # Convert quantity to kg: kilos_totales = Factor * Cantidad_Factura
+            converted_qty = original_qty * factor
+            product.quantity = converted_qty
 
-                    original_quantities[(invoice.invoice_number, product.name)] = original_qty
+            # NUEVO: Detectar aceites y cambiar unidad a LT (litros)
+            if self._is_oil_product(product.name):
+                product.unit_of_measure = "Lt" if factor != Decimal("1") else "Un"
+            else:
+                product.unit_of_measure = "Kg" if factor != Decimal("1") else "Un"
 
-            # Default to using invoice data for municipio/IVA; keep exporter defaults
-            self.reggis_exporter.municipality = ""
-            self.reggis_exporter.iva_percentage = "0"
+            # Recalculate unit price based on converted quantity
+            if converted_qty > 0:
+                product.unit_price = product.total_price / converted_qty
 
-            output_file = self.reggis_exporter.export_to_reggis_csv(
-                all_invoices,
-                original_quantities=original_quantities,
-                company="EL PAISANO"
-            )
-            message = f"Datos exportados exitosamente al formato Reggis:\\n{output_file}"
-            if missing_products:
-                message += f"\\nAdvertencia: {missing_products} productos sin factor de conversion (usado 1:1)."
-        except Exception as exc:
-            return False, f"Error al exportar datos: {exc}", 0
-
-        total_records = sum(invoice.get_product_count() for invoice in all_invoices)
-        total_size = sum(Path(p).stat().st_size for p in files_to_process if Path(p).exists())
-
-        report = Report(
-            id=None,
-            username=username,
-            company="EL PAISANO",
-            filename=", ".join([Path(f).name for f in input_paths]),
-            records_processed=total_records,
-            created_at=datetime.now(),
-            file_size=total_size
-        )
-        self.report_repository.create(report)
+        return missing_products
 
-        if progress_callback:
-            progress_callback(total_items, total_items)
+    # --- Helpers ---
+    def _take_prefetched(self, path: Path) -> Optional[List[Invoice]]:
+        """Invoices parsed in the background when the file was selected, if still valid"""
+        if self.parse_cache:
+            return self.parse_cache.take('xml', str(path))
+        return None
 
-        return True, message, total_records
+    def _reload_catalog(self) -> list:
+        """
+        Load hardcoded + DB conversions and precompute tokens for fuzzy matching
 
-    # --- Helpers ---
-    def _reload_catalog(self):
-        """Load hardcoded + DB conversions and precompute tokens for fuzzy matching"""
-        self._normalized_catalog = []
+        Returns:
+            New catalog snapshot [(name, factor, tokens)], also kept as the default
+        """
+        normalized_catalog = []
         catalog = dict(self.CONVERSION_MAP)
         if self.conversion_repository:
             try:
@@ -226,7 +257,10 @@ class ProcessPaisanoInvoices:
                 print(f"Error loading Paisano conversions from DB: {exc}")
         for name, factor in catalog.items():
             tokens = self._normalize_tokens(name)
-            self._normalized_catalog.append((name, factor, tokens))
+            normalized_catalog.append((name, factor, tokens))
+        # Swapped in one step: concurrent runs never see a half-built catalog
+        self._normalized_catalog = normalized_catalog
+        return normalized_catalog
 
     def _normalize_tokens(self, name: str) -> List[str]:
         """Normalize product name into a list of tokens for fuzzy matching"""
@@ -307,7 +341,9 @@ class ProcessPaisanoInvoices:
             "modifiers": modifiers
         }
 
-    def _calculate_conversion_factor_with_unit(self, product_name: str, unit_code: str) -> Decimal:
+    def _calculate_conversion_factor_with_unit(
+        self, product_name: str, unit_code: str, catalog: Optional[list] = None
+    ) -> Decimal:
         """
         Calculate conversion factor considering both product name AND unit code.
 
@@ -320,7 +356,7 @@ class ProcessPaisanoInvoices:
         - Kg: Kilos (ya está en kilos, factor 1.0)
         """
         if not unit_code:
-            return self._calculate_conversion_factor(product_name)
+            return self._calculate_conversion_factor(product_name, catalog)
 
         unit_upper = unit_code.upper().strip()
 
@@ -417,16 +453,16 @@ class ProcessPaisanoInvoices:
                     return factor
 
             # Si no se pudo extraer, usar el factor del catálogo
-            factor = self._calculate_conversion_factor(product_name)
+            factor = self._calculate_conversion_factor(product_name, catalog)
             print(f"[CONVERSION] {product_name} con CJ: Factor del catálogo = {factor} kg")
             return factor
 
         # Para otros casos, usar el factor del catálogo
-        factor = self._calculate_conversion_factor(product_name)
+        factor = self._calculate_conversion_factor(product_name, catalog)
         print(f"[CONVERSION] {product_name} con {unit_code}: Factor del catálogo = {factor} kg")
         return factor
 
-    def _calculate_conversion_factor(self, product_name: str) -> Decimal:
+    def _calculate_conversion_factor(self, product_name: str, catalog: Optional[list] = None) -> Decimal:
         """
         Calculate conversion factor with multiple strategies:
         1. Catalog/fuzzy match (preferred)
@@ -435,7 +471,7 @@ class ProcessPaisanoInvoices:
         4. Bulk products (AGRANEL) default to 50kg
         """
         # Try catalog (returns None if no match)
-        catalog_factor = self._get_conversion_factor(product_name)
+        catalog_factor = self._get_conversion_factor(product_name, catalog)
         if catalog_factor is not None:
             return catalog_factor
 
@@ -453,7 +489,7 @@ class ProcessPaisanoInvoices:
 
         return Decimal("1")
 
-    def _get_conversion_factor(self, product_name: str) -> Optional[Decimal]:
+    def _get_conversion_factor(self, product_name: str, catalog: Optional[list] = None) -> Optional[Decimal]:
         """
         Get conversion factor from catalog using fuzzy matching.
 
@@ -464,9 +500,9 @@ class ProcessPaisanoInvoices:
             return None
 
         normalized_tokens = self._normalize_tokens(product_name)
-        return self._match_factor(normalized_tokens)
+        return self._match_factor(normalized_tokens, catalog)
 
-    def _match_factor(self, tokens: List[str]):
+    def _match_factor(self, tokens: List[str], catalog: Optional[list] = None):
         """
         Find best factor by intelligent component matching.
 
@@ -495,7 +531,10 @@ class ProcessPaisanoInvoices:
         best_factor = None
         best_match_type = None
 
-        for _, factor, cat_tokens in self._normalized_catalog:
+        if catalog is None:
+            catalog = self._normalized_catalog
+
+        for _, factor, cat_tokens in catalog:
             # Extract components from catalog entry
             cat_components = self._extract_key_components(cat_tokens)
             cat_core = set(cat_components["core_words"])
@@ -668,6 +707,45 @@ class ProcessPaisanoInvoices:
                 collected.append(p)
         return collected
 
+    def _iter_parsed(
+        self,
+        files: List[Path],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        failures: Optional[list] = None
+    ):
+        """Yield (path, invoices) for each file in order, in parallel when a scheduler is set"""
+        # Files parsed in the background since they were selected only need conversion
+        prefetched = [self._take_prefetched(path) for path in files]
+
+        if self.work_scheduler:
+            parsed = self.work_scheduler.parse(
+                [str(f) for f, invoices in zip(files, prefetched) if invoices is None],
+                progress_callback,
+                failures
+            )
+            try:
+                for path, invoices in zip(files, prefetched):
+                    if invoices is None:
+                        _, invoices = next(parsed)
+                    yield path, invoices
+            finally:
+                parsed.close()
+            return
+
+        total_items = len(files)
+        for idx, path in enumerate(files):
+            if progress_callback:
+                progress_callback(idx, total_items)
+
+            try:
+                invoices = prefetched[idx]
+                yield path, invoices if invoices is not None else self._parse_input_path(path)
+            except Exception as exc:
+                print(f"Error processing {path}: {exc}")
+                if failures is not None:
+                    failures.append(FileError(str(path), str(exc)))
+                continue
+
     def _parse_input_path(self, path: Path) -> List[Invoice]:
         """Parse a single XML path into invoices"""
         if not path.exists() or not path.is_file():
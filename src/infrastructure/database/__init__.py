@@ -3,5 +3,8 @@ Database repositories
 """
 from .sqlite_user_repository import SQLiteUserRepository
 from .sqlite_report_repository import SQLiteReportRepository
+from .sqlite_run_cache_repository import SQLiteRunCacheRepository
+from .sqlite_throughput_repository import SQLiteThroughputRepository
 
-__all__ = ['SQLiteUserRepository', 'SQLiteReportRepository']
+__all__ = ['SQLiteUserRepository', 'SQLiteReportRepository', 'SQLiteRunCacheRepository',
+           'SQLiteThroughputRepository']
@@ -0,0 +1,138 @@
+"""
+SQLite implementation of Run Cache Repository
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ...domain.entities.cached_run import CachedRun
+from ...domain.repositories.run_cache_repository import RunCacheRepositoryInterface
+
+
+SRC_ROOT = Path(__file__).resolve().parents[2]
+
+
+class SQLiteRunCacheRepository(RunCacheRepositoryInterface):
+    """Remembers recent runs so an identical selection returns the existing output"""
+
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, db_path: str = "facturas_users.db", code_version: str = "", max_age_hours: float = 24):
+        """
+        Initialize the repository
+
+        Args:
+            db_path: Path to the SQLite database file
+            code_version: Application version, part of every fingerprint
+            max_age_hours: Runs older than this are not reused
+        """
+        self.db_path = db_path
+        self.max_age = timedelta(hours=max_age_hours)
+        self.code_version = f"{code_version}:{self._source_digest()}"
+        # (path, size, mtime_ns) -> sha256, so unchanged files are hashed once per session
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the database with required tables"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS run_cache (
+                    fingerprint TEXT PRIMARY KEY,
+                    company TEXT NOT NULL,
+                    output_path TEXT NOT NULL,
+                    records_processed INTEGER NOT NULL,
+                    created_at TIMESTAMP NOT NULL
+                )
+            ''')
+            conn.commit()
+
+    def fingerprint(self, company: str, paths: List[str], params: Dict) -> str:
+        """Fingerprint of a run: input file hashes, company, parameters and code version"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(
+            {'company': company, 'params': params, 'version': self.code_version},
+            sort_keys=True, default=str
+        ).encode('utf-8'))
+
+        # Selection order matters, it is the order of the output rows
+        for path in paths:
+            path = Path(path)
+            if path.is_dir():
+                for file_path in sorted(p for p in path.rglob('*') if p.is_file()):
+                    digest.update(file_path.relative_to(path).as_posix().encode('utf-8'))
+                    digest.update(self._hash_file(file_path).encode('ascii'))
+            else:
+                digest.update(path.name.encode('utf-8'))
+                digest.update(self._hash_file(path).encode('ascii'))
+        return digest.hexdigest()
+
+    def find(self, fingerprint: str) -> Optional[CachedRun]:
+        """Get a recent run with this fingerprint"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT fingerprint, company, output_path, records_processed, created_at '
+                'FROM run_cache WHERE fingerprint = ?',
+                (fingerprint,)
+            ).fetchone()
+        if not row:
+            return None
+
+        run = CachedRun(
+            fingerprint=row[0],
+            company=row[1],
+            output_path=row[2],
+            records_processed=row[3],
+            created_at=datetime.fromisoformat(row[4])
+        )
+        if datetime.now() - run.created_at > self.max_age:
+            return None
+        return run
+
+    def save(self, run: CachedRun) -> None:
+        """Store the result of a run"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO run_cache '
+                '(fingerprint, company, output_path, records_processed, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (run.fingerprint, run.company, run.output_path,
+                 run.records_processed, run.created_at.isoformat())
+            )
+            conn.execute(
+                'DELETE FROM run_cache WHERE created_at < ?',
+                ((datetime.now() - self.max_age).isoformat(),)
+            )
+            conn.commit()
+
+    def _hash_file(self, path: Path) -> str:
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._file_hashes.get(key)
+        if cached:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        with self._lock:
+            self._file_hashes[key] = file_hash
+        return file_hash
+
+    @staticmethod
+    def _source_digest() -> str:
+        """Hash of the application sources, so code changes invalidate cached runs"""
+        digest = hashlib.sha256()
+        for source in sorted(SRC_ROOT.rglob('*.py')):
+            digest.update(source.relative_to(SRC_ROOT).as_posix().encode('utf-8'))
+            digest.update(source.read_bytes())
+        # Frozen builds ship no .py files, the application version covers them
+        return digest.hexdigest()[:16]
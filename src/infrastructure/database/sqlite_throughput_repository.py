@@ -0,0 +1,68 @@
+"""
+SQLite implementation of the run throughput history
+"""
+import sqlite3
+from datetime import datetime
+from statistics import median
+from typing import Optional
+
+
+class SQLiteThroughputRepository:
+    """Measured input bytes per second of past runs, per company"""
+
+    # Runs kept per company; the estimate uses the median of the most recent ones
+    HISTORY_SIZE = 50
+
+    def __init__(self, db_path: str = "facturas_users.db"):
+        """
+        Initialize the repository
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the database with required tables"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS run_throughput (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    company TEXT NOT NULL,
+                    input_bytes INTEGER NOT NULL,
+                    seconds REAL NOT NULL,
+                    records INTEGER NOT NULL,
+                    created_at TIMESTAMP NOT NULL
+                )
+            ''')
+            conn.commit()
+
+    def record(self, company: str, input_bytes: int, seconds: float, records: int) -> None:
+        """Store the measurements of a finished run"""
+        if input_bytes <= 0 or seconds <= 0:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                'INSERT INTO run_throughput (company, input_bytes, seconds, records, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (company, input_bytes, seconds, records, datetime.now().isoformat())
+            )
+            conn.execute(
+                'DELETE FROM run_throughput WHERE company = ? AND id NOT IN ('
+                'SELECT id FROM run_throughput WHERE company = ? ORDER BY id DESC LIMIT ?)',
+                (company, company, self.HISTORY_SIZE)
+            )
+            conn.commit()
+
+    def bytes_per_second(self, company: str) -> Optional[float]:
+        """Median throughput of the recent runs of a company, None without history"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                'SELECT input_bytes, seconds FROM run_throughput WHERE company = ? '
+                'ORDER BY id DESC LIMIT ?',
+                (company, self.HISTORY_SIZE)
+            ).fetchall()
+        if not rows:
+            return None
+        return median(input_bytes / seconds for input_bytes, seconds in rows)
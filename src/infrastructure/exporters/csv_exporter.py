@@ -5,21 +5,54 @@ CSV Exporter - Exports invoices and reports to CSV format
 import csv
 from pathlib import Path
 from datetime import datetime
-from typing import List
+from typing import Iterable, Iterator, List, Sequence
 
 from ...domain.entities.invoice import Invoice
 from ...domain.entities.report import Report
+from .output_path import reserve_output_path
 
 
 class CSVExporter:
     """Exports data to CSV format with Excel compatibility (UTF-8 BOM, semicolon separator)"""
 
-    def export_to_csv(self, invoices: List[Invoice], company: str) -> str:
+    # Fields of each invoice row, in the order _iter_rows() builds them
+    ROW_FIELDS = (
+        'N? Factura',
+        'Nombre Producto',
+        'Codigo Subyacente',
+        'Unidad Medida',
+        'Cantidad',
+        'Precio Unitario',
+        'Precio Total',
+        'Fecha Factura',
+        'Fecha Pago',
+        'Nit Comprador',
+        'Nombre Comprador',
+        'Nit Vendedor',
+        'Nombre Vendedor',
+        'Principal V,C',
+        'Municipio',
+        'Iva',
+        'Descripci?n',
+        'Activa Factura',
+        'Activa Bodega',
+        'Incentivo',
+        'Cantidad Original',
+        'Moneda'
+    )
+
+    # Output file buffer: rows reach the disk in blocks of this size
+    WRITE_BUFFER_BYTES = 1024 * 1024
+
+    def export_to_csv(self, invoices: Iterable[Invoice], company: str) -> str:
         """
         Export invoices to CSV file
 
+        Rows are streamed to the file as the invoices are iterated, so the
+        export itself holds no more than one invoice at a time.
+
         Args:
-            invoices: List of Invoice entities
+            invoices: Invoice entities (any iterable)
             company: Company name (e.g., 'AGROBUITRON')
 
         Returns:
@@ -28,58 +61,80 @@ class CSVExporter:
         now = datetime.now()
         timestamp = now.strftime("%Y%m%d_%H%M%S")
         date_folder = now.strftime("%d-%m-%Y")
-        filename = f"{company}_Facturas_{timestamp}.csv"
         output_dir = Path("data") / company / date_folder / "archivos"
         output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = output_dir / filename
+        output_path = reserve_output_path(output_dir, f"{company}_Facturas_{timestamp}", '.csv')
 
         # Define column order (specific for each company)
         column_order = self._get_column_order(company)
 
-        # Prepare rows
-        rows = []
-        for invoice in invoices:
-            for product in invoice.products:
-                row = {
-                    'N? Factura': invoice.invoice_number,
-                    'Nombre Producto': product.name,
-                    'Codigo Subyacente': product.underlying_code,
-                    'Unidad Medida': product.unit_of_measure,
-                    'Cantidad': product.get_formatted_quantity(),
-                    'Precio Unitario': product.get_formatted_unit_price(),
-                    'Precio Total': product.get_formatted_total_price(),
-                    'Fecha Factura': invoice.get_issue_date_formatted(),
-                    'Fecha Pago': invoice.get_due_date_formatted(),
-                    'Nit Comprador': invoice.buyer_nit,
-                    'Nombre Comprador': invoice.buyer_name,
-                    'Nit Vendedor': invoice.seller_nit,
-                    'Nombre Vendedor': invoice.seller_name,
-                    'Principal V,C': 'V',
-                    'Municipio': invoice.seller_municipality,
-                    'Iva': f"{product.get_formatted_iva()}%",
-                    'Descripci?n': '',
-                    'Activa Factura': 'S?',
-                    'Activa Bodega': 'S?',
-                    'Incentivo': '',
-                    'Cantidad Original': product.get_formatted_quantity(),
-                    'Moneda': invoice.format_currency_code()
-                }
-                rows.append(row)
-
         # Write CSV with UTF-8 BOM for Excel compatibility
-        with output_path.open('w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(
-                csvfile,
-                fieldnames=column_order,
-                delimiter=';',
-                extrasaction='ignore'
-            )
-
-            writer.writeheader()
-            writer.writerows(rows)
+        try:
+            with output_path.open(
+                'w', newline='', encoding='utf-8-sig', buffering=self.WRITE_BUFFER_BYTES
+            ) as csvfile:
+                writer = csv.writer(csvfile, delimiter=';')
+                writer.writerow(column_order)
+                writer.writerows(self._iter_rows(invoices, column_order))
+        except Exception:
+            output_path.unlink(missing_ok=True)
+            raise
 
         return str(output_path.resolve())
 
+    def _iter_rows(self, invoices: Iterable[Invoice], column_order: Sequence[str]) -> Iterator[tuple]:
+        """
+        One tuple per product line with the values of column_order
+
+        Columns missing from ROW_FIELDS are left empty, like DictWriter did.
+        """
+        if tuple(column_order) == self.ROW_FIELDS:
+            positions = None
+        else:
+            positions = [
+                self.ROW_FIELDS.index(name) if name in self.ROW_FIELDS else None
+                for name in column_order
+            ]
+
+        for invoice in invoices:
+            if not invoice.products:
+                continue
+
+            # Invoice values repeat on every line
+            issue_date = invoice.get_issue_date_formatted()
+            due_date = invoice.get_due_date_formatted()
+            currency = invoice.format_currency_code()
+
+            for product in invoice.products:
+                quantity = product.get_formatted_quantity()
+                row = (
+                    invoice.invoice_number,
+                    product.name,
+                    product.underlying_code,
+                    product.unit_of_measure,
+                    quantity,
+                    product.get_formatted_unit_price(),
+                    product.get_formatted_total_price(),
+                    issue_date,
+                    due_date,
+                    invoice.buyer_nit,
+                    invoice.buyer_name,
+                    invoice.seller_nit,
+                    invoice.seller_name,
+                    'V',
+                    invoice.seller_municipality,
+                    f"{product.get_formatted_iva()}%",
+                    '',
+                    'S?',
+                    'S?',
+                    '',
+                    quantity,  # Cantidad Original
+                    currency
+                )
+                if positions is not None:
+                    row = tuple('' if position is None else row[position] for position in positions)
+                yield row
+
     def export_reports(self, reports: List[Report], output_path: str) -> None:
         """
         Export reports to CSV file
@@ -132,27 +187,4 @@ class CSVExporter:
         """
         # For now, all companies use the same column order
         # This can be customized per company in the future
-        return [
-            'N? Factura',
-            'Nombre Producto',
-            'Codigo Subyacente',
-            'Unidad Medida',
-            'Cantidad',
-            'Precio Unitario',
-            'Precio Total',
-            'Fecha Factura',
-            'Fecha Pago',
-            'Nit Comprador',
-            'Nombre Comprador',
-            'Nit Vendedor',
-            'Nombre Vendedor',
-            'Principal V,C',
-            'Municipio',
-            'Iva',
-            'Descripci?n',
-            'Activa Factura',
-            'Activa Bodega',
-            'Incentivo',
-            'Cantidad Original',
-            'Moneda'
-        ]
+        return list(self.ROW_FIELDS)
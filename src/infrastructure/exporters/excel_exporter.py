@@ -1,10 +1,24 @@
 """
 Excel Exporter - Exports invoices to Excel format
 """
-from typing import List, Dict, Optional
+import os
+import threading
+from typing import Iterator, List, Dict, Optional
 from openpyxl import load_workbook
 
 from ...domain.entities.invoice import Invoice
+from .xlsx_append import append_rows
+
+
+# One lock per workbook: runs appending to the same file would overwrite each other's rows
+_workbook_locks: Dict[str, threading.Lock] = {}
+_workbook_locks_guard = threading.Lock()
+
+
+def _workbook_lock(excel_file: str) -> threading.Lock:
+    key = os.path.normcase(os.path.abspath(excel_file))
+    with _workbook_locks_guard:
+        return _workbook_locks.setdefault(key, threading.Lock())
 
 
 class ExcelExporter:
@@ -24,6 +38,40 @@ class ExcelExporter:
             excel_file: Path to existing Excel file
             sheet_name: Name of the sheet to update (uses active sheet if None)
         """
+        with _workbook_lock(excel_file):
+            if not self._append_to_sheet_part(invoices, excel_file, sheet_name):
+                self._append_to_workbook(invoices, excel_file, sheet_name)
+
+    def _append_to_sheet_part(
+        self,
+        invoices: List[Invoice],
+        excel_file: str,
+        sheet_name: Optional[str]
+    ) -> bool:
+        """
+        Append the rows rewriting only the worksheet XML (see xlsx_append)
+
+        Returns:
+            False if the workbook needs the openpyxl path (left unchanged)
+        """
+        def build_rows(headers: Dict[str, int]):
+            column_positions = self._column_positions(headers)
+            # Fields sharing a column: the last one wins, as with ws.cell() below
+            column_fields = {}
+            for field in self._get_field_mapping():
+                if field in column_positions:
+                    column_fields[column_positions[field]] = field
+            for row_data in self._iter_row_data(invoices):
+                yield {col_idx: row_data[field] for col_idx, field in column_fields.items()}
+
+        return append_rows(excel_file, sheet_name, build_rows)
+
+    def _append_to_workbook(
+        self,
+        invoices: List[Invoice],
+        excel_file: str,
+        sheet_name: Optional[str]
+    ) -> None:
         # Load workbook
         wb = load_workbook(excel_file)
 
@@ -36,16 +84,8 @@ class ExcelExporter:
         # Read headers from first row
         headers = self._read_headers(ws)
 
-        # Get field mapping for flexible column matching
-        field_mapping = self._get_field_mapping()
-
         # Find column positions for each field
-        column_positions = {}
-        for field, possible_names in field_mapping.items():
-            for col_name, col_idx in headers.items():
-                if col_name in possible_names:
-                    column_positions[field] = col_idx
-                    break
+        column_positions = self._column_positions(headers)
 
         # Find first empty row
         first_empty_row = ws.max_row + 1
@@ -56,10 +96,23 @@ class ExcelExporter:
 
         # Write invoice data
         current_row = first_empty_row
+        for row_data in self._iter_row_data(invoices):
+            # Write data to columns
+            for field, value in row_data.items():
+                if field in column_positions:
+                    col_idx = column_positions[field]
+                    ws.cell(row=current_row, column=col_idx, value=value)
+
+            current_row += 1
+
+        # Save workbook
+        wb.save(excel_file)
+
+    def _iter_row_data(self, invoices: List[Invoice]) -> Iterator[dict]:
+        """Field -> value of every product line"""
         for invoice in invoices:
             for product in invoice.products:
-                # Prepare row data
-                row_data = {
+                yield {
                     'N° Factura': invoice.invoice_number,
                     'Nombre Producto': product.name,
                     'Codigo Subyacente': product.underlying_code,
@@ -85,16 +138,23 @@ class ExcelExporter:
                     'Moneda': invoice.format_currency_code()
                 }
 
-                # Write data to columns
-                for field, value in row_data.items():
-                    if field in column_positions:
-                        col_idx = column_positions[field]
-                        ws.cell(row=current_row, column=col_idx, value=value)
+    def _column_positions(self, headers: Dict[str, int]) -> Dict[str, int]:
+        """
+        Find the column of each field among the headers
 
-                current_row += 1
+        Args:
+            headers: Header name -> column index
 
-        # Save workbook
-        wb.save(excel_file)
+        Returns:
+            Field name -> column index, for the fields found
+        """
+        column_positions = {}
+        for field, possible_names in self._get_field_mapping().items():
+            for col_name, col_idx in headers.items():
+                if col_name in possible_names:
+                    column_positions[field] = col_idx
+                    break
+        return column_positions
 
     def _read_headers(self, worksheet) -> Dict[str, int]:
         """
@@ -2,15 +2,26 @@
 """
 Reggis XLSX Exporter for Juan Camilo Rosas
 Exports invoices to the specific Reggis format in Excel
+
+Rows are written with a write-only workbook, which streams them to disk
+instead of keeping a cell object per value. Its column widths have to be
+known before the first row, so rows are first spooled to a temporary file
+while the widths are measured, then copied into the workbook.
 """
+import pickle
+import tempfile
 from pathlib import Path
 from datetime import datetime
-from typing import List
+from typing import IO, Iterable, Iterator, List, Optional
 from decimal import Decimal
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment
+from openpyxl.utils import get_column_letter
 
 from ...domain.entities.invoice import Invoice
+from ...domain.services.decimal_format import format_decimal
+from .output_path import reserve_output_path
 
 
 class JCRReggisExporter:
@@ -55,10 +66,24 @@ class JCRReggisExporter:
         'Valor Total'
     ]
 
+    SHEET_TITLE = "Facturas Reggis"
+
+    # Excel rows per sheet, header included; longer exports continue on
+    # "Facturas Reggis 2", 3...
+    MAX_SHEET_ROWS = 1048576
+    MAX_COLUMN_WIDTH = 50
+
+    # Rows per pickled block of the temporary spool
+    SPOOL_BLOCK_ROWS = 4096
+
     def __init__(self, municipality: str = '', iva_percentage: str = '0'):
         """
         Initialize exporter
 
+        The values are defaults only and are never changed afterwards, so one
+        instance can be shared by concurrent runs; per-run values are passed
+        to export_to_reggis_csv.
+
         Args:
             municipality: Municipality name for all invoices
             iva_percentage: Default IVA percentage
@@ -70,7 +95,8 @@ class JCRReggisExporter:
         self,
         invoices: List[Invoice],
         original_quantities: dict = None,
-        company: str = "JUAN CAMILO ROSAS"
+        company: str = "JUAN CAMILO ROSAS",
+        municipality: Optional[str] = None
     ) -> str:
         """
         Export invoices to Reggis XLSX format
@@ -79,34 +105,44 @@ class JCRReggisExporter:
             invoices: List of Invoice entities
             original_quantities: Dictionary mapping (invoice_number, product_name) to original quantity
             company: Company name used for output folder/name
+            municipality: Municipality for every row of this export ('' keeps each
+                invoice's own; None uses the exporter default)
 
         Returns:
             Path to the generated XLSX file
         """
+        if municipality is None:
+            municipality = self.municipality
+
         now = datetime.now()
         timestamp = now.strftime("%Y%m%d_%H%M%S")
         date_folder = now.strftime("%d-%m-%Y")
         safe_company = company if company else "JUAN CAMILO ROSAS"
         prefix = safe_company.replace(" ", "_")
-        filename = f"{prefix}_Reggis_Facturas_{timestamp}.xlsx"
         output_dir = Path("data") / safe_company / date_folder / "archivos"
         output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = output_dir / filename
 
-        # Create workbook and select active sheet
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Facturas Reggis"
+        output_path = reserve_output_path(output_dir, f"{prefix}_Reggis_Facturas_{timestamp}", '.xlsx')
+        try:
+            with tempfile.TemporaryFile(prefix='reggis_') as spool:
+                widths = self._spool_rows(self._iter_rows(invoices, original_quantities, municipality), spool)
+                spool.seek(0)
+                self._write_workbook(output_path, self._read_spool(spool), widths)
+        except Exception:
+            output_path.unlink(missing_ok=True)
+            raise
 
-        # Write header row with bold font
-        for col_idx, column_name in enumerate(self.REGGIS_COLUMNS, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=column_name)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
+        return str(output_path.resolve())
 
-        # Write data rows
-        row_idx = 2
+    def _iter_rows(
+        self,
+        invoices: Iterable[Invoice],
+        original_quantities: Optional[dict],
+        municipality: str
+    ) -> Iterator[List[list]]:
+        """Reggis rows of every invoice, one list of rows per invoice"""
         for invoice in invoices:
+            rows = []
             for product in invoice.products:
                 # Get original quantity if available
                 # Priority: 1) original_quantities dict, 2) product.original_quantity, 3) product.quantity (fallback)
@@ -135,7 +171,7 @@ class JCRReggisExporter:
                     invoice.seller_nit,  # Always '1003516945'
                     invoice.seller_name,  # Always 'JUAN CAMILO ROSAS'
                     'V',  # Always 'V'
-                    self.municipality if self.municipality else invoice.seller_municipality,
+                    municipality if municipality else invoice.seller_municipality,
                     f"{product.get_formatted_iva()}%",  # IVA del producto
                     '',  # Descripción - Always empty
                     '1',  # Activa - Always 1
@@ -146,30 +182,81 @@ class JCRReggisExporter:
                     '1',  # Moneda - Always 1 (COP)
                     self._format_decimal(product.total_price)
                 ]
+                rows.append(row_data)
+            yield rows
+
+    def _spool_rows(self, invoice_rows: Iterable[List[list]], spool: IO[bytes]) -> List[int]:
+        """
+        Pickle the rows to spool in blocks of whole invoices
+
+        Returns:
+            Longest value of each column, header included
+        """
+        widths = [len(name) for name in self.REGGIS_COLUMNS]
+        block: List[List[list]] = []
+        block_rows = 0
+
+        def flush():
+            pickle.dump(block, spool, protocol=pickle.HIGHEST_PROTOCOL)
+            for index, column in enumerate(zip(*(row for rows in block for row in rows))):
+                longest = max((len(str(value)) for value in column if value), default=0)
+                if longest > widths[index]:
+                    widths[index] = longest
+
+        for rows in invoice_rows:
+            block.append(rows)
+            block_rows += len(rows)
+            if block_rows >= self.SPOOL_BLOCK_ROWS:
+                flush()
+                block, block_rows = [], 0
+        if block:
+            flush()
+        return widths
+
+    @staticmethod
+    def _read_spool(spool: IO[bytes]) -> Iterator[List[list]]:
+        while True:
+            try:
+                block = pickle.load(spool)
+            except EOFError:
+                return
+            yield from block
+
+    def _write_workbook(self, output_path: Path, invoice_rows: Iterable[List[list]], widths: List[int]) -> None:
+        """Stream the rows into a write-only workbook, starting a new sheet before Excel's row limit"""
+        wb = Workbook(write_only=True)
+        ws = self._add_sheet(wb, widths)
+        sheet_rows = 1
+
+        for rows in invoice_rows:
+            # An invoice that does not fit moves whole to the next sheet
+            # (unless it would not fit on an empty sheet either)
+            if sheet_rows + len(rows) > self.MAX_SHEET_ROWS and sheet_rows > 1:
+                ws, sheet_rows = self._add_sheet(wb, widths), 1
+            for row_data in rows:
+                if sheet_rows >= self.MAX_SHEET_ROWS:
+                    ws, sheet_rows = self._add_sheet(wb, widths), 1
+                ws.append(row_data)
+                sheet_rows += 1
 
-                # Write row
-                for col_idx, value in enumerate(row_data, start=1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
-
-                row_idx += 1
-
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)  # Cap at 50
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Save workbook
         wb.save(output_path)
 
-        return str(output_path.resolve())
+    def _add_sheet(self, wb: Workbook, widths: List[int]):
+        """New sheet with the column widths and the bold header row"""
+        number = len(wb.worksheets) + 1
+        ws = wb.create_sheet(self.SHEET_TITLE if number == 1 else f"{self.SHEET_TITLE} {number}")
+
+        for col_idx, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 2, self.MAX_COLUMN_WIDTH)
+
+        header = []
+        for column_name in self.REGGIS_COLUMNS:
+            cell = WriteOnlyCell(ws, value=column_name)
+            cell.font = Font(bold=True)
+            cell.alignment = Alignment(horizontal='center')
+            header.append(cell)
+        ws.append(header)
+        return ws
 
     def _format_decimal(self, value) -> str:
         """
@@ -187,8 +274,4 @@ class JCRReggisExporter:
             except:
                 return "0,00000"
 
-        # Format with 5 decimals
-        formatted = f"{float(value):.5f}"
-
-        # Replace dot with comma
-        return formatted.replace('.', ',')
+        return format_decimal(value)
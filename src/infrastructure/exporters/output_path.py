@@ -0,0 +1,30 @@
+"""
+Output Path - Names of the files written by the exporters
+
+Exports of the same company can finish in the same second (concurrent runs
+or jobs), so the file is created exclusively instead of only named.
+"""
+from pathlib import Path
+
+
+def reserve_output_path(output_dir: Path, stem: str, suffix: str) -> Path:
+    """
+    Create an empty output file that no other export can take
+
+    Args:
+        output_dir: Folder of the export
+        stem: File name without counter or suffix
+        suffix: File extension, dot included
+
+    Returns:
+        Reserved path, with a _2, _3... suffix when the name is taken
+    """
+    counter = 1
+    while True:
+        name = f"{stem}{suffix}" if counter == 1 else f"{stem}_{counter}{suffix}"
+        path = output_dir / name
+        try:
+            with open(path, 'x'):
+                return path
+        except FileExistsError:
+            counter += 1
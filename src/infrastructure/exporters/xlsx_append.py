@@ -0,0 +1,534 @@
+"""
+XLSX Append - Add rows to one worksheet without loading the workbook
+
+openpyxl builds an object for every cell of every sheet on load and writes
+them all again on save, so appending a few hundred rows to a master
+workbook with years of history takes minutes. An .xlsx file is a zip of XML
+parts: append_rows() copies the compressed bytes of every part as they are
+except the target worksheet, which is streamed through once as bytes with
+the new rows inserted before </sheetData>. Only the header row is parsed.
+zipfile cannot add compressed bytes through its public API, so the new
+archive is written by _ZipWriter from the zip format specification.
+
+The target worksheet is still inflated and deflated again in full, so the
+time of an append grows with the size of that sheet (about half of it is
+spent compressing), though no longer with the rest of the workbook.
+
+The rows go after the last used row given by the sheet <dimension> (or
+found by the scan when there is none). The scan of the worksheet checks
+that this is also the first row from row 2 on with an empty first column
+(where openpyxl-based appends write); when it is not, or the file has a
+layout this module does not handle (including encrypted members and
+workbooks large enough to need ZIP64), nothing is changed and append_rows()
+returns False so the caller can fall back to openpyxl.
+"""
+import os
+import posixpath
+import re
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+RELATIONSHIPS_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_RELATIONSHIPS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+COPY_CHUNK_BYTES = 1024 * 1024
+MAX_HEAD_BYTES = 16 * 1024 * 1024  # Sheet XML read looking for the header row
+MAX_CELL_LENGTH = 32767  # Longer text is truncated, like openpyxl does
+
+_DIMENSION_RE = re.compile(rb'<dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"\s*/>')
+_HEADER_ROW_RE = re.compile(rb'<sheetData>\s*<row r="1"[^>]*(?<!/)>(.*?)</row>', re.S)
+# Row tags and the tags of first-column cells (group 3 is '/' for an empty cell)
+_SCAN_RE = re.compile(rb'<row\b([^>]*)>|<c r="A(\d+)"[^>]*?(/?)>')
+_ROW_NUMBER_RE = re.compile(rb'\br="(\d+)"')
+
+_SHEET_DATA_END = b'</sheetData>'
+
+# Zip records (PKWARE APPNOTE 4.3)
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+_LOCAL_CRC_OFFSET = 14
+_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+_CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+_END_RECORD = struct.Struct('<4s4H2LH')
+_END_RECORD_SIGNATURE = b'PK\x05\x06'
+_ZIP_VERSION = 20  # 2.0: deflate, folders
+_MAX_OFFSET = 0xFFFFFFFE  # Sizes and offsets beyond need ZIP64 records
+_MAX_ENTRIES = 0xFFFE
+
+# General purpose flag bits of a zip member
+_FLAG_ENCRYPTED = 0x1
+_FLAG_DATA_DESCRIPTOR = 0x8  # CRC and sizes follow the data instead of the local header
+_FLAG_UTF8 = 0x800
+
+
+def append_rows(
+    path: str,
+    sheet_name: Optional[str],
+    build_rows: Callable[[Dict[str, int]], Iterable[Dict[int, object]]]
+) -> bool:
+    """
+    Append rows to a worksheet by rewriting only its XML part
+
+    Args:
+        path: .xlsx file, replaced atomically on success
+        sheet_name: Target sheet (the active sheet if None or not found)
+        build_rows: Called with the header row (text -> column index, as
+            ExcelExporter reads it); returns one dict per new row mapping
+            column index to value (None and '' leave the cell empty)
+
+    Returns:
+        True if the rows were written, False if the file could not be
+        handled this way (left unchanged)
+    """
+    try:
+        source = zipfile.ZipFile(path)
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+    handle, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=os.path.dirname(os.path.abspath(path)))
+    os.close(handle)
+    replaced = False
+    try:
+        with source, open(path, 'rb') as source_file, open(temp_path, 'wb') as file:
+            parts = _find_sheet_part(source, sheet_name)
+            if parts is None:
+                return False
+            sheet_part, shared_strings_part = parts
+
+            target = _ZipWriter(file)
+            for info in source.infolist():
+                if info.filename != sheet_part:
+                    target.copy(source_file, info)
+                elif not _rewrite_sheet(source, info, target, shared_strings_part, build_rows):
+                    return False
+            target.close()
+
+        shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+        replaced = True
+        return True
+    except _Unsupported:
+        return False
+    finally:
+        if not replaced:
+            os.unlink(temp_path)
+
+
+# --- Helpers ---
+def _find_sheet_part(source: zipfile.ZipFile, sheet_name: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+    """Worksheet part of the sheet (openpyxl's choice of sheet) and the shared strings part"""
+    try:
+        package = _read_relationships(source, '')
+        workbook_part = next((path for kind, path in package.values() if kind.endswith('/officeDocument')), None)
+        if workbook_part is None:
+            return None
+
+        workbook = ElementTree.fromstring(source.read(workbook_part))
+        sheets = workbook.findall(f'{{{MAIN_NS}}}sheets/{{{MAIN_NS}}}sheet')
+        names = [sheet.get('name') for sheet in sheets]
+        if sheet_name and sheet_name in names:
+            index = names.index(sheet_name)
+        else:
+            view = workbook.find(f'{{{MAIN_NS}}}bookViews/{{{MAIN_NS}}}workbookView')
+            index = int(view.get('activeTab', 0)) if view is not None else 0
+        if not 0 <= index < len(sheets):
+            return None
+
+        relationships = _read_relationships(source, workbook_part)
+        kind, sheet_part = relationships.get(sheets[index].get(f'{{{RELATIONSHIPS_NS}}}id'), ('', None))
+        if not kind.endswith('/worksheet') or sheet_part not in source.NameToInfo:
+            return None
+        shared_strings_part = next(
+            (path for kind, path in relationships.values() if kind.endswith('/sharedStrings')), None
+        )
+        return sheet_part, shared_strings_part
+    except (KeyError, ValueError, ElementTree.ParseError):
+        return None
+
+
+def _read_relationships(source: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str]]:
+    """Relationship id -> (type, part name) of a package part ('' for the package itself)"""
+    folder, name = posixpath.split(part)
+    root = ElementTree.fromstring(source.read(posixpath.join(folder, '_rels', f'{name}.rels')))
+
+    relationships = {}
+    for relationship in root.iter(f'{{{PACKAGE_RELATIONSHIPS_NS}}}Relationship'):
+        if relationship.get('TargetMode') == 'External':
+            continue
+        target = relationship.get('Target', '')
+        if target.startswith('/'):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(folder, target))
+        relationships[relationship.get('Id')] = (relationship.get('Type', ''), target)
+    return relationships
+
+
+class _Unsupported(Exception):
+    """The workbook needs zip features _ZipWriter does not write (encryption, ZIP64)"""
+
+
+class _ZipWriter:
+    """
+    Writes a zip archive member by member, following the PKWARE APPNOTE
+
+    zipfile has no public way to add a member as its compressed bytes, so
+    unchanged parts are written here: their data is copied from the source
+    file at the offsets its central directory gives. Archives that would
+    need ZIP64 records raise _Unsupported.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self._entries = []  # (name, flags, method, info, crc, compressed size, size, offset)
+
+    def copy(self, source_file, info: zipfile.ZipInfo) -> None:
+        """Add a source member without decompressing it"""
+        if info.flag_bits & _FLAG_ENCRYPTED:
+            raise _Unsupported(f"{info.filename} is encrypted")
+
+        # The member data starts after its local header, whose extra field may
+        # differ from the one in the central directory
+        source_file.seek(info.header_offset)
+        header = source_file.read(_LOCAL_HEADER.size)
+        if len(header) != _LOCAL_HEADER.size or header[:4] != _LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+        name_length, extra_length = _LOCAL_HEADER.unpack(header)[-2:]
+        source_file.seek(info.header_offset + _LOCAL_HEADER.size + name_length + extra_length)
+
+        # CRC and sizes go in the local header, so no data descriptor follows
+        entry = self._begin(info, info.compress_type, info.flag_bits & ~_FLAG_DATA_DESCRIPTOR)
+        remaining = info.compress_size
+        while remaining:
+            chunk = source_file.read(min(remaining, COPY_CHUNK_BYTES))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+            self.file.write(chunk)
+            remaining -= len(chunk)
+        self._finish(entry, info.CRC, info.compress_size, info.file_size)
+
+    def open(self, info: zipfile.ZipInfo) -> '_DeflateWriter':
+        """Writer that deflates a member with the name and date of a source member"""
+        return _DeflateWriter(self, self._begin(info, zipfile.ZIP_DEFLATED, 0))
+
+    def close(self) -> None:
+        """Write the central directory"""
+        start = self.file.tell()
+        for name, flags, method, info, crc, compressed, size, offset in self._entries:
+            time, date = _dos_date_time(info.date_time)
+            self.file.write(_CENTRAL_HEADER.pack(
+                _CENTRAL_HEADER_SIGNATURE, (info.create_system << 8) | _ZIP_VERSION, _ZIP_VERSION,
+                flags, method, time, date, crc, compressed, size, len(name), 0, 0, 0,
+                info.internal_attr, info.external_attr, offset
+            ))
+            self.file.write(name)
+        end = self.file.tell()
+        if len(self._entries) > _MAX_ENTRIES or end > _MAX_OFFSET:
+            raise _Unsupported("ZIP64 records needed")
+        self.file.write(_END_RECORD.pack(
+            _END_RECORD_SIGNATURE, 0, 0, len(self._entries), len(self._entries), end - start, start, 0
+        ))
+
+    def _begin(self, info: zipfile.ZipInfo, method: int, flags: int) -> int:
+        """Write a local header without CRC and sizes; returns the entry index"""
+        try:
+            name = info.filename.encode('ascii')
+            flags &= ~_FLAG_UTF8
+        except UnicodeEncodeError:
+            name = info.filename.encode('utf-8')
+            flags |= _FLAG_UTF8
+
+        offset = self.file.tell()
+        if offset > _MAX_OFFSET:
+            raise _Unsupported("ZIP64 records needed")
+        time, date = _dos_date_time(info.date_time)
+        self.file.write(_LOCAL_HEADER.pack(
+            _LOCAL_HEADER_SIGNATURE, _ZIP_VERSION, flags, method, time, date, 0, 0, 0, len(name), 0
+        ))
+        self.file.write(name)
+        self._entries.append((name, flags, method, info, 0, 0, 0, offset))
+        return len(self._entries) - 1
+
+    def _finish(self, index: int, crc: int, compressed: int, size: int) -> None:
+        """Fill in the CRC and sizes of a member once its data is written"""
+        if compressed > _MAX_OFFSET or size > _MAX_OFFSET:
+            raise _Unsupported("ZIP64 records needed")
+        name, flags, method, info, _, _, _, offset = self._entries[index]
+        self._entries[index] = (name, flags, method, info, crc, compressed, size, offset)
+
+        end = self.file.tell()
+        self.file.seek(offset + _LOCAL_CRC_OFFSET)
+        self.file.write(struct.pack('<3L', crc, compressed, size))
+        self.file.seek(end)
+
+
+class _DeflateWriter:
+    """File-like writer of one deflated member; the header is completed on close"""
+
+    def __init__(self, archive: _ZipWriter, index: int):
+        self._archive = archive
+        self._index = index
+        self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        self._crc = 0
+        self._size = 0
+        self._compressed = 0
+
+    def write(self, data: bytes) -> None:
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._write(self._compressor.compress(data))
+
+    def close(self) -> None:
+        self._write(self._compressor.flush())
+        self._archive._finish(self._index, self._crc, self._compressed, self._size)
+
+    def _write(self, data: bytes) -> None:
+        self._archive.file.write(data)
+        self._compressed += len(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+def _dos_date_time(date_time: Tuple[int, ...]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time[:6]
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+def _rewrite_sheet(
+    source: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    target: '_ZipWriter',
+    shared_strings_part: Optional[str],
+    build_rows: Callable[[Dict[str, int]], Iterable[Dict[int, object]]]
+) -> bool:
+    """Copy the worksheet part with the new rows added; False if the sheet does not allow it"""
+    with source.open(info) as reader:
+        # Everything up to the end of the header row
+        head = b''
+        while b'</row>' not in head:
+            chunk = reader.read(COPY_CHUNK_BYTES)
+            if not chunk or len(head) > MAX_HEAD_BYTES:
+                return False
+            head += chunk
+
+        dimension = _DIMENSION_RE.search(head)
+        header_row = _HEADER_ROW_RE.search(head)
+        if header_row is None or (dimension is not None and dimension.start() > header_row.start()):
+            return False
+        headers = _read_headers(source, header_row.group(1), shared_strings_part)
+        if headers is None:
+            return False
+
+        if dimension is None:
+            # Written without one (e.g. openpyxl write-only mode): the scan alone places the rows
+            rows_xml = None
+            first_new_row = None
+            new_head = head[:header_row.end()]
+        else:
+            first_cell = dimension.group(1) + dimension.group(2)
+            last_column = column_index_from_string((dimension.group(3) or dimension.group(1)).decode())
+            last_row = int(dimension.group(4) or dimension.group(2))
+            first_new_row = last_row + 1
+
+            rows_xml, used_row, used_column = _rows_xml(build_rows(headers), first_new_row)
+            new_dimension = (
+                f'<dimension ref="{first_cell.decode()}:'
+                f'{get_column_letter(max(last_column, used_column))}{max(last_row, used_row)}"/>'
+            ).encode()
+            new_head = head[:dimension.start()] + new_dimension + head[dimension.end():header_row.end()]
+
+        scan = _SheetScan()
+        with target.open(info) as writer:
+            writer.write(new_head)
+
+            # Cut the stream before a '<' so no tag is split between pieces
+            pending = head[header_row.end():]
+            inserted = False
+            while True:
+                chunk = reader.read(COPY_CHUNK_BYTES)
+                data = pending + chunk
+                cut = data.rfind(b'<') if chunk else len(data)
+                if cut < 0:
+                    cut = 0
+                piece, pending = data[:cut], data[cut:]
+
+                if not inserted:
+                    end = piece.find(_SHEET_DATA_END)
+                    if not scan.feed(piece if end < 0 else piece[:end]):
+                        return False
+                    if end >= 0:
+                        if first_new_row is None:
+                            first_new_row = scan.first_empty_row()
+                            rows_xml, _, _ = _rows_xml(build_rows(headers), first_new_row)
+                        if scan.first_empty_row() != first_new_row or scan.last_row >= first_new_row:
+                            return False
+                        piece = piece[:end] + rows_xml + piece[end:]
+                        inserted = True
+                writer.write(piece)
+
+                if not chunk:
+                    return inserted
+
+
+class _SheetScan:
+    """Tracks the rows of a worksheet and the rows whose first column has a value"""
+
+    def __init__(self):
+        self.last_row = 1
+        self._next_row = 2  # Rows 2..next_row-1 all have a first column value
+        self._gap: Optional[int] = None
+
+    def feed(self, data: bytes) -> bool:
+        """Scan a piece of <sheetData>; False if its rows are unnumbered or out of order"""
+        for match in _SCAN_RE.finditer(data):
+            row_attributes, cell_row, empty = match.groups()
+            if row_attributes is not None:
+                number = _ROW_NUMBER_RE.search(row_attributes)
+                if number is None or int(number.group(1)) <= self.last_row:
+                    return False
+                self.last_row = int(number.group(1))
+            elif not empty and self._gap is None:
+                row = int(cell_row)
+                if row == self._next_row:
+                    self._next_row += 1
+                elif row > self._next_row:
+                    self._gap = self._next_row
+        return True
+
+    def first_empty_row(self) -> int:
+        """First row from row 2 on whose first column is empty"""
+        return self._next_row if self._gap is None else self._gap
+
+
+def _read_headers(source: zipfile.ZipFile, row_xml: bytes, shared_strings_part: Optional[str]) -> Optional[Dict[str, int]]:
+    """
+    Text of the header cells, stripped, mapped to their column
+
+    Only text cells can match a column name, so other cells are skipped.
+    Returns None when the row cannot be read.
+    """
+    try:
+        row = ElementTree.fromstring(b'<row xmlns="' + MAIN_NS.encode() + b'">' + row_xml + b'</row>')
+    except ElementTree.ParseError:
+        return None
+
+    cells = []  # (column, text or shared string index)
+    for cell in row.findall(f'{{{MAIN_NS}}}c'):
+        reference = cell.get('r')
+        if not reference:
+            return None
+        column = column_index_from_string(reference.rstrip('0123456789'))
+        kind = cell.get('t')
+        if kind == 's':
+            cells.append((column, int(cell.findtext(f'{{{MAIN_NS}}}v'))))
+        elif kind == 'inlineStr':
+            cells.append((column, _rich_text(cell.find(f'{{{MAIN_NS}}}is'))))
+        elif kind == 'str':
+            cells.append((column, cell.findtext(f'{{{MAIN_NS}}}v') or ''))
+
+    indexes = {value for _, value in cells if isinstance(value, int)}
+    strings = _read_shared_strings(source, shared_strings_part, indexes) if indexes else {}
+    if len(strings) < len(indexes):
+        return None
+
+    headers = {}
+    for column, value in cells:
+        text = strings[value] if isinstance(value, int) else value
+        if text:
+            headers[text.strip()] = column
+    return headers
+
+
+def _read_shared_strings(source: zipfile.ZipFile, part: Optional[str], indexes: set) -> Dict[int, str]:
+    """The shared strings with the given indexes (reading stops after the last one)"""
+    strings = {}
+    if part is None or part not in source.NameToInfo:
+        return strings
+
+    last = max(indexes)
+    index = 0
+    with source.open(part) as stream:
+        for _, element in ElementTree.iterparse(stream):
+            if element.tag != f'{{{MAIN_NS}}}si':
+                continue
+            if index in indexes:
+                strings[index] = _rich_text(element)
+            if index == last:
+                break
+            index += 1
+            element.clear()
+    return strings
+
+
+def _rich_text(element) -> str:
+    """Plain text of a string item: its <t>, or its runs (phonetic runs excluded)"""
+    if element is None:
+        return ''
+    text = element.find(f'{{{MAIN_NS}}}t')
+    if text is not None:
+        return text.text or ''
+    return ''.join(run.text or '' for run in element.findall(f'{{{MAIN_NS}}}r/{{{MAIN_NS}}}t'))
+
+
+def _rows_xml(rows: Iterable[Dict[int, object]], first_row: int) -> Tuple[bytes, int, int]:
+    """
+    XML of the new rows, numbered from first_row
+
+    Returns:
+        (xml, last row with a cell, last column with a cell); 0 when nothing is written
+    """
+    parts = []
+    used_row = used_column = 0
+    letters: Dict[int, str] = {}
+
+    for row_idx, values in enumerate(rows, start=first_row):
+        cells = []
+        for column in sorted(values):
+            value = values[column]
+            if value is None or value == '':
+                # openpyxl writes no cell for either
+                continue
+            letter = letters.get(column)
+            if letter is None:
+                letter = letters[column] = get_column_letter(column)
+            cells.append(_cell_xml(f"{letter}{row_idx}", value))
+            used_column = max(used_column, column)
+        if cells:
+            parts.append(f'<row r="{row_idx}">{"".join(cells)}</row>')
+            used_row = row_idx
+
+    return ''.join(parts).encode('utf-8'), used_row, used_column
+
+
+def _cell_xml(reference: str, value) -> str:
+    """One cell, typed the way openpyxl types the value"""
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{reference}" t="n"><v>{value}</v></c>'
+
+    text = str(value)[:MAX_CELL_LENGTH]
+    if ILLEGAL_CHARACTERS_RE.search(text):
+        raise IllegalCharacterError(f"{text} cannot be used in worksheets.")
+    if len(text) > 1 and text.startswith('='):
+        return f'<c r="{reference}"><f>{escape(text[1:])}</f><v></v></c>'
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{reference}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
@@ -3,5 +3,6 @@ Parsers for external formats
 """
 from .xml_invoice_parser import XMLInvoiceParser
 from .jcr_csv_parser import JCRCsvParser, UnitConverter
+from .string_pool import StringPool
 
-__all__ = ['XMLInvoiceParser', 'JCRCsvParser', 'UnitConverter']
+__all__ = ['XMLInvoiceParser', 'JCRCsvParser', 'UnitConverter', 'StringPool']
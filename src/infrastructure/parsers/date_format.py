@@ -0,0 +1,111 @@
+"""
+Date Format - Date parsing with the format of a file detected once
+
+Trying every known format with strptime on each cell is slow, and the same
+few dates repeat on thousands of rows. DateParser picks the format that fits
+a sample of the file, remembers the dates it already parsed and reads ISO
+dates with datetime.fromisoformat. Values that match no format are counted
+so the caller can report them instead of silently using another date.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+ISO_DATE_FORMAT = '%Y-%m-%d'
+
+# Formats accepted in client files, by priority when a value fits several
+DATE_FORMATS = (
+    ISO_DATE_FORMAT,
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%Y/%m/%d',
+    '%d-%m-%Y',
+    '%Y%m%d',
+)
+
+MEMO_SIZE = 4096
+MAX_EXAMPLES = 3
+
+
+class DateParser:
+    """Parses the dates of one source with the format detected from a sample"""
+
+    def __init__(self, formats: Sequence[str] = DATE_FORMATS, memo_size: int = MEMO_SIZE):
+        """
+        Initialize parser
+
+        Args:
+            formats: strptime formats, by priority
+            memo_size: Distinct values remembered (the memo starts over when full)
+        """
+        self.formats = tuple(formats)
+        self.format = self.formats[0]
+        self.memo_size = memo_size
+        self.failures = 0
+        self.examples: List[str] = []  # First values that matched no format
+
+        self._memo: Dict[str, Optional[datetime]] = {}
+
+    def infer(self, values: Iterable[Any]) -> str:
+        """
+        Use the format that parses most of a sample (priority breaks ties)
+
+        Returns:
+            The detected format
+        """
+        sample = {value for value in (str(v).strip() for v in values if v) if value}
+        if sample:
+            self.format = max(self.formats, key=lambda fmt: sum(self._fits(value, fmt) for value in sample))
+        return self.format
+
+    def parse(self, value) -> Optional[datetime]:
+        """
+        Parse one value
+
+        Returns:
+            datetime, or None for an empty value or one that matches no format
+            (the latter is counted in failures)
+        """
+        if not value:
+            return None
+        if not isinstance(value, str):
+            value = str(value)
+
+        try:
+            parsed = self._memo[value]
+        except KeyError:
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            parsed = self._memo[value] = self._parse_uncached(value.strip())
+
+        if parsed is None and value.strip():
+            self.failures += 1
+            if len(self.examples) < MAX_EXAMPLES and value not in self.examples:
+                self.examples.append(value)
+        return parsed
+
+    def _parse_uncached(self, value: str) -> Optional[datetime]:
+        if not value:
+            return None
+
+        if self.format == ISO_DATE_FORMAT and len(value) == 10 and value[4] == '-' and value[7] == '-':
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+
+        # Detected format first, then every other one by priority
+        for fmt in (self.format,) + self.formats:
+            try:
+                return datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+        return None
+
+    @staticmethod
+    def _fits(value: str, fmt: str) -> bool:
+        try:
+            datetime.strptime(value, fmt)
+            return True
+        except ValueError:
+            return False
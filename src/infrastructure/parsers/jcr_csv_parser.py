@@ -1,15 +1,30 @@
 """
 CSV/TXT Parser for Juan Camilo Rosas invoices
-Reads plain text invoice files and converts to domain entities
+Reads plain text invoice files (or Excel workbooks with the same columns)
+and converts to domain entities
 """
 import csv
+import heapq
+import io
+import mmap
+import os
+import pickle
 import re
-from datetime import datetime
+import tempfile
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Dict, Any
+from functools import lru_cache
+from itertools import chain, groupby, islice
+from operator import itemgetter
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
+from openpyxl import load_workbook
 from ...domain.entities.invoice import Invoice
 from ...domain.entities.product import Product
+from .date_format import ISO_DATE_FORMAT, DateParser
+from .number_format import MAX_EXAMPLES, NumberColumnParser
 
 
 class UnitConverter:
@@ -82,6 +97,39 @@ class UnitConverter:
         }
     }
 
+    # =========================================================================
+    # REGLAS DE PRESENTACIÓN (en orden de prioridad)
+    # =========================================================================
+    # Cada regla es (tipo, grupos): gana la primera regla cuyo nombre contiene
+    # al menos una palabra de cada grupo. Todas las palabras (y las categorías
+    # de CONVERSION_FACTORS y los gramos) se buscan en una sola pasada.
+    UNIT_RULES = [
+        ('MEGA', [('MEGA',)]),
+        ('REDONDA', [('REDONDA',)]),
+        # Panela 4 libras cjx10 und -> usamos LIBRAS para aplicar 20 kg por unidad
+        ('LIBRAS', [('4 LIBRAS', '4 LIBRA')]),
+        # Panela Partida Paquete x10 libras / Panela partida paquete por 4 libras
+        # Cualquier combinación de PARTIDA/PAQUETE con LIBRA(S) → mismo factor que LIBRAS (20 kg)
+        ('LIBRAS', [('PARTIDA', 'PAQUETE'), ('LIBRA', 'LIBRAS')]),
+        # PASTILLA KILO: detectar "PASTILLA" junto con "KILO" o "KG"
+        ('PASTILLA KILO', [('PASTILLA',), ('KILO', 'KG')]),
+        # PASTILLA LIBRA: detectar "PASTILLA" junto con "LIBRA"
+        ('PASTILLA LIBRA', [('PASTILLA',), ('LIBRA',)]),
+        ('PASTUANIO', [('PASTUANIO', 'PASTU')]),
+        # KILO genérico: solo si NO es PASTILLA (ya capturado arriba)
+        ('KILO', [('KILO', 'KILOS')]),
+    ]
+
+    # Gramos en el nombre: 400G, 450 G, etc.
+    GRAMS_PATTERN = r'(?P<grams>\d+)\s*G\b'
+
+    # Nombres de producto distintos cuya clasificación se recuerda
+    CLASSIFY_CACHE_SIZE = 8192
+
+    _matcher = None
+    _prefixes: Dict[str, frozenset] = {}
+    _rules: List[Tuple[str, Tuple[frozenset, ...]]] = []
+
     @classmethod
     def extract_grams_from_name(cls, product_name: str) -> int:
         """
@@ -90,28 +138,15 @@ class UnitConverter:
                   'FRIJOL CALIMA*450G' -> 450
         Retorna 0 si no encuentra gramos.
         """
-        name_upper = (product_name or "").upper()
-
-        # Buscar patrones como 400G, 450G, etc.
-        match = re.search(r'(\d+)\s*G\b', name_upper)
-        if match:
-            return int(match.group(1))
-
-        return 0
+        return cls._classify(product_name)[1]
 
     @classmethod
     def detect_product_category(cls, product_name: str) -> str:
         """
         Detecta la categoría del producto para aplicar el factor de conversión correcto.
+        Si no se detecta, asumimos GRANOS.
         """
-        name_upper = (product_name or "").upper()
-
-        for category in cls.CONVERSION_FACTORS.keys():
-            if category in name_upper:
-                return category
-
-        # Default: si no se detecta, asumimos GRANOS
-        return 'GRANOS'
+        return cls._classify(product_name)[2]
 
     @classmethod
     def convert_with_grams(cls, product_name: str, original_quantity: Decimal) -> Decimal:
@@ -127,29 +162,45 @@ class UnitConverter:
 
         3. FALLBACK: Retornar cantidad_original sin conversión
         """
+        unit_type, grams, category = cls._classify(product_name)
+        unit_type = unit_type or cls._name_as_unit(product_name)
+
         # --- Paso 1: Detectar tipo de panela/presentación por nombre ---
-        unit_type = cls.detect_unit_from_product_name(product_name, "")
         if unit_type in cls.CONVERSIONS:
             converted = cls.convert_quantity(unit_type, original_quantity)
             return converted
 
         # --- Paso 2: Conversión por gramos en el nombre ---
-        grams = cls.extract_grams_from_name(product_name)
         if grams > 0:
             kilos = (Decimal(str(grams)) * original_quantity) / Decimal('1000')
-            category = cls.detect_product_category(product_name)
             factor = cls.CONVERSION_FACTORS.get(category, Decimal('25'))
             return kilos * factor
 
         # --- Paso 3: Sin conversión posible ---
         return original_quantity
 
+    @classmethod
+    def conversion_terms(cls, product_name: str) -> Tuple[Optional[Decimal], Optional[Decimal], Decimal]:
+        """
+        Términos que convert_with_grams aplica a la cantidad de un producto:
+        (total_kg del tipo, gramos del nombre, factor de categoría), con None
+        en los pasos que no aplican. Permite convertir muchas filas del mismo
+        producto clasificando el nombre una sola vez.
+        """
+        unit_type, grams, category = cls._classify(product_name)
+        unit_type = unit_type or cls._name_as_unit(product_name)
+        if unit_type in cls.CONVERSIONS:
+            return cls.CONVERSIONS[unit_type]['total_kg'], None, Decimal('1')
+        if grams > 0:
+            return None, Decimal(str(grams)), cls.CONVERSION_FACTORS.get(category, Decimal('25'))
+        return None, None, Decimal('1')
+
     @classmethod
     def detect_unit_from_product_name(cls, product_name: str, unit_of_measure: str) -> str:
         """
         Detect unit type based on product name text plus unit_of_measure fallback.
 
-        Detection priority:
+        Detection priority (UNIT_RULES):
         1. MEGA            - nombre contiene "MEGA"
         2. REDONDA          - nombre contiene "REDONDA"
         3. LIBRAS (4 LB)   - nombre contiene "4 LIBRAS" o "4 LIBRA"
@@ -157,38 +208,95 @@ class UnitConverter:
                               (ej: "Panela Partida Paquete x10 libras" → factor 20)
         5. PASTILLA KILO    - nombre contiene "PASTILLA" + ("KILO" o "KG")
         6. PASTILLA LIBRA   - nombre contiene "PASTILLA" + "LIBRA"
-        7. KILO             - nombre contiene "KILO" o "KILOS" (sin "PASTILLA")
-        8. PASTUANIO        - nombre contiene "PASTUANIO" o "PASTU"
+        7. PASTUANIO        - nombre contiene "PASTUANIO" o "PASTU"
+        8. KILO             - nombre contiene "KILO" o "KILOS" (sin "PASTILLA")
         9. Fallback         - unit_of_measure o nombre
         """
-        name = (product_name or "").upper()
+        unit_type = cls._classify(product_name)[0]
+        if unit_type:
+            return unit_type
+
+        # Fallback: lo que venga en UNIDAD DE MEDIDA o el nombre
         um = (unit_of_measure or "").upper().strip()
+        return um or (product_name or "").upper()
 
-        if "MEGA" in name:
-            return "MEGA"
-        if "REDONDA" in name:
-            return "REDONDA"
-        # Panela 4 libras cjx10 und -> usamos LIBRAS para aplicar 20 kg por unidad
-        if "4 LIBRAS" in name or "4 LIBRA" in name:
-            return "LIBRAS"
-        # Panela Partida Paquete x10 libras / Panela partida paquete por 4 libras
-        # Cualquier combinación de PARTIDA/PAQUETE con LIBRA(S) → mismo factor que LIBRAS (20 kg)
-        if ("PARTIDA" in name or "PAQUETE" in name) and ("LIBRA" in name or "LIBRAS" in name):
-            return "LIBRAS"
-        # PASTILLA KILO: detectar "PASTILLA" junto con "KILO" o "KG"
-        if "PASTILLA" in name and ("KILO" in name or "KG" in name):
-            return "PASTILLA KILO"
-        # PASTILLA LIBRA: detectar "PASTILLA" junto con "LIBRA"
-        if "PASTILLA" in name and "LIBRA" in name:
-            return "PASTILLA LIBRA"
-        if "PASTUANIO" in name or "PASTU" in name:
-            return "PASTUANIO"
-        # KILO genérico: solo si NO es PASTILLA (ya capturado arriba)
-        if "KILO" in name or "KILOS" in name:
-            return "KILO"
+    @staticmethod
+    def _name_as_unit(product_name: str) -> str:
+        """
+        Fallback de detect_unit_from_product_name(nombre, ""): el nombre en
+        mayúsculas, que convierte cuando es exactamente un tipo (ej: "Libras")
+        """
+        return (product_name or "").upper()
 
-        # Fallback: lo que venga en UNIDAD DE MEDIDA o el nombre
-        return um or name
+    @classmethod
+    def _classify(cls, product_name: str) -> Tuple[str, int, str]:
+        """(tipo de presentación o '', gramos, categoría) de un nombre, memorizado"""
+        return _classify_product_name(cls, product_name or "")
+
+    @classmethod
+    def _scan(cls, product_name: str) -> Tuple[str, int, str]:
+        """Clasifica un nombre con una sola pasada del buscador compilado"""
+        matcher = cls._get_matcher()
+        prefixes = cls._prefixes
+        present = set()
+        grams = None
+
+        # One (keyword, '') or ('', grams) pair per position where something matches
+        for keyword, grams_text in matcher.findall(product_name.upper()):
+            if keyword:
+                present |= prefixes[keyword]
+            elif grams is None:
+                grams = int(grams_text)
+
+        if not present:
+            return '', grams or 0, 'GRANOS'
+
+        unit_type = ''
+        for candidate, groups in cls._rules:
+            for group in groups:
+                if present.isdisjoint(group):
+                    break
+            else:
+                unit_type = candidate
+                break
+
+        category = next((c for c in cls.CONVERSION_FACTORS if c in present), 'GRANOS')
+        return unit_type, grams or 0, category
+
+    @classmethod
+    def _get_matcher(cls):
+        """
+        Compile every keyword into one pattern (once per class)
+
+        The pattern is a lookahead tried at every position, so overlapping
+        keywords are all found. Alternatives are grouped by first letter and
+        longer keywords come first, so at each position the longest one
+        matches; the shorter keywords it starts with (LIBRAS → LIBRA,
+        PASTUANIO → PASTU) are added from _prefixes.
+        """
+        if cls._matcher is None:
+            keywords = {word for _, groups in cls.UNIT_RULES for group in groups for word in group}
+            keywords.update(cls.CONVERSION_FACTORS)
+            cls._prefixes = {
+                word: frozenset(other for other in keywords if word.startswith(other))
+                for word in keywords
+            }
+            cls._rules = [
+                (unit_type, tuple(frozenset(group) for group in groups))
+                for unit_type, groups in cls.UNIT_RULES
+            ]
+
+            by_letter: Dict[str, List[str]] = {}
+            for word in sorted(keywords, key=lambda word: (-len(word), word)):
+                by_letter.setdefault(word[0], []).append(word)
+            alternatives = '|'.join(
+                re.escape(letter) + '(?:' + '|'.join(re.escape(word[1:]) for word in words) + ')'
+                for letter, words in sorted(by_letter.items())
+            )
+            cls._matcher = re.compile(
+                f"(?=(?P<keyword>{alternatives})|{cls.GRAMS_PATTERN})"
+            )
+        return cls._matcher
 
     @classmethod
     def convert_quantity(cls, unit_name: str, original_quantity: Decimal) -> Decimal:
@@ -225,6 +333,27 @@ class UnitConverter:
         return 'Un'
 
 
+@lru_cache(maxsize=UnitConverter.CLASSIFY_CACHE_SIZE)
+def _classify_product_name(converter: type, product_name: str) -> Tuple[str, int, str]:
+    """Bounded memo in front of UnitConverter._scan (product names repeat a lot)"""
+    return converter._scan(product_name)
+
+
+class _UngroupedFile(Exception):
+    """An invoice number reappeared after its run of rows had ended"""
+
+
+@dataclass(frozen=True)
+class CsvChunkPlan:
+    """How to parse a JCR file as independent byte ranges (see JCRCsvParser.plan_chunks)"""
+
+    delimiter: str
+    columns: Dict[str, int]  # Position of each known column
+    number_formats: Dict[str, Optional[str]]  # Decimal separator convention per amount column
+    date_format: str
+    ranges: Tuple[Tuple[int, int], ...]  # (start, end) byte offsets; each ends at a line break
+
+
 class JCRCsvParser:
     """Parser for Juan Camilo Rosas CSV/TXT invoice files"""
 
@@ -246,84 +375,642 @@ class JCRCsvParser:
     SELLER_NIT = '1003516945'
     SELLER_NAME = 'JUAN CAMILO ROSAS'
 
-    def __init__(self, file_path: str, iva_percentage: str = '0'):
+    # Excel workbooks: the active sheet is read like a CSV file
+    XLSX_SUFFIXES = ('.xlsx', '.xlsm')
+
+    # Unsorted files: rows sorted in memory at once, and rows per pickled block on disk
+    SORT_CHUNK_ROWS = 100000
+    SPILL_BLOCK_ROWS = 1000
+
+    # Columnar conversion: used by default from this file size, rows per batch
+    COLUMNAR_MIN_BYTES = 1024 * 1024
+    COLUMNAR_BATCH_ROWS = 4096
+
+    # Chunked parsing: approximate bytes per independently parsed chunk
+    CHUNK_BYTES = 16 * 1024 * 1024
+
+    # Columns whose number or date format is inferred from the first rows
+    NUMBER_COLUMNS = ('CANTIDAD', 'VALOR BRUTO', 'IVA')
+    DATE_COLUMNS = ('FECHA FACTURA', 'FECHA VENCIMIENTO')
+    FORMAT_SAMPLE_ROWS = 1000
+
+    def __init__(
+        self,
+        file_path: str,
+        iva_percentage: str = '0',
+        columnar: Optional[bool] = None
+    ):
         """
         Initialize parser with file path
 
         Args:
             file_path: Path to the CSV or TXT file
             iva_percentage: Default IVA percentage to use if not in CSV
+            columnar: Convert rows in batches (None: only files of COLUMNAR_MIN_BYTES or more)
         """
         self.file_path = Path(file_path)
         self.iva_percentage = iva_percentage
+        self.columnar = columnar
         self.invoices: List[Invoice] = []
+        self.warnings: List[str] = []  # Problems found in the file's content, in Spanish
+        self._number_parsers: Dict[str, NumberColumnParser] = {}
+        self._date_parser = DateParser()
+        self._xlsx_spool: Optional[str] = None  # Rows of a workbook already read once
 
     def parse(self) -> List[Invoice]:
         """
         Parse the CSV/TXT file and return list of invoices
 
+        JCR exports keep the rows of each invoice together, so the file is
+        read once assuming it does. The first invoice number that reappears
+        after its run ended discards what was parsed, and the file is read
+        again through the external merge sort.
+
         Returns:
             List of Invoice entities
         """
-        self.invoices = []
-
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                # Try to detect the delimiter
-                sample = file.read(1024)
-                file.seek(0)
+            self.invoices = list(self._iter_invoices(grouped=True))
+        except _UngroupedFile:
+            self.invoices = list(self._iter_invoices(grouped=False))
+        return self.invoices
 
-                # Detect delimiter (comma, tab, or semicolon)
-                delimiter = self._detect_delimiter(sample)
+    def iter_invoices(self) -> Iterator[Invoice]:
+        """
+        Parse the CSV/TXT file lazily, one invoice at a time
+
+        JCR exports keep the rows of each invoice together, so each invoice
+        is yielded as soon as its run of rows ends and memory stays bounded
+        by the largest invoice. Files where an invoice's rows are scattered
+        go through an external merge sort instead. Either way invoices come
+        out in the order they first appear in the file, with their rows in
+        file order. Invoices already yielded cannot be taken back, so a quick
+        pass over the invoice column decides first (parse() does without it).
+
+        Yields:
+            Invoice entities
+        """
+        return self._iter_invoices(grouped=None)
 
-                reader = csv.DictReader(file, delimiter=delimiter)
+    def _iter_invoices(self, grouped: Optional[bool]) -> Iterator[Invoice]:
+        """
+        Invoices of the file, grouped by runs or by the external merge sort
 
-                # Group rows by invoice number
-                invoice_groups = self._group_by_invoice(reader)
+        Args:
+            grouped: True to group by runs, raising _UngroupedFile when an
+                invoice number reappears; False to sort; None to check first
+        """
+        # Kept when parse() reads the file again through the sort
+        keep_spool = False
+        try:
+            if grouped is None:
+                grouped = self._is_grouped()
 
-                # Process each invoice
-                for invoice_number, rows in invoice_groups.items():
-                    invoice = self._create_invoice(invoice_number, rows)
+            # Header, format sample and data rows come from a single read
+            rows = self._read_rows()
+            try:
+                columns = self._resolve_columns(next(rows, []))
+                if 'NUMERO DE FACTURA' not in columns:
+                    # No row has an invoice number
+                    return
+
+                self.warnings = []
+                sample = list(islice(rows, self.FORMAT_SAMPLE_ROWS))
+                self._infer_formats(columns, sample)
+
+                records = self._records_from(chain(sample, rows), columns)
+                if grouped:
+                    groups = self._iter_runs(records)
+                else:
+                    groups = self._iter_external_sort(records)
+
+                if self._use_columnar():
+                    invoices = self._iter_columnar(groups)
+                else:
+                    invoices = (self._create_invoice(number, group_rows) for number, group_rows in groups)
+
+                for invoice in invoices:
                     if invoice:
-                        self.invoices.append(invoice)
+                        yield invoice
+            except _UngroupedFile:
+                self._finish_xlsx_copy(rows)
+                keep_spool = True
+                raise
+            finally:
+                rows.close()
+
+            self._report_formats()
+
+        except _UngroupedFile:
+            raise
+        except Exception as e:
+            raise Exception(f"Error parsing CSV file: {str(e)}")
+        finally:
+            if not keep_spool:
+                self._discard_spool()
+
+    # --- Chunked parsing ---
+    def plan_chunks(self, chunk_bytes: Optional[int] = None) -> Optional[CsvChunkPlan]:
+        """
+        Split the file at line breaks into byte ranges that parse independently
+
+        The file is memory-mapped, so finding the boundaries reads only a few
+        bytes per chunk. The number and date formats are inferred here, once,
+        so that every chunk reads its values the same way.
+
+        Args:
+            chunk_bytes: Approximate bytes per chunk (defaults to CHUNK_BYTES)
+
+        Returns:
+            The plan, or None when the file cannot be split safely (workbooks,
+            quoted fields that may hold line breaks) or has no invoice number
+            column
+        """
+        if self._is_xlsx():
+            return None
+        chunk_bytes = max(1, chunk_bytes or self.CHUNK_BYTES)
+        try:
+            with open(self.file_path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                if size == 0:
+                    return None
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    header_end = data.find(b'\n')
+                    if header_end < 0 or data.find(b'"') >= 0:
+                        return None
+                    ranges = []
+                    start = header_end + 1
+                    while start < size:
+                        newline = data.find(b'\n', min(start + chunk_bytes, size) - 1)
+                        end = size if newline < 0 else newline + 1
+                        ranges.append((start, end))
+                        start = end
+
+            rows = self._read_rows()
+            try:
+                columns = self._resolve_columns(next(rows, []))
+                sample = list(islice(rows, self.FORMAT_SAMPLE_ROWS))
+            finally:
+                rows.close()
+        except (OSError, ValueError) as e:
+            print(f"CSV file {self.file_path.name} cannot be split into chunks: {str(e)}")
+            return None
+
+        if 'NUMERO DE FACTURA' not in columns:
+            return None
 
-            return self.invoices
+        self._infer_formats(columns, sample)
+        return CsvChunkPlan(
+            delimiter=self._file_delimiter(),
+            columns=columns,
+            number_formats={name: parser.convention for name, parser in self._number_parsers.items()},
+            date_format=self._date_parser.format,
+            ranges=tuple(ranges)
+        )
+
+    def parse_chunk(self, plan: CsvChunkPlan, chunk_index: int) -> List[Invoice]:
+        """
+        Parse one byte range of a plan (runs inside a worker process)
+
+        Returns:
+            Invoices of the chunk in order of first appearance; an invoice
+            whose rows continue in other chunks is completed by merge_chunks()
+        """
+        try:
+            self._apply_plan(plan)
+            start, end = plan.ranges[chunk_index]
+            with open(self.file_path, 'rb') as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    text = data[start:end].decode('utf-8')
+
+            # Universal newlines, as when the whole file is read in text mode
+            rows = csv.reader(io.StringIO(text, newline=None), delimiter=plan.delimiter)
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for invoice_number, row in self._records_from(rows, plan.columns):
+                groups.setdefault(invoice_number, []).append(row)
+
+            if self._use_columnar():
+                invoices = self._iter_columnar(groups.items())
+            else:
+                invoices = (self._create_invoice(number, group_rows) for number, group_rows in groups.items())
+            return [invoice for invoice in invoices if invoice]
 
         except Exception as e:
             raise Exception(f"Error parsing CSV file: {str(e)}")
 
+    def chunk_stats(self) -> Dict[str, Any]:
+        """Format counters of the last parse_chunk(), for merge_chunks()"""
+        return {
+            'numbers': {
+                name: (parser.contradictions, list(parser.examples))
+                for name, parser in self._number_parsers.items()
+            },
+            'dates': (self._date_parser.failures, list(self._date_parser.examples)),
+        }
+
+    def merge_chunks(self, plan: CsvChunkPlan, chunks: List[Tuple[List[Invoice], Dict[str, Any]]]) -> List[Invoice]:
+        """
+        Join the (invoices, chunk_stats) of every chunk of a plan, in chunk order
+
+        Invoices are merged by number: the first chunk an invoice appears in
+        provides its header and later chunks append their products, so the
+        result is the same as parsing the whole file at once. Warnings about
+        the whole file end up in self.warnings.
+        """
+        self._apply_plan(plan)
+        self.warnings = []
+        merged: Dict[str, Invoice] = {}
+
+        for invoices, stats in chunks:
+            for invoice in invoices:
+                first = merged.get(invoice.invoice_number)
+                if first is None:
+                    merged[invoice.invoice_number] = invoice
+                else:
+                    for product in invoice.products:
+                        first.add_product(product)
+
+            for name, (contradictions, examples) in stats['numbers'].items():
+                parser = self._number_parsers[name]
+                parser.contradictions += contradictions
+                self._add_examples(parser.examples, examples)
+            failures, examples = stats['dates']
+            self._date_parser.failures += failures
+            self._add_examples(self._date_parser.examples, examples)
+
+        self._report_formats()
+        self.invoices = list(merged.values())
+        return self.invoices
+
+    def _apply_plan(self, plan: CsvChunkPlan) -> None:
+        """Use the formats inferred by plan_chunks(), with fresh counters"""
+        self._number_parsers = {
+            name: NumberColumnParser(convention, self._parse_decimal)
+            for name, convention in plan.number_formats.items()
+        }
+        self._date_parser = DateParser()
+        self._date_parser.format = plan.date_format
+
+    @staticmethod
+    def _add_examples(target: List[str], examples: List[str]) -> None:
+        for example in examples:
+            if len(target) < MAX_EXAMPLES and example not in target:
+                target.append(example)
+
     def _detect_delimiter(self, sample: str) -> str:
         """Detect the delimiter used in the CSV file"""
         delimiters = [',', '\t', ';', '|']
         delimiter_counts = {d: sample.count(d) for d in delimiters}
         return max(delimiter_counts, key=delimiter_counts.get)
 
-    def _group_by_invoice(self, reader: csv.DictReader) -> Dict[str, List[Dict[str, Any]]]:
-        """Group rows by invoice number"""
-        groups = {}
+    def _is_xlsx(self) -> bool:
+        return self.file_path.suffix.lower() in self.XLSX_SUFFIXES
+
+    def _read_rows(self) -> Iterator[List[str]]:
+        """Raw rows of the file, header included"""
+        if self._is_xlsx():
+            yield from self._read_xlsx_rows()
+            return
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            # Detect delimiter (comma, tab, or semicolon) from the first KB
+            sample = file.read(1024)
+            file.seek(0)
+            yield from csv.reader(file, delimiter=self._detect_delimiter(sample))
+
+    def _read_xlsx_rows(self) -> Iterator[List[str]]:
+        """
+        Rows of the workbook's active sheet as text, header included
 
-        for row in reader:
-            # Normalize column names (remove extra spaces)
-            normalized_row = {
-                (k.strip() if isinstance(k, str) else k):
-                    (v.strip() if isinstance(v, str) else v)
-                for k, v in row.items()
-            }
+        Cells become the text a CSV export would hold (see _cell_text). The
+        sheet XML is parsed as rows are requested, so memory does not grow
+        with the sheet.
 
-            invoice_number = (normalized_row.get('NUMERO DE FACTURA', '') or '').strip()
+        Parsing the XML is far slower than reading CSV: the first complete
+        pass copies the rows to a temporary CSV file that later passes read.
+        """
+        if self._xlsx_spool:
+            with open(self._xlsx_spool, 'r', encoding='utf-8', newline='') as file:
+                yield from csv.reader(file)
+            return
+
+        fd, spool = tempfile.mkstemp(prefix='jcr_xlsx_', suffix='.csv')
+        complete = False
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            with open(fd, 'w', encoding='utf-8', newline='') as file:
+                writer = csv.writer(file)
+                cell_text = self._cell_text
+                for values in workbook.active.iter_rows(values_only=True):
+                    row = [value if type(value) is str else cell_text(value) for value in values]
+                    writer.writerow(row)
+                    yield row
+            complete = True
+        finally:
+            workbook.close()
+            if complete:
+                self._xlsx_spool = spool
+            else:
+                os.remove(spool)
 
+    def _finish_xlsx_copy(self, rows: Iterator[List[str]]) -> None:
+        """Read the rest of a workbook so its copy is complete for the next pass"""
+        if self._is_xlsx():
+            for _ in rows:
+                pass
+
+    def _discard_spool(self) -> None:
+        if self._xlsx_spool:
+            try:
+                os.remove(self._xlsx_spool)
+            except OSError:
+                pass
+            self._xlsx_spool = None
+
+    @staticmethod
+    def _cell_text(value) -> str:
+        """Text of a non-string workbook cell"""
+        if value is None:
+            return ''
+        if isinstance(value, (datetime, date)):
+            return value.strftime(ISO_DATE_FORMAT)
+        if isinstance(value, float):
+            if value.is_integer():
+                return str(int(value))
+            # 2.125 -> 2125E-3: no separator, so no column format can read it
+            # as thousands; repr() is the shortest text of the same float
+            sign, digits, exponent = Decimal(repr(value)).as_tuple()
+            return f"{'-' if sign else ''}{''.join(map(str, digits))}E{exponent}"
+        return str(value)
+
+    def _file_delimiter(self) -> str:
+        """Delimiter _read_rows() uses for this file"""
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            return self._detect_delimiter(file.read(1024))
+
+    def _resolve_columns(self, header: List[str]) -> Dict[str, int]:
+        """
+        Position of each known column, resolved once per file
+
+        Names are compared without surrounding spaces; when a name repeats,
+        the last column wins (as with csv.DictReader).
+        """
+        columns = {}
+        for index, name in enumerate(header):
+            name = name.strip()
+            if name in self.INPUT_COLUMNS:
+                columns[name] = index
+        return columns
+
+    def _infer_formats(self, columns: Dict[str, int], sample: List[List[str]]) -> None:
+        """Number format of each amount column and the date format, from the first FORMAT_SAMPLE_ROWS rows"""
+        sampled = self.NUMBER_COLUMNS + self.DATE_COLUMNS
+        samples: Dict[str, List[str]] = {name: [] for name in sampled if name in columns}
+
+        for raw in sample:
+            for name, values in samples.items():
+                index = columns[name]
+                if index < len(raw):
+                    values.append(raw[index].replace('%', ''))
+
+        self._number_parsers = {
+            name: NumberColumnParser.from_sample(samples.get(name, []), self._parse_decimal)
+            for name in self.NUMBER_COLUMNS
+        }
+        self._date_parser = DateParser()
+        self._date_parser.infer(value for name in self.DATE_COLUMNS for value in samples.get(name, []))
+
+    def _report_formats(self) -> None:
+        """Warn about amounts that did not follow the format of their column and dates not understood"""
+        warnings = []
+        for name, parser in self._number_parsers.items():
+            if parser.contradictions:
+                warnings.append(
+                    f"{self.file_path.name}: {parser.contradictions} valor(es) de {name} no siguen el formato "
+                    f"numérico del archivo ({parser.label}), p. ej. {self._examples(parser.examples)}"
+                )
+        if self._date_parser.failures:
+            warnings.append(
+                f"{self.file_path.name}: {self._date_parser.failures} fecha(s) no reconocida(s), se usó la "
+                f"fecha del procesamiento, p. ej. {self._examples(self._date_parser.examples)}"
+            )
+
+        for warning in warnings:
+            print(f"Format warning: {warning}")
+        self.warnings.extend(warnings)
+
+    @staticmethod
+    def _examples(values: List[str]) -> str:
+        return ", ".join(f"'{value}'" for value in values)
+
+    @staticmethod
+    def _records_from(rows, columns: Dict[str, int]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(invoice number, row) of the raw data rows that have an invoice number"""
+        positions = list(columns.items())
+        invoice_column = columns['NUMERO DE FACTURA']
+
+        for raw in rows:
+            if not raw or invoice_column >= len(raw):
+                continue
+            invoice_number = raw[invoice_column].strip()
             if not invoice_number:
                 continue
 
-            if invoice_number not in groups:
-                groups[invoice_number] = []
+            # Short rows leave missing columns as None, like csv.DictReader
+            row = {
+                name: raw[index].strip() if index < len(raw) else None
+                for name, index in positions
+            }
+            yield invoice_number, row
 
-            groups[invoice_number].append(normalized_row)
+    def _is_grouped(self) -> bool:
+        """Quick pass over the invoice column: True when no invoice number reappears after its run ended"""
+        rows = self._read_rows()
+        try:
+            invoice_column = self._resolve_columns(next(rows, [])).get('NUMERO DE FACTURA')
+            if invoice_column is None:
+                return True
+            ended = set()
+            current = None
+            for raw in rows:
+                if invoice_column >= len(raw):
+                    continue
+                invoice_number = raw[invoice_column].strip()
+                if not invoice_number or invoice_number == current:
+                    continue
+                if invoice_number in ended:
+                    self._finish_xlsx_copy(rows)
+                    return False
+                ended.add(current)
+                current = invoice_number
+        finally:
+            rows.close()
+        return True
+
+    def _iter_runs(self, records) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Group a file whose invoices keep their rows together: every run of
+        equal invoice numbers is one invoice
+
+        Raises:
+            _UngroupedFile: when an invoice number reappears after its run ended
+        """
+        ended = set()
+        for invoice_number, run in groupby(records, key=itemgetter(0)):
+            if invoice_number in ended:
+                raise _UngroupedFile(invoice_number)
+            ended.add(invoice_number)
+            yield invoice_number, [row for _, row in run]
+
+    def _iter_external_sort(self, records) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Group an unsorted file
 
-        return groups
+        Rows are tagged with the position where their invoice first appears,
+        sorted in chunks of SORT_CHUNK_ROWS, spilled to temporary files and
+        merged back, so only one chunk (plus the invoice numbers) is in memory.
+        """
+        first_seen: Dict[str, int] = {}
+        chunk: List[Tuple[int, int, str, Dict[str, Any]]] = []
+        spilled: List[str] = []
+
+        with ExitStack() as stack:
+            spill_dir = None
+            for row_index, (invoice_number, row) in enumerate(records):
+                group = first_seen.setdefault(invoice_number, len(first_seen))
+                chunk.append((group, row_index, invoice_number, row))
+                if len(chunk) >= self.SORT_CHUNK_ROWS:
+                    if spill_dir is None:
+                        spill_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix='jcr_sort_'))
+                    spilled.append(self._spill_sorted_chunk(chunk, spill_dir, len(spilled)))
+                    chunk = []
+
+            # (group, row_index) is unique, so rows themselves are never compared
+            chunk.sort(key=itemgetter(0, 1))
+            merged = heapq.merge(
+                *[self._read_spilled_chunk(path) for path in spilled], chunk,
+                key=itemgetter(0, 1)
+            )
+            for _, run in groupby(merged, key=itemgetter(0)):
+                run = list(run)
+                yield run[0][2], [row for _, _, _, row in run]
+
+    def _spill_sorted_chunk(self, chunk: list, spill_dir: str, number: int) -> str:
+        chunk.sort(key=itemgetter(0, 1))
+        path = os.path.join(spill_dir, f'chunk_{number}.pickle')
+        with open(path, 'wb') as f:
+            for start in range(0, len(chunk), self.SPILL_BLOCK_ROWS):
+                pickle.dump(chunk[start:start + self.SPILL_BLOCK_ROWS], f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @staticmethod
+    def _read_spilled_chunk(path: str) -> Iterator[tuple]:
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    block = pickle.load(f)
+                except EOFError:
+                    return
+                yield from block
+
+    # --- Columnar conversion ---
+    def _use_columnar(self) -> bool:
+        if self.columnar is not None:
+            return self.columnar
+        try:
+            return self.file_path.stat().st_size >= self.COLUMNAR_MIN_BYTES
+        except OSError:
+            return False
+
+    def _iter_columnar(self, groups) -> Iterator[Optional[Invoice]]:
+        """Create invoices in batches of about COLUMNAR_BATCH_ROWS rows"""
+        batch: List[Tuple[str, List[Dict[str, Any]]]] = []
+        batch_rows = 0
+        for invoice_number, rows in groups:
+            batch.append((invoice_number, rows))
+            batch_rows += len(rows)
+            if batch_rows >= self.COLUMNAR_BATCH_ROWS:
+                yield from self._create_invoices_columnar(batch)
+                batch, batch_rows = [], 0
+        if batch:
+            yield from self._create_invoices_columnar(batch)
+
+    def _create_invoices_columnar(self, batch) -> Iterator[Optional[Invoice]]:
+        products = self._create_products_columnar([row for _, rows in batch for row in rows])
+        start = 0
+        for invoice_number, rows in batch:
+            end = start + len(rows)
+            yield self._create_invoice(invoice_number, rows, products[start:end])
+            start = end
+
+    def _create_products_columnar(self, rows: List[Dict[str, Any]]) -> List[Optional[Product]]:
+        """
+        Same products as _create_product, column by column
 
-    def _create_invoice(self, invoice_number: str, rows: List[Dict[str, Any]]) -> Invoice:
-        """Create an Invoice entity from grouped rows"""
+        Every distinct amount text is parsed once and every distinct product
+        name is classified once; rows only multiply and
+        divide. The values are the same Decimals as the row path.
+        """
+        try:
+            default_iva_str = self.iva_percentage.replace('%', '').strip()
+            default_iva = self._parse_decimal(default_iva_str) if default_iva_str else Decimal('0')
+        except Exception:
+            # Every row would fail the same way: let the row path report it
+            return [self._create_product(row) for row in rows]
+
+        names = [(row.get('NOMBRE PRODUCTO', '') or '').strip() for row in rows]
+        units = [(row.get('UNIDAD DE MEDIDA', '') or '').strip() for row in rows]
+        quantities = self._parse_column('CANTIDAD', [row.get('CANTIDAD', '0') for row in rows])
+        gross_values = self._parse_column('VALOR BRUTO', [row.get('VALOR BRUTO', '0') for row in rows])
+        iva_texts = [(row.get('IVA', '') or '').strip() for row in rows]
+        ivas = self._parse_column('IVA', [text.replace('%', '').strip() for text in iva_texts if text])
+        ivas_iter = iter(ivas)
+        ivas = [next(ivas_iter) if text else None for text in iva_texts]
+
+        terms = {name: UnitConverter.conversion_terms(name) for name in set(names)}
+        thousand = Decimal('1000')
+
+        products: List[Optional[Product]] = []
+        for row, name, unit, quantity, gross_value, iva_text, iva in zip(
+            rows, names, units, quantities, gross_values, iva_texts, ivas
+        ):
+            try:
+                # Same operations, in the same order, as UnitConverter.convert_with_grams
+                total_kg, grams, factor = terms[name]
+                if total_kg is not None:
+                    converted = quantity * total_kg
+                elif grams is not None:
+                    converted = (grams * quantity) / thousand * factor
+                else:
+                    converted = quantity
+                products.append(Product(
+                    name=name,
+                    underlying_code='SPN-1',
+                    unit_of_measure="Kg",
+                    quantity=converted,
+                    unit_price=gross_value / converted if converted > 0 else Decimal('0'),
+                    total_price=gross_value,
+                    iva_percentage=iva if iva_text else default_iva,
+                    original_quantity=quantity,
+                    original_unit_code=unit
+                ))
+            except Exception:
+                products.append(self._create_product(row))
+        return products
+
+    def _parse_column(self, column: str, values: list) -> List[Decimal]:
+        """_parse_number of every value of a column, parsing each distinct value once"""
+        parser = self._number_parsers.get(column)
+        if parser is None:
+            return [self._parse_number(column, value) for value in values]
+        return parser.parse_many(values)
+
+    def _create_invoice(
+        self,
+        invoice_number: str,
+        rows: List[Dict[str, Any]],
+        products: Optional[List[Optional[Product]]] = None
+    ) -> Invoice:
+        """Create an Invoice entity from grouped rows (products already built by the columnar path)"""
         if not rows:
             return None
 
@@ -349,8 +1036,9 @@ class JCRCsvParser:
             )
 
             # Add products
-            for row in rows:
-                product = self._create_product(row)
+            if products is None:
+                products = [self._create_product(row) for row in rows]
+            for product in products:
                 if product:
                     invoice.add_product(product)
 
@@ -365,15 +1053,15 @@ class JCRCsvParser:
         try:
             product_name = (row.get('NOMBRE PRODUCTO', '') or '').strip()
             unit_of_measure = (row.get('UNIDAD DE MEDIDA', '') or '').strip()
-            original_quantity = self._parse_decimal(row.get('CANTIDAD', '0'))
-            valor_bruto = self._parse_decimal(row.get('VALOR BRUTO', '0'))
+            original_quantity = self._parse_number('CANTIDAD', row.get('CANTIDAD', '0'))
+            valor_bruto = self._parse_number('VALOR BRUTO', row.get('VALOR BRUTO', '0'))
 
             # Leer el IVA del CSV si está disponible, sino usar el default
             iva_str = (row.get('IVA', '') or '').strip()
             if iva_str:
                 # Remover el símbolo % si está presente
                 iva_str = iva_str.replace('%', '').strip()
-                iva_percentage = self._parse_decimal(iva_str)
+                iva_percentage = self._parse_number('IVA', iva_str)
             else:
                 # Usar el IVA que viene del parámetro de la interfaz
                 iva_str_clean = self.iva_percentage.replace('%', '').strip()
@@ -413,28 +1101,15 @@ class JCRCsvParser:
             return None
 
     def _parse_date(self, date_str: str) -> datetime:
-        """Parse date string to datetime object"""
-        if not date_str:
-            return datetime.now()
-
-        # Try different date formats
-        date_formats = [
-            '%Y-%m-%d',
-            '%d/%m/%Y',
-            '%m/%d/%Y',
-            '%Y/%m/%d',
-            '%d-%m-%Y',
-            '%Y%m%d'
-        ]
-
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(str(date_str).strip(), fmt)
-            except ValueError:
-                continue
-
-        # If no format matches, return current date
-        return datetime.now()
+        """Parse date string to datetime object (the current date when empty or not understood)"""
+        return self._date_parser.parse(date_str) or datetime.now()
+
+    def _parse_number(self, column: str, value) -> Decimal:
+        """Parse an amount with the number format inferred for its column"""
+        parser = self._number_parsers.get(column)
+        if parser is None:
+            return self._parse_decimal(value)
+        return parser.parse(value)
 
     def _parse_decimal(self, value) -> Decimal:
         """Parse value to Decimal, handling different formats (Colombian style included)"""
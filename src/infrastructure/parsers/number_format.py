@@ -0,0 +1,146 @@
+"""
+Number Format - Decimal separator convention inferred once per column
+
+Client files write amounts either as 1,234.56 (comma thousands, dot
+decimals) or as 1.234,56 (dot thousands, comma decimals). Deciding that
+again for every cell makes ambiguous values such as "1,234" change meaning
+from one row to the next, so the convention is inferred from a sample of
+the column and every cell is then parsed with it. Cells that do not fit the
+inferred convention fall back to the per-cell heuristic and are counted.
+"""
+import re
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Iterable, List, Optional
+
+
+DOT_DECIMAL = 'dot_decimal'  # 1,234.56
+COMMA_DECIMAL = 'comma_decimal'  # 1.234,56
+
+CONVENTION_LABELS = {
+    DOT_DECIMAL: 'punto decimal, p. ej. 1,234.56',
+    COMMA_DECIMAL: 'coma decimal, p. ej. 1.234,56',
+}
+
+_PATTERNS = {
+    DOT_DECIMAL: re.compile(r'[+-]?(?:\d{1,3}(?:,\d{3})+|\d*)(?:\.\d*)?'),
+    COMMA_DECIMAL: re.compile(r'[+-]?(?:\d{1,3}(?:\.\d{3})+|\d*)(?:,\d*)?'),
+}
+
+_THOUSANDS_SEPARATORS = {DOT_DECIMAL: ',', COMMA_DECIMAL: '.'}
+
+MAX_EXAMPLES = 3
+
+
+def _strip_symbols(value: str) -> str:
+    """Cell without currency symbols and spaces"""
+    return value.strip().replace('$', '').replace(' ', '')
+
+
+def infer_convention(values: Iterable[Any]) -> Optional[str]:
+    """
+    Decimal separator convention of a sample of cells
+
+    Only unambiguous cells vote: both separators present (the last one is
+    the decimal separator), a single separator followed by other than three
+    digits (decimals), or a separator repeated between groups of three
+    (thousands).
+
+    Returns:
+        DOT_DECIMAL, COMMA_DECIMAL, or None when the sample does not tell
+    """
+    votes = {DOT_DECIMAL: 0, COMMA_DECIMAL: 0}
+
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        cleaned = _strip_symbols(value)
+        comma, dot = cleaned.rfind(','), cleaned.rfind('.')
+
+        if comma >= 0 and dot >= 0:
+            votes[DOT_DECIMAL if dot > comma else COMMA_DECIMAL] += 1
+        elif comma >= 0 or dot >= 0:
+            separator = ',' if comma >= 0 else '.'
+            groups = cleaned.split(separator)
+            if len(groups) == 2 and len(groups[1]) != 3:
+                # Decimals: 840,50 / 840.5
+                votes[COMMA_DECIMAL if separator == ',' else DOT_DECIMAL] += 1
+            elif len(groups) > 2 and all(len(group) == 3 for group in groups[1:]):
+                # Thousands: 1,234,567 / 1.234.567
+                votes[DOT_DECIMAL if separator == ',' else COMMA_DECIMAL] += 1
+
+    if votes[DOT_DECIMAL] == votes[COMMA_DECIMAL]:
+        return None
+    return max(votes, key=votes.get)
+
+
+class NumberColumnParser:
+    """Parses the cells of one column with a fixed decimal separator convention"""
+
+    def __init__(self, convention: Optional[str], fallback: Callable[[Any], Decimal]):
+        """
+        Initialize parser
+
+        Args:
+            convention: DOT_DECIMAL, COMMA_DECIMAL or None (every cell uses fallback)
+            fallback: Per-cell parser for cells that do not fit the convention
+        """
+        self.convention = convention
+        self.fallback = fallback
+        self.contradictions = 0
+        self.examples = []  # First cells that did not fit the convention
+
+        self._pattern = _PATTERNS.get(convention)
+        self._thousands = _THOUSANDS_SEPARATORS.get(convention)
+
+    @classmethod
+    def from_sample(cls, values: Iterable[Any], fallback: Callable[[Any], Decimal]) -> 'NumberColumnParser':
+        return cls(infer_convention(values), fallback)
+
+    @property
+    def label(self) -> str:
+        return CONVENTION_LABELS.get(self.convention, 'sin formato definido')
+
+    def parse(self, value) -> Decimal:
+        """Parse one cell (None and empty cells are 0, like the per-cell heuristic)"""
+        if self._pattern is None:
+            return self.fallback(value)
+        if value is None:
+            return Decimal('0')
+        if not isinstance(value, str):
+            value = str(value)
+
+        if self._thousands not in value:
+            # Plain number (the common case): Decimal itself validates it
+            try:
+                return Decimal(value if self.convention == DOT_DECIMAL else value.replace(',', '.'))
+            except InvalidOperation:
+                pass
+
+        cleaned = _strip_symbols(value)
+        if not cleaned:
+            return Decimal('0')
+
+        if self._pattern.fullmatch(cleaned):
+            cleaned = cleaned.replace(self._thousands, '')
+            try:
+                return Decimal(cleaned if self.convention == DOT_DECIMAL else cleaned.replace(',', '.'))
+            except InvalidOperation:
+                pass
+
+        if ',' in cleaned or '.' in cleaned:
+            self.contradictions += 1
+            if len(self.examples) < MAX_EXAMPLES and value not in self.examples:
+                self.examples.append(value)
+        return self.fallback(value)
+
+    def parse_many(self, values: list) -> List[Decimal]:
+        """parse() of every value, parsing each distinct value once"""
+        parsed = {}
+        for value, count in Counter(values).items():
+            contradictions = self.contradictions
+            parsed[value] = self.parse(value)
+            if self.contradictions > contradictions:
+                # Every repetition of the cell counts
+                self.contradictions += count - 1
+        return [parsed[value] for value in values]
@@ -0,0 +1,72 @@
+"""
+String Pool - One shared object per repeated text value of a run
+
+Parsed invoices repeat the same few values over and over: seller and buyer
+names and NITs, municipalities, product names, unit codes. Every XML and
+every CSV row gives the parser a fresh copy of them, so a large run keeps
+thousands of equal strings alive and hashes each copy again on every dict
+lookup. A StringPool hands back the first object seen for each value: the
+copies can be freed and the survivors keep their cached hash.
+"""
+import sys
+from typing import Dict, Iterable, Optional
+
+
+# Invoice numbers and XML file names are unique per invoice: pooling them saves nothing
+INVOICE_FIELDS = (
+    'currency',
+    'seller_nit',
+    'seller_name',
+    'seller_municipality',
+    'buyer_nit',
+    'buyer_name',
+    'zip_filename',
+)
+PRODUCT_FIELDS = ('name', 'underlying_code', 'unit_of_measure', 'original_unit_code')
+
+
+class StringPool:
+    """Interns the repeated text fields of the invoices of one run"""
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+        self.duplicates = 0  # Copies replaced by the pooled object
+        self.bytes_saved = 0  # Size of those copies (freed unless referenced elsewhere)
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        """The pooled object equal to value (value itself the first time it is seen)"""
+        if value is None:
+            return None
+        pooled = self._strings.setdefault(value, value)
+        if pooled is not value:
+            self.duplicates += 1
+            self.bytes_saved += sys.getsizeof(value)
+        return pooled
+
+    def intern_invoice(self, invoice):
+        """Replace the repeated text fields of an invoice and its products, in place"""
+        intern = self.intern
+        for field in INVOICE_FIELDS:
+            setattr(invoice, field, intern(getattr(invoice, field)))
+        for product in invoice.products:
+            for field in PRODUCT_FIELDS:
+                setattr(product, field, intern(getattr(product, field)))
+        return invoice
+
+    def intern_invoices(self, invoices: Iterable):
+        """intern_invoice() for every invoice; returns the same iterable"""
+        for invoice in invoices:
+            self.intern_invoice(invoice)
+        return invoices
+
+    def summary(self) -> str:
+        """Line for the run message, in Spanish (empty when no text repeated)"""
+        if not self.duplicates:
+            return ""
+        return (
+            f"Memoria: {self.duplicates} textos repetidos compartidos entre facturas "
+            f"({self.bytes_saved / (1024 * 1024):.1f} MB ahorrados)"
+        )
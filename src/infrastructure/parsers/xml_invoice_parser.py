@@ -19,6 +19,8 @@ from ...domain.entities.invoice import Invoice
 
 from ...domain.entities.product import Product
 
+from .date_format import ISO_DATE_FORMAT, DateParser
+
 from .paisano_product_catalog import PaisanoProductCatalog
 
 
@@ -39,6 +41,15 @@ class XMLInvoiceParser:
         # Catálogo de productos de El Paisano
         self.product_catalog = PaisanoProductCatalog()
 
+    def create_date_parser(self) -> DateParser:
+        """
+        Date parser for one ZIP file or batch of XMLs
+
+        UBL dates are always ISO; repeated dates are parsed once. The parser
+        instance is shared by concurrent runs, so the memo is not kept on it.
+        """
+        return DateParser((ISO_DATE_FORMAT,))
+
     def parse_zip_file(self, zip_path: str) -> List[Invoice]:
         """
         Parse all XML invoices from a ZIP file
@@ -54,6 +65,7 @@ class XMLInvoiceParser:
         """
 
         invoices = []
+        date_parser = self.create_date_parser()
 
         try:
 
@@ -72,7 +84,7 @@ class XMLInvoiceParser:
                         xml_content = zip_ref.read(xml_file)
 
                         invoice = self.parse_xml_content(
-                            xml_content, xml_file, Path(zip_path).name
+                            xml_content, xml_file, Path(zip_path).name, date_parser
                         )
 
                         if invoice:
@@ -91,12 +103,12 @@ class XMLInvoiceParser:
 
         return invoices
 
-    def parse_xml_file(self, xml_path: str) -> Optional[Invoice]:
+    def parse_xml_file(self, xml_path: str, date_parser: Optional[DateParser] = None) -> Optional[Invoice]:
         """Parse a single XML file on disk"""
         try:
             content = Path(xml_path).read_bytes()
             return self.parse_xml_content(
-                content, Path(xml_path).name, Path(xml_path).parent.name
+                content, Path(xml_path).name, Path(xml_path).parent.name, date_parser
             )
         except Exception as exc:
             print(f"Error parsing XML file {xml_path}: {exc}")
@@ -110,14 +122,16 @@ class XMLInvoiceParser:
             return invoices
 
         xml_files = list(dir_path.rglob("*.xml"))
+        date_parser = self.create_date_parser()
         for xml_file in xml_files:
-            invoice = self.parse_xml_file(str(xml_file))
+            invoice = self.parse_xml_file(str(xml_file), date_parser)
             if invoice:
                 invoices.append(invoice)
         return invoices
 
     def parse_xml_content(
-        self, xml_content: bytes, xml_filename: str = "", zip_filename: str = ""
+        self, xml_content: bytes, xml_filename: str = "", zip_filename: str = "",
+        date_parser: Optional[DateParser] = None
     ) -> Invoice:
         """
 
@@ -133,6 +147,8 @@ class XMLInvoiceParser:
 
             zip_filename: Name of the ZIP file
 
+            date_parser: Date parser of the ZIP file or batch (a new one when omitted)
+
 
 
         Returns:
@@ -157,9 +173,12 @@ class XMLInvoiceParser:
 
             # Parse dates
 
-            issue_date = self._parse_date(issue_date_str)
+            if date_parser is None:
+                date_parser = self.create_date_parser()
 
-            due_date = self._parse_date(due_date_str) if due_date_str else None
+            issue_date = self._parse_date(issue_date_str, date_parser)
+
+            due_date = self._parse_date(due_date_str, date_parser) if due_date_str else None
 
             # Extract supplier (seller) data
 
@@ -421,12 +440,13 @@ class XMLInvoiceParser:
 
             return default
 
-    def _parse_date(self, date_str: str) -> datetime:
+    def _parse_date(self, date_str: str, date_parser: DateParser) -> datetime:
         """
         Parse date string to datetime
 
         Args:
             date_str: Date string in YYYY-MM-DD format
+            date_parser: Date parser of the ZIP file or batch
 
 
         Returns:
@@ -435,14 +455,18 @@ class XMLInvoiceParser:
 
         """
 
-        try:
+        parsed = date_parser.parse(date_str)
 
-            return datetime.strptime(date_str, "%Y-%m-%d")
+        if parsed is None:
 
-        except Exception:
+            if date_str:
+
+                print(f"Unrecognized invoice date '{date_str}', using the current date")
 
             return datetime.now()
 
+        return parsed
+
     def _convert_unit_code(self, code: str) -> str:
         """
         Convert UBL unit code to human-readable unit
@@ -0,0 +1,14 @@
+"""
+Parallel processing infrastructure
+"""
+from .work_scheduler import InvoiceWorkScheduler
+from .job_spool import JobSpool, SpoolJob
+from .backfill_store import BackfillTaskStore, BackfillTask
+from .admission import AdmissionController
+from .parse_cache import SpeculativeParseCache
+from .preflight import PreflightScanner, PreflightReport
+from .supervised_pool import SupervisedWorkerPool
+
+__all__ = ['InvoiceWorkScheduler', 'JobSpool', 'SpoolJob', 'BackfillTaskStore', 'BackfillTask',
+           'AdmissionController', 'SpeculativeParseCache', 'PreflightScanner', 'PreflightReport',
+           'SupervisedWorkerPool']
@@ -0,0 +1,200 @@
+"""
+Admission Controller - Process-wide limits for concurrent processing runs
+
+Every run (UI tab, HTTP job, spool or backfill task) asks for a ticket
+before loading its inputs. A ticket holds the input files the run reads at
+the same time (one per parsing worker, not every file it was given) and an
+estimate of the memory the run needs; runs that do not fit wait in a per-company queue.
+Queues are served round-robin, and a waiting run that does not fit keeps
+its share reserved so a stream of small runs cannot starve it.
+"""
+import json
+import threading
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+
+DEFAULT_MAX_CONCURRENT_FILES = 50
+DEFAULT_MEMORY_BUDGET_MB = 2048
+
+# Approximate RAM per MB of input once parsed into invoices
+MEMORY_FACTORS = {
+    '.zip': 10.0,  # Compressed XML
+    '.xml': 1.5,
+    '.csv': 6.0,
+    '.txt': 6.0,
+    '.xlsx': 12.0,  # Compressed sheet XML, about half the size of the same CSV
+    '.xlsm': 12.0,
+}
+DEFAULT_MEMORY_FACTOR = 4.0
+JOB_BASE_MEMORY_MB = 32
+
+
+@lru_cache(maxsize=None)
+def load_app_settings(config_path: str = "config.json") -> dict:
+    """Read app_settings from config.json once per process"""
+    path = Path(config_path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            return json.load(f).get('app_settings', {})
+    except Exception as e:
+        print(f"Error reading {config_path}: {str(e)}")
+        return {}
+
+
+class AdmissionTicket:
+    """Resources granted to one run; release() returns them"""
+
+    def __init__(self, controller: 'AdmissionController', company: str, files: int, memory_mb: float):
+        self.controller = controller
+        self.company = company
+        self.files = files
+        self.memory_mb = memory_mb
+        self.granted = False
+        self.released = False
+
+    def release(self) -> None:
+        if self.granted and not self.released:
+            self.released = True
+            self.controller._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class AdmissionController:
+    """Caps open input files and memory across all runs of this process"""
+
+    def __init__(
+        self,
+        max_concurrent_files: int = DEFAULT_MAX_CONCURRENT_FILES,
+        memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+        job_memory_cap_mb: Optional[float] = None
+    ):
+        """
+        Initialize controller
+
+        Args:
+            max_concurrent_files: Input files processed at the same time by all runs
+            memory_budget_mb: Estimated memory of all running runs
+            job_memory_cap_mb: Upper bound of one run's estimate (e.g. the invoice
+                buffer budget, beyond which a run spills to disk)
+        """
+        self.max_concurrent_files = max(1, int(max_concurrent_files))
+        self.memory_budget_mb = max(1.0, float(memory_budget_mb))
+        self.job_memory_cap_mb = job_memory_cap_mb
+
+        self._files_in_use = 0
+        self._memory_in_use = 0.0
+        self._queues: Dict[str, Deque[AdmissionTicket]] = {}
+        self._companies: List[str] = []  # Round-robin order
+        self._next_company = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    @classmethod
+    def from_config(cls, config_path: str = "config.json", job_memory_cap_mb: Optional[float] = None):
+        """Create the controller from config.json app_settings"""
+        settings = load_app_settings(config_path)
+        return cls(
+            max_concurrent_files=settings.get('max_concurrent_files', DEFAULT_MAX_CONCURRENT_FILES),
+            memory_budget_mb=settings.get('memory_budget_mb', DEFAULT_MEMORY_BUDGET_MB),
+            job_memory_cap_mb=job_memory_cap_mb
+        )
+
+    def admit(self, company: str, paths: List[str], open_files: Optional[int] = None) -> AdmissionTicket:
+        """
+        Block until the run fits and return its ticket
+
+        Args:
+            company: Company of the run, used for fair queueing
+            paths: Input files of the run
+            open_files: Input files the run reads at the same time, e.g. its
+                parsing workers (defaults to all of paths)
+
+        Returns:
+            Granted ticket, release it when the run finishes
+        """
+        # A run larger than the limits is clamped so it can still run alone
+        if open_files is None:
+            open_files = len(paths)
+        files = min(max(1, open_files), self.max_concurrent_files)
+        memory_mb = min(self.estimate_memory_mb(paths), self.memory_budget_mb)
+        ticket = AdmissionTicket(self, company, files, memory_mb)
+
+        with self._changed:
+            if company not in self._queues:
+                self._queues[company] = deque()
+                self._companies.append(company)
+            self._queues[company].append(ticket)
+            self._dispatch()
+            if not ticket.granted:
+                print(f"Admisión: {company} en espera ({files} archivos, {memory_mb:.0f} MB estimados)")
+            self._changed.wait_for(lambda: ticket.granted)
+        return ticket
+
+    def estimate_memory_mb(self, paths: List[str]) -> float:
+        """Estimate the memory a run needs from the size and type of its inputs"""
+        estimate = JOB_BASE_MEMORY_MB
+        for path in paths:
+            path = Path(path)
+            try:
+                size_mb = path.stat().st_size / (1024 * 1024)
+            except OSError:
+                continue
+            estimate += size_mb * MEMORY_FACTORS.get(path.suffix.lower(), DEFAULT_MEMORY_FACTOR)
+        if self.job_memory_cap_mb:
+            estimate = min(estimate, self.job_memory_cap_mb + JOB_BASE_MEMORY_MB)
+        return estimate
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'files_in_use': self._files_in_use,
+                'memory_in_use_mb': round(self._memory_in_use, 1),
+                'waiting': {company: len(queue) for company, queue in self._queues.items() if queue},
+            }
+
+    # --- Internals (called with the lock held) ---
+    def _release(self, ticket: AdmissionTicket) -> None:
+        with self._changed:
+            self._files_in_use -= ticket.files
+            self._memory_in_use -= ticket.memory_mb
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant waiting tickets, one company at a time in round-robin order"""
+        granted_any = True
+        while granted_any:
+            granted_any = False
+            free_files = self.max_concurrent_files - self._files_in_use
+            free_memory = self.memory_budget_mb - self._memory_in_use
+
+            for offset in range(len(self._companies)):
+                index = (self._next_company + offset) % len(self._companies)
+                queue = self._queues[self._companies[index]]
+                if not queue:
+                    continue
+
+                ticket = queue[0]
+                if ticket.files <= free_files and ticket.memory_mb <= free_memory:
+                    queue.popleft()
+                    ticket.granted = True
+                    self._files_in_use += ticket.files
+                    self._memory_in_use += ticket.memory_mb
+                    self._next_company = index + 1
+                    granted_any = True
+                    break
+
+                # Keep room for this run so later, smaller runs cannot starve it
+                free_files -= ticket.files
+                free_memory -= ticket.memory_mb
+
+        self._changed.notify_all()
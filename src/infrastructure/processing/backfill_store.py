@@ -0,0 +1,173 @@
+"""
+Backfill Task Store - Persistent per-day status of historical backfills
+
+Each backfill is split into one task per company and day. Task status is
+kept in SQLite so an interrupted backfill resumes where it stopped.
+"""
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+@dataclass
+class BackfillTask:
+    """Processing of one company/day folder"""
+
+    backfill_id: str
+    company: str
+    day: str  # dd-mm-YYYY, same as the data/<company>/<day>/ folders
+    folder: str
+    input_count: int = 0
+    input_bytes: int = 0
+    status: str = STATUS_PENDING
+    records: int = 0
+    output_path: Optional[str] = None
+    message: str = ''
+    attempts: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def get_duration_seconds(self) -> float:
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return 0.0
+
+
+class BackfillTaskStore:
+    """SQLite table with one row per backfill task"""
+
+    def __init__(self, db_path: str = "facturas_users.db"):
+        """
+        Initialize the store
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._init_database()
+
+    def _init_database(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS backfill_tasks (
+                    backfill_id TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    folder TEXT NOT NULL,
+                    input_count INTEGER NOT NULL DEFAULT 0,
+                    input_bytes INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    records INTEGER NOT NULL DEFAULT 0,
+                    output_path TEXT,
+                    message TEXT NOT NULL DEFAULT '',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    PRIMARY KEY (backfill_id, company, day)
+                )
+            ''')
+            conn.commit()
+
+    def register(self, task: BackfillTask) -> BackfillTask:
+        """
+        Add a task, or return the stored one if the backfill already knows it
+
+        Tasks left running by an interrupted backfill go back to pending.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                '''INSERT OR IGNORE INTO backfill_tasks
+                   (backfill_id, company, day, folder, input_count, input_bytes, status)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                (task.backfill_id, task.company, task.day, task.folder,
+                 task.input_count, task.input_bytes, STATUS_PENDING)
+            )
+            conn.execute(
+                '''UPDATE backfill_tasks SET status = ?
+                   WHERE backfill_id = ? AND company = ? AND day = ? AND status = ?''',
+                (STATUS_PENDING, task.backfill_id, task.company, task.day, STATUS_RUNNING)
+            )
+            conn.commit()
+        return self.get(task.backfill_id, task.company, task.day)
+
+    def mark_running(self, task: BackfillTask) -> None:
+        task.status = STATUS_RUNNING
+        task.attempts += 1
+        task.started_at = datetime.now()
+        task.finished_at = None
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                '''UPDATE backfill_tasks SET status = ?, attempts = ?, started_at = ?, finished_at = NULL
+                   WHERE backfill_id = ? AND company = ? AND day = ?''',
+                (task.status, task.attempts, task.started_at.isoformat(),
+                 task.backfill_id, task.company, task.day)
+            )
+            conn.commit()
+
+    def mark_finished(
+        self,
+        task: BackfillTask,
+        success: bool,
+        message: str,
+        records: int = 0,
+        output_path: Optional[str] = None
+    ) -> None:
+        task.status = STATUS_DONE if success else STATUS_FAILED
+        task.message = message
+        task.records = records
+        task.output_path = output_path
+        task.finished_at = datetime.now()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                '''UPDATE backfill_tasks
+                   SET status = ?, message = ?, records = ?, output_path = ?, finished_at = ?
+                   WHERE backfill_id = ? AND company = ? AND day = ?''',
+                (task.status, message, records, output_path, task.finished_at.isoformat(),
+                 task.backfill_id, task.company, task.day)
+            )
+            conn.commit()
+
+    def get(self, backfill_id: str, company: str, day: str) -> Optional[BackfillTask]:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                'SELECT * FROM backfill_tasks WHERE backfill_id = ? AND company = ? AND day = ?',
+                (backfill_id, company, day)
+            ).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def get_by_backfill(self, backfill_id: str) -> List[BackfillTask]:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                'SELECT * FROM backfill_tasks WHERE backfill_id = ? ORDER BY company, day',
+                (backfill_id,)
+            ).fetchall()
+        tasks = [self._row_to_task(row) for row in rows]
+        # Days are stored as dd-mm-YYYY, order them chronologically
+        return sorted(tasks, key=lambda t: (t.company, datetime.strptime(t.day, "%d-%m-%Y")))
+
+    @staticmethod
+    def _row_to_task(row: sqlite3.Row) -> BackfillTask:
+        return BackfillTask(
+            backfill_id=row['backfill_id'],
+            company=row['company'],
+            day=row['day'],
+            folder=row['folder'],
+            input_count=row['input_count'],
+            input_bytes=row['input_bytes'],
+            status=row['status'],
+            records=row['records'],
+            output_path=row['output_path'],
+            message=row['message'],
+            attempts=row['attempts'],
+            started_at=datetime.fromisoformat(row['started_at']) if row['started_at'] else None,
+            finished_at=datetime.fromisoformat(row['finished_at']) if row['finished_at'] else None
+        )
@@ -0,0 +1,125 @@
+"""
+Invoice Codec - Compact wire format for invoices sent between processes
+
+Pickling Invoice/Product dataclasses spends most of its time on per-object
+overhead: every instance goes through __reduce_ex__, carries a dict with its
+field names and pickles each Decimal as a class reference plus a string.
+The wire format flattens a batch into plain tuples instead:
+
+    (CODEC_VERSION, strings, invoice rows)
+
+Text fields are indices into a per-batch string table, so the seller, buyer,
+municipality, units and file names repeated across invoices travel once.
+Amounts travel as their exact decimal text (scaled integers would need an
+exponent per value and are slower to build in Python than str()), and dates
+stay datetime objects, which pickle already stores as a few packed bytes.
+"""
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from ...domain.entities.invoice import Invoice
+from ...domain.entities.product import Product
+
+
+CODEC_VERSION = 1
+
+
+def encode_invoices(invoices: List[Invoice]) -> tuple:
+    """
+    Flatten invoices into the wire format
+
+    Returns:
+        Tuple of primitives, ready to pickle or send over a pipe
+    """
+    strings: Dict[Optional[str], int] = {}
+
+    def text(value: Optional[str]) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    rows = []
+    for invoice in invoices:
+        products = tuple(
+            (
+                text(product.name),
+                text(product.underlying_code),
+                text(product.unit_of_measure),
+                str(product.quantity),
+                str(product.unit_price),
+                str(product.total_price),
+                str(product.iva_percentage),
+                None if product.original_quantity is None else str(product.original_quantity),
+                text(product.original_unit_code),
+                product.line_number,
+            )
+            for product in invoice.products
+        )
+        rows.append((
+            text(invoice.invoice_number),
+            invoice.issue_date,
+            invoice.due_date,
+            text(invoice.currency),
+            text(invoice.seller_nit),
+            text(invoice.seller_name),
+            text(invoice.seller_municipality),
+            text(invoice.buyer_nit),
+            text(invoice.buyer_name),
+            text(invoice.xml_filename),
+            text(invoice.zip_filename),
+            invoice.processed_at,
+            products,
+        ))
+
+    return CODEC_VERSION, tuple(strings), tuple(rows)
+
+
+def decode_invoices(payload: Tuple) -> List[Invoice]:
+    """
+    Rebuild the invoices of an encode_invoices() payload
+
+    Raises:
+        ValueError: The payload was written by another codec version
+    """
+    version, strings, rows = payload
+    if version != CODEC_VERSION:
+        raise ValueError(f"Unsupported invoice codec version: {version}")
+
+    invoices = []
+    for (number, issue_date, due_date, currency, seller_nit, seller_name, municipality,
+         buyer_nit, buyer_name, xml_filename, zip_filename, processed_at, products) in rows:
+        invoice = Invoice(
+            invoice_number=strings[number],
+            issue_date=issue_date,
+            due_date=due_date,
+            currency=strings[currency],
+            seller_nit=strings[seller_nit],
+            seller_name=strings[seller_name],
+            seller_municipality=strings[municipality],
+            buyer_nit=strings[buyer_nit],
+            buyer_name=strings[buyer_name],
+            xml_filename=strings[xml_filename],
+            zip_filename=strings[zip_filename],
+            processed_at=processed_at,
+        )
+        # Built directly: add_product() would renumber line_number
+        invoice.products = [
+            Product(
+                name=strings[name],
+                underlying_code=strings[code],
+                unit_of_measure=strings[unit],
+                quantity=Decimal(quantity),
+                unit_price=Decimal(unit_price),
+                total_price=Decimal(total_price),
+                iva_percentage=Decimal(iva),
+                original_quantity=None if original_quantity is None else Decimal(original_quantity),
+                original_unit_code=strings[original_unit],
+                line_number=line_number,
+            )
+            for (name, code, unit, quantity, unit_price, total_price, iva,
+                 original_quantity, original_unit, line_number) in products
+        ]
+        invoices.append(invoice)
+
+    return invoices
@@ -0,0 +1,385 @@
+"""
+Job Spool - Shared-folder job queue claimed through exclusive file creation
+
+Layout of the spool folder (may live on a network share):
+    jobs/<job_id>.json       submitted job, written once
+    claims/<job_id>.<n>      claim of attempt n, its modification time is the heartbeat
+    finished/<job_id>.json   result of the job
+    inputs/<job_id>/...      copies of the submitted files
+    results/<job_id>/...     generated output written back by the worker
+
+Claims and results are created with O_CREAT | O_EXCL, which SMB and NFS
+servers resolve atomically: of several workers creating the same file only
+one succeeds. No database locks are taken on the share.
+
+Paths are stored relative to the spool folder so machines that mount the
+share on different drives or mount points can all work on the same jobs.
+"""
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+STATUS_QUEUED = 'queued'
+STATUS_CLAIMED = 'claimed'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_EXCLUSIVE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+
+
+@dataclass
+class SpoolJob:
+    """Job stored in the spool"""
+
+    id: str
+    company: str
+    paths: List[str]
+    params: Dict[str, str] = field(default_factory=dict)
+    username: str = 'SPOOL'
+    status: str = STATUS_QUEUED
+    worker_id: Optional[str] = None
+    attempts: int = 0
+    message: str = ''
+    records: int = 0
+    output_path: Optional[str] = None
+    submitted_at: float = 0.0
+    claimed_at: Optional[float] = None
+    heartbeat_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def is_finished(self) -> bool:
+        return self.status in (STATUS_DONE, STATUS_FAILED)
+
+
+class JobSpool:
+    """Job queue shared by any number of worker processes through a folder"""
+
+    def __init__(self, spool_dir: str, stale_after: float = 120.0, max_attempts: int = 3):
+        """
+        Initialize spool
+
+        Args:
+            spool_dir: Shared spool folder
+            stale_after: Seconds without heartbeat before a claim is re-queued
+            max_attempts: Claims allowed per job before it is marked as failed
+        """
+        self.spool_dir = Path(spool_dir).resolve()
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.jobs_dir = self.spool_dir / 'jobs'
+        self.claims_dir = self.spool_dir / 'claims'
+        self.finished_dir = self.spool_dir / 'finished'
+        self.inputs_dir = self.spool_dir / 'inputs'
+        self.results_dir = self.spool_dir / 'results'
+
+        for folder in (self.jobs_dir, self.claims_dir, self.finished_dir, self.inputs_dir, self.results_dir):
+            folder.mkdir(parents=True, exist_ok=True)
+
+    # --- Client side ---
+    def submit(
+        self,
+        company: str,
+        paths: List[str],
+        params: Optional[Dict[str, str]] = None,
+        username: str = 'SPOOL'
+    ) -> SpoolJob:
+        """
+        Copy the input files into the spool and queue a job
+
+        Args:
+            company: Canonical company name
+            paths: Input files or folders
+            params: Extra use case parameters (municipality, iva_percentage)
+            username: User recorded in the report
+
+        Returns:
+            Queued job
+        """
+        job_id = uuid.uuid4().hex
+        job_inputs = self.inputs_dir / job_id
+        job_inputs.mkdir(parents=True)
+
+        relative_paths = []
+        for idx, source in enumerate(paths):
+            source = Path(source)
+            # Index prefix keeps inputs with the same name apart
+            target = job_inputs / f"{idx:03d}_{source.name}"
+            if source.is_dir():
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+            relative_paths.append(target.relative_to(self.spool_dir).as_posix())
+
+        job = SpoolJob(
+            id=job_id,
+            company=company,
+            paths=relative_paths,
+            params=dict(params or {}),
+            username=username,
+            submitted_at=time.time()
+        )
+
+        # Written aside and renamed in, workers never see a half-written job
+        partial = self.jobs_dir / f".{job_id}.tmp"
+        partial.write_text(json.dumps({
+            'id': job.id,
+            'company': job.company,
+            'paths': job.paths,
+            'params': job.params,
+            'username': job.username,
+            'submitted_at': job.submitted_at,
+        }), encoding='utf-8')
+        os.replace(partial, self._job_file(job_id))
+        return job
+
+    def get(self, job_id: str) -> Optional[SpoolJob]:
+        job = self._read_job(job_id)
+        if job is None:
+            return None
+
+        result = self._read_json(self._finished_file(job_id))
+        attempts, claim_file = self._latest_claim(job_id)
+        job.attempts = attempts
+        if result is not None:
+            job.status = result['status']
+            job.worker_id = result['worker_id']
+            job.message = result['message']
+            job.records = result['records']
+            job.output_path = result['output_path']
+            job.finished_at = result['finished_at']
+            return job
+
+        heartbeat_at = self._heartbeat_at(claim_file)
+        if heartbeat_at is None:
+            return job
+        # A stale claim is taken again by the next worker, unless it used up its attempts
+        if self._is_stale(heartbeat_at, time.time()) and attempts < self.max_attempts:
+            return job
+
+        claim = self._read_json(claim_file) or {}
+        job.status = STATUS_CLAIMED
+        job.worker_id = claim.get('worker_id')
+        job.claimed_at = claim.get('claimed_at')
+        job.heartbeat_at = heartbeat_at
+        return job
+
+    def list_jobs(self, status: Optional[str] = None) -> List[SpoolJob]:
+        jobs = [self.get(job_id) for job_id in self._job_ids()]
+        jobs = [job for job in jobs if job is not None and (not status or job.status == status)]
+        return sorted(jobs, key=lambda job: job.submitted_at)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval: float = 1.0) -> Optional[SpoolJob]:
+        """Poll until the job finishes (or timeout) and return its latest state"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.is_finished():
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def resolve(self, relative_path: str) -> Path:
+        """Absolute local path of a path stored in the spool"""
+        return self.spool_dir / relative_path
+
+    # --- Worker side ---
+    def claim(self, worker_id: str) -> Optional[SpoolJob]:
+        """
+        Atomically claim the oldest queued job
+
+        Jobs whose claim went stale are claimable again, so a crashed
+        worker's job is picked up by the next worker asking for work.
+
+        Returns:
+            Claimed job or None if the queue is empty
+        """
+        now = time.time()
+        for job, attempts in self._claimable_jobs(now):
+            claimed_at = time.time()
+            # Only one worker creates the claim of the next attempt
+            if not self._create_exclusive(
+                self._claim_file(job.id, attempts + 1),
+                {'worker_id': worker_id, 'claimed_at': claimed_at}
+            ):
+                continue
+            if self._finished_file(job.id).exists():
+                # Finished while the spool was scanned
+                self._claim_file(job.id, attempts + 1).unlink()
+                continue
+
+            job.status = STATUS_CLAIMED
+            job.worker_id = worker_id
+            job.attempts = attempts + 1
+            job.claimed_at = job.heartbeat_at = claimed_at
+            return job
+        return None
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """
+        Refresh the claim of a job
+
+        Returns:
+            False if the worker no longer owns the claim (it went stale and was re-queued)
+        """
+        claim_file = self._owned_claim(job_id, worker_id)
+        if claim_file is None:
+            return False
+        try:
+            os.utime(claim_file)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(
+        self,
+        job_id: str,
+        worker_id: str,
+        success: bool,
+        message: str,
+        records: int = 0,
+        output_file: Optional[str] = None
+    ) -> bool:
+        """
+        Write the result of a job back to the spool
+
+        Args:
+            output_file: Local generated file, copied into results/<job_id>/
+
+        Returns:
+            False if the claim was lost and the result was discarded
+        """
+        if self._owned_claim(job_id, worker_id) is None:
+            return False
+
+        output_path = None
+        if success and output_file:
+            job_results = self.results_dir / job_id
+            job_results.mkdir(parents=True, exist_ok=True)
+            target = job_results / Path(output_file).name
+            shutil.copy2(output_file, target)
+            output_path = target.relative_to(self.spool_dir).as_posix()
+
+        return self._finish(job_id, STATUS_DONE if success else STATUS_FAILED, message,
+                            worker_id=worker_id, records=records, output_path=output_path)
+
+    def requeue_stale(self) -> int:
+        """Re-queue claims whose worker stopped sending heartbeats; jobs out of attempts fail"""
+        return sum(1 for _ in self._claimable_jobs(time.time()))
+
+    def _claimable_jobs(self, now: float):
+        """Unfinished jobs without a live claim, oldest first, with their attempts so far"""
+        finished = {path.stem for path in self.finished_dir.glob('*.json')}
+        jobs = [self._read_job(job_id) for job_id in self._job_ids() if job_id not in finished]
+        failed = requeued = 0
+        for job in sorted((job for job in jobs if job is not None), key=lambda job: job.submitted_at):
+            attempts, claim_file = self._latest_claim(job.id)
+            heartbeat_at = self._heartbeat_at(claim_file)
+            if heartbeat_at is not None:
+                if not self._is_stale(heartbeat_at, now):
+                    continue
+                if attempts >= self.max_attempts:
+                    if self._finish(job.id, STATUS_FAILED,
+                                    "Trabajo abandonado: se superó el número de intentos"):
+                        failed += 1
+                    continue
+                requeued += 1
+            yield job, attempts
+        if failed or requeued:
+            print(f"Spool: {requeued} trabajos re-encolados, {failed} fallidos por abandono")
+
+    def _owned_claim(self, job_id: str, worker_id: str) -> Optional[Path]:
+        """Latest claim of the job if it belongs to the worker and the job is not finished"""
+        _, claim_file = self._latest_claim(job_id)
+        if claim_file is None or self._finished_file(job_id).exists():
+            return None
+        claim = self._read_json(claim_file)
+        if claim is None or claim.get('worker_id') != worker_id:
+            return None
+        return claim_file
+
+    def _finish(self, job_id: str, status: str, message: str, worker_id: Optional[str] = None,
+                records: int = 0, output_path: Optional[str] = None) -> bool:
+        # Exclusive creation: a late worker cannot overwrite the result of the one that won
+        return self._create_exclusive(self._finished_file(job_id), {
+            'status': status,
+            'worker_id': worker_id,
+            'message': message,
+            'records': records,
+            'output_path': output_path,
+            'finished_at': time.time(),
+        })
+
+    def _latest_claim(self, job_id: str) -> Tuple[int, Optional[Path]]:
+        """Attempts made so far and the claim file of the last one"""
+        attempts = 0
+        for path in self.claims_dir.glob(f"{job_id}.*"):
+            suffix = path.suffix[1:]
+            if suffix.isdigit():
+                attempts = max(attempts, int(suffix))
+        if not attempts:
+            return 0, None
+        return attempts, self._claim_file(job_id, attempts)
+
+    def _heartbeat_at(self, claim_file: Optional[Path]) -> Optional[float]:
+        if claim_file is None:
+            return None
+        try:
+            return claim_file.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _is_stale(self, heartbeat_at: float, now: float) -> bool:
+        return heartbeat_at < now - self.stale_after
+
+    def _job_ids(self) -> List[str]:
+        return [path.stem for path in self.jobs_dir.glob('*.json')]
+
+    def _read_job(self, job_id: str) -> Optional[SpoolJob]:
+        data = self._read_json(self._job_file(job_id))
+        if data is None:
+            return None
+        return SpoolJob(
+            id=data['id'],
+            company=data['company'],
+            paths=data['paths'],
+            params=data['params'],
+            username=data['username'],
+            submitted_at=data['submitted_at']
+        )
+
+    def _job_file(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _claim_file(self, job_id: str, attempt: int) -> Path:
+        return self.claims_dir / f"{job_id}.{attempt}"
+
+    def _finished_file(self, job_id: str) -> Path:
+        return self.finished_dir / f"{job_id}.json"
+
+    @staticmethod
+    def _create_exclusive(path: Path, data: dict) -> bool:
+        """Create the file with its content; False if another process created it first"""
+        try:
+            fd = os.open(str(path), _EXCLUSIVE_FLAGS, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(json.dumps(data).encode('utf-8'))
+        return True
+
+    @staticmethod
+    def _read_json(path: Optional[Path]) -> Optional[dict]:
+        """Content of a spool file (None if missing or still being written)"""
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return None
@@ -0,0 +1,349 @@
+"""
+Speculative Parse Cache - Parses selected inputs before the user presses Process
+
+Files added to a tab are parsed right away on a low-priority worker process.
+When the run starts it takes the finished results and only parses what is
+still missing, so most of the waiting happens while the user is still
+choosing files or filling in the form.
+
+The workers are supervised like the run's own (supervised_pool): a parse
+that exceeds the per-file limits is killed, so a pathological file cannot
+keep a worker busy for the rest of the session.
+
+Results are kept pickled in the compact invoice wire format (invoice_codec),
+so every take() returns fresh invoices the run is free to convert in place,
+and are tied to the size and modification time the file had when it was
+selected: an input edited afterwards is parsed again by the run itself.
+"""
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ...domain.entities.invoice import Invoice
+from .invoice_codec import decode_invoices, encode_invoices
+from .supervised_pool import EVENT_FAILED, EVENT_RESULT, SupervisedWorkerPool
+from .work_scheduler import InvoiceWorkScheduler, _get_worker_parser
+
+
+KIND_ZIP = 'zip'  # Agrobuitron ZIP with XML invoices
+KIND_XML = 'xml'  # El Paisano loose XML invoice
+KIND_JCR = 'jcr'  # Juan Camilo Rosas CSV/TXT
+
+BELOW_NORMAL_PRIORITY_CLASS = 0x00004000  # Windows SetPriorityClass
+WORKER_NICENESS = 10
+
+# A run waits this long for a parse already running, then parses the file itself
+WAIT_TIMEOUT = 15
+
+# Set in each worker process once its priority was lowered
+_priority_lowered = False
+
+
+def _lower_worker_priority() -> None:
+    """Leave the CPU to the UI and to the runs themselves"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            os.nice(WORKER_NICENESS)
+    except Exception as e:
+        print(f"Could not lower parse worker priority: {str(e)}")
+
+
+def parse_input(kind: str, path: str, iva_percentage: Optional[str] = None) -> bytes:
+    """
+    Parse one input (runs inside the worker process)
+
+    Returns:
+        Pickled (encode_invoices() payload, parser warnings)
+    """
+    warnings: List[str] = []
+    if kind == KIND_JCR:
+        from ..parsers.jcr_csv_parser import JCRCsvParser
+        parser = JCRCsvParser(path, iva_percentage=iva_percentage)
+        invoices = parser.parse()
+        warnings = parser.warnings
+    elif kind == KIND_ZIP:
+        invoices = _get_worker_parser().parse_zip_file(path)
+    else:
+        invoice = _get_worker_parser().parse_xml_file(path)
+        invoices = [invoice] if invoice else []
+    return pickle.dumps((encode_invoices(invoices), warnings), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def iter_parse_input(task: Tuple[str, str, Optional[str]]) -> Iterator[bytes]:
+    """parse_input for the supervised workers: a single result, at low priority"""
+    global _priority_lowered
+    if not _priority_lowered:
+        _priority_lowered = True
+        _lower_worker_priority()
+    yield parse_input(*task)
+
+
+@dataclass
+class _Entry:
+    """Background parse of one input"""
+
+    signature: Tuple[int, int]  # (size, mtime_ns) when the file was selected
+    iva_percentage: Optional[str]
+    task_id: int
+    future: Future
+    nbytes: int = 0  # Size of the pickled result once finished
+
+
+class SpeculativeParseCache:
+    """Per-session cache of inputs parsed in the background"""
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        memory_budget_mb: float = 256,
+        wait_timeout: float = WAIT_TIMEOUT,
+        file_timeout: Optional[float] = InvoiceWorkScheduler.FILE_TIMEOUT,
+        cpu_timeout: Optional[float] = InvoiceWorkScheduler.CPU_TIMEOUT
+    ):
+        """
+        Initialize cache
+
+        Args:
+            max_workers: Low-priority worker processes
+            memory_budget_mb: Pickled results kept; the oldest are dropped beyond it
+            wait_timeout: Seconds a run waits for a running parse before parsing the file itself
+            file_timeout: Wall-clock seconds allowed per input (None: no limit)
+            cpu_timeout: CPU seconds allowed per input, POSIX only (None: no limit)
+        """
+        self.max_workers = max(1, max_workers)
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.wait_timeout = wait_timeout
+        self.file_timeout = file_timeout
+        self.cpu_timeout = cpu_timeout
+
+        self._pool: Optional[SupervisedWorkerPool] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._futures: Dict[int, Future] = {}  # Parses not finished yet, by task id
+        self._closed = False
+        self._entries: 'OrderedDict[Tuple[str, str], _Entry]' = OrderedDict()
+        self._bytes_cached = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_path: str = "config.json"):
+        """Create the cache with the per-file limits of config.json app_settings"""
+        from .admission import load_app_settings
+        settings = load_app_settings(config_path)
+        return cls(
+            file_timeout=settings.get('file_timeout_seconds', InvoiceWorkScheduler.FILE_TIMEOUT),
+            cpu_timeout=settings.get('file_cpu_timeout_seconds', InvoiceWorkScheduler.CPU_TIMEOUT)
+        )
+
+    def prefetch(self, kind: str, paths: List[str], iva_percentage: Optional[str] = None) -> None:
+        """
+        Start parsing inputs that are not cached yet
+
+        Args:
+            kind: KIND_ZIP, KIND_XML (files or folders) or KIND_JCR
+            paths: Selected inputs, in selection order
+            iva_percentage: Default IVA the JCR parser applies to rows without one
+        """
+        for path in self._expand(kind, paths):
+            key = (kind, self._normalize(path))
+            signature = self._signature(path)
+            if signature is None:
+                continue
+
+            with self._lock:
+                if self._closed:
+                    return
+                entry = self._entries.get(key)
+                if entry and entry.signature == signature and entry.iva_percentage == iva_percentage:
+                    continue
+                if entry:
+                    self._drop(key)
+
+                task_id, future = self._submit((kind, str(path), iva_percentage))
+                entry = _Entry(signature=signature, iva_percentage=iva_percentage, task_id=task_id, future=future)
+                self._entries[key] = entry
+            future.add_done_callback(lambda f, key=key, entry=entry: self._on_done(key, entry))
+
+    def take(
+        self,
+        kind: str,
+        path: str,
+        iva_percentage: Optional[str] = None,
+        warnings: Optional[List[str]] = None
+    ) -> Optional[List[Invoice]]:
+        """
+        Invoices parsed in the background for an input, if still valid
+
+        A parse that is already running is waited for; one still queued is
+        cancelled so the run parses the file with its own workers instead.
+
+        Args:
+            warnings: Optional list that receives the parser's warnings about the input
+
+        Returns:
+            Fresh invoices, or None when the caller has to parse the file itself
+        """
+        key = (kind, self._normalize(path))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.iva_percentage != iva_percentage or entry.signature != self._signature(path):
+                self._drop(key)
+                return None
+            if not entry.future.done() and self._cancel_queued(entry):
+                self._drop(key)
+                return None
+
+        try:
+            payload, parse_warnings = pickle.loads(entry.future.result(timeout=self.wait_timeout))
+            invoices = decode_invoices(payload)
+        except FutureTimeoutError:
+            # Most likely a pathological file: the run parses it under its own
+            # time limits, and the worker is killed at the per-file limits
+            print(f"Background parse of {path} is taking too long, parsing it in the run")
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._drop(key)
+            return None
+        except Exception as e:
+            print(f"Background parse of {path} failed, parsing again: {str(e)}")
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._drop(key)
+            return None
+
+        if warnings is not None:
+            warnings.extend(parse_warnings)
+        return invoices
+
+    def cancel(self, paths: List[str]) -> None:
+        """Forget inputs removed from the selection (folders include their contents)"""
+        targets = [self._normalize(path) for path in paths]
+        with self._lock:
+            for key in list(self._entries):
+                path = key[1]
+                if any(path == target or path.startswith(target + os.sep) for target in targets):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def shutdown(self) -> None:
+        """Stop the workers at the end of the session (a running parse is killed when it ends or times out)"""
+        with self._lock:
+            self._closed = True
+        self.clear()
+
+    # --- Internals ---
+    def _submit(self, task: Tuple[str, str, Optional[str]]) -> Tuple[int, Future]:
+        """Queue a background parse (lock held), starting the dispatcher thread if needed"""
+        if self._pool is None:
+            self._pool = SupervisedWorkerPool(self.max_workers, self.file_timeout, self.cpu_timeout)
+        future = Future()
+        task_id = self._pool.submit(iter_parse_input, task)
+        self._futures[task_id] = future
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch, args=(self._pool,), daemon=True)
+            self._dispatcher.start()
+        return task_id, future
+
+    def _dispatch(self, pool: SupervisedWorkerPool) -> None:
+        """Dispatcher thread: run the queued parses and resolve their futures"""
+        while True:
+            events = pool.events()
+            try:
+                for event in events:
+                    if event.kind not in (EVENT_RESULT, EVENT_FAILED):
+                        continue
+                    with self._lock:
+                        future = self._futures.pop(event.task_id, None)
+                        closed = self._closed
+                    if future is not None:
+                        try:
+                            if event.kind == EVENT_RESULT:
+                                future.set_result(event.value)
+                            else:
+                                future.set_exception(RuntimeError(event.value))
+                        except InvalidStateError:
+                            pass  # Removed from the selection while parsing
+                    if closed:
+                        break
+            finally:
+                events.close()  # Stops the workers
+
+            with self._lock:
+                if self._closed or not self._futures:
+                    # Workers stop with events(); the next prefetch starts new ones
+                    self._dispatcher = None
+                    self._pool = None
+                    return
+
+    def _cancel_queued(self, entry: _Entry) -> bool:
+        """Remove a parse no worker has started yet (lock held)"""
+        if self._pool is not None and self._pool.cancel(entry.task_id):
+            self._futures.pop(entry.task_id, None)
+            return True
+        return False
+
+    def _on_done(self, key: Tuple[str, str], entry: _Entry) -> None:
+        """Account the finished result and keep the cache within its budget"""
+        if entry.future.cancelled() or entry.future.exception() is not None:
+            return
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                return  # Removed from the selection while parsing
+            entry.nbytes = len(entry.future.result())
+            self._bytes_cached += entry.nbytes
+
+            for old_key in list(self._entries):
+                if self._bytes_cached <= self.memory_budget:
+                    break
+                if old_key != key and self._entries[old_key].future.done():
+                    self._drop(old_key)
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        """Remove an entry (lock held); a running parse finishes and is discarded"""
+        entry = self._entries.pop(key)
+        if not entry.future.done():
+            self._cancel_queued(entry)
+        entry.future.cancel()
+        self._bytes_cached -= entry.nbytes
+
+    # --- Helpers ---
+    @staticmethod
+    def _expand(kind: str, paths: List[str]) -> List[Path]:
+        """Input files of a selection; XML folders contribute every XML inside them"""
+        files = []
+        for raw_path in paths:
+            path = Path(raw_path)
+            if kind == KIND_XML and path.is_dir():
+                files.extend(sorted(
+                    f for f in path.rglob("*") if f.is_file() and f.suffix.lower() == ".xml"
+                ))
+            elif path.is_file():
+                files.append(path)
+        return files
+
+    @staticmethod
+    def _normalize(path) -> str:
+        return os.path.normcase(os.path.abspath(str(path)))
+
+    @staticmethod
+    def _signature(path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
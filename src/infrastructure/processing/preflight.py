@@ -0,0 +1,359 @@
+"""
+Pre-flight Scanner - Checks selected inputs and estimates a run before it starts
+
+The scan only touches what is cheap to read: ZIP central directories (member
+names and sizes), a few sampled XMLs per archive, one pass over CSV bytes and
+the first rows of Excel workbooks.
+Broken inputs are reported before any real parsing starts, and the expected
+invoices, lines and run time are extrapolated from the samples and from the
+throughput measured on previous runs.
+"""
+import codecs
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from openpyxl import load_workbook
+
+
+SAMPLE_SIZE = 3  # XMLs parsed per archive (and for loose XMLs as a whole)
+CSV_CHUNK_SIZE = 1024 * 1024
+CSV_SAMPLE_LINES = 2000  # Lines used to estimate lines per invoice
+CSV_DELIMITERS = [',', '\t', ';', '|']
+CSV_INVOICE_COLUMN = 'NUMERO DE FACTURA'
+
+# Raised while reading a ZIP or one of its members when the archive is broken
+DAMAGED_ZIP_ERRORS = (zipfile.BadZipFile, zipfile.LargeZipFile, zlib.error, EOFError)
+
+
+@dataclass
+class InputScan:
+    """Pre-flight result of one selected input"""
+
+    path: str
+    size: int = 0
+    xml_files: int = 0
+    estimated_invoices: int = 0
+    estimated_lines: int = 0
+    error: Optional[str] = None  # The run would fail or silently lose this input
+    warning: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).name
+
+
+@dataclass
+class PreflightReport:
+    """Pre-flight result of a whole selection"""
+
+    company: str
+    inputs: List[InputScan] = field(default_factory=list)
+    estimated_seconds: Optional[float] = None  # None without throughput history
+    scan_seconds: float = 0.0
+
+    @property
+    def errors(self) -> List[InputScan]:
+        return [scan for scan in self.inputs if scan.error]
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(scan.size for scan in self.inputs)
+
+    @property
+    def estimated_invoices(self) -> int:
+        return sum(scan.estimated_invoices for scan in self.inputs if not scan.error)
+
+    @property
+    def estimated_lines(self) -> int:
+        return sum(scan.estimated_lines for scan in self.inputs if not scan.error)
+
+    def error_message(self) -> str:
+        lines = ["Archivos con errores, no se procesó ninguno:"]
+        lines.extend(f"- {scan.name}: {scan.error}" for scan in self.errors)
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        """Short description for the user, in Spanish"""
+        lines = [
+            f"{len(self.inputs)} entrada(s) ({self.total_bytes / (1024 * 1024):.1f} MB): "
+            f"~{self._format_count(self.estimated_invoices)} facturas, "
+            f"~{self._format_count(self.estimated_lines)} líneas"
+        ]
+        if self.estimated_seconds is None:
+            lines.append("Tiempo estimado: sin historial de procesamientos")
+        else:
+            lines.append(f"Tiempo estimado: {self._format_duration(self.estimated_seconds)}")
+        for scan in self.inputs:
+            if scan.error:
+                lines.append(f"Error en {scan.name}: {scan.error}")
+            elif scan.warning:
+                lines.append(f"Advertencia en {scan.name}: {scan.warning}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_count(count: int) -> str:
+        return f"{count:,}".replace(',', '.')
+
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        if seconds < 60:
+            return f"~{max(1, round(seconds))} s"
+        return f"~{seconds / 60:.1f} min"
+
+
+class PreflightScanner:
+    """Fast integrity check and estimate of the inputs of a run"""
+
+    def __init__(self, throughput_repository=None, sample_size: int = SAMPLE_SIZE, crc_check: bool = False):
+        """
+        Initialize scanner
+
+        Args:
+            throughput_repository: SQLiteThroughputRepository with past runs (optional)
+            sample_size: XMLs parsed per archive to estimate lines per invoice
+            crc_check: Verify the CRC of every ZIP member (reads whole archives)
+        """
+        self.throughput_repository = throughput_repository
+        self.sample_size = max(1, sample_size)
+        self.crc_check = crc_check
+        self._xml_parser = None
+
+    def scan(self, company: str, paths: List[str]) -> PreflightReport:
+        """
+        Scan the inputs of a run
+
+        Args:
+            company: Company of the run (selects the throughput history)
+            paths: ZIP, CSV/TXT, XLSX or XML files, or folders with XML files
+        """
+        started = time.monotonic()
+        report = PreflightReport(company=company)
+        # Loose XMLs are sampled as a whole: a folder may hold thousands of them
+        xml_groups: List[Tuple[InputScan, List[Path]]] = []
+
+        for raw_path in paths:
+            path = Path(raw_path)
+            suffix = path.suffix.lower()
+            if path.is_dir():
+                files = sorted(f for f in path.rglob("*") if f.is_file() and f.suffix.lower() == ".xml")
+                scan = InputScan(path=str(path), size=sum(f.stat().st_size for f in files), xml_files=len(files))
+                if not files:
+                    scan.error = "La carpeta no contiene archivos XML"
+                xml_groups.append((scan, files))
+            elif not path.is_file():
+                scan = InputScan(path=str(path), error="El archivo no existe")
+            elif suffix == ".zip":
+                scan = self._scan_zip(path)
+            elif suffix in (".csv", ".txt"):
+                scan = self._scan_csv(path)
+            elif suffix in (".xlsx", ".xlsm"):
+                scan = self._scan_xlsx(path)
+            elif suffix == ".xml":
+                scan = InputScan(path=str(path), size=path.stat().st_size, xml_files=1)
+                xml_groups.append((scan, [path]))
+            else:
+                scan = InputScan(path=str(path), size=path.stat().st_size, error="Tipo de archivo no soportado")
+            report.inputs.append(scan)
+
+        if xml_groups:
+            self._estimate_loose_xml(xml_groups)
+
+        if self.throughput_repository:
+            try:
+                bytes_per_second = self.throughput_repository.bytes_per_second(company)
+                if bytes_per_second:
+                    report.estimated_seconds = report.total_bytes / bytes_per_second
+            except Exception as e:
+                print(f"Error reading throughput history: {str(e)}")
+
+        report.scan_seconds = time.monotonic() - started
+        return report
+
+    def record_run(self, company: str, paths: List[str], seconds: float, records: int) -> None:
+        """Store the measured throughput of a finished run for later estimates"""
+        if not self.throughput_repository:
+            return
+        input_bytes = sum(p.stat().st_size for p in map(Path, paths) if p.is_file())
+        try:
+            self.throughput_repository.record(company, input_bytes, seconds, records)
+        except Exception as e:
+            print(f"Error saving throughput history: {str(e)}")
+
+    # --- ZIP ---
+    def _scan_zip(self, path: Path) -> InputScan:
+        scan = InputScan(path=str(path), size=path.stat().st_size)
+        try:
+            with zipfile.ZipFile(path, "r") as zip_ref:
+                members = [info for info in zip_ref.infolist() if info.filename.lower().endswith(".xml")]
+                scan.xml_files = scan.estimated_invoices = len(members)
+                if not members:
+                    scan.error = "El ZIP no contiene archivos XML"
+                    return scan
+
+                if self.crc_check:
+                    bad_member = zip_ref.testzip()
+                    if bad_member:
+                        scan.error = f"ZIP dañado: {bad_member} no supera la verificación CRC"
+                        return scan
+
+                # Reading a member also checks its CRC
+                line_counts = []
+                for info in self._sample(members):
+                    invoice = self._parse_sample(
+                        lambda: self._get_xml_parser().parse_xml_content(
+                            zip_ref.read(info.filename), info.filename, path.name
+                        )
+                    )
+                    if invoice is not None:
+                        line_counts.append(invoice.get_product_count())
+        except DAMAGED_ZIP_ERRORS as e:
+            scan.error = f"ZIP dañado o incompleto ({str(e)})"
+            return scan
+        except OSError as e:
+            scan.error = f"No se pudo leer el archivo ({str(e)})"
+            return scan
+
+        if line_counts:
+            scan.estimated_lines = round(len(members) * sum(line_counts) / len(line_counts))
+        else:
+            scan.warning = "Ninguna de las facturas de muestra se pudo leer"
+        return scan
+
+    # --- CSV ---
+    def _scan_csv(self, path: Path) -> InputScan:
+        """Count lines in one pass and validate the header and the encoding the parser uses"""
+        scan = InputScan(path=str(path), size=path.stat().st_size)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        newlines = 0
+        head = b""
+        last_byte = b"\n"
+
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CSV_CHUNK_SIZE), b''):
+                    decoder.decode(chunk)
+                    newlines += chunk.count(b"\n")
+                    last_byte = chunk[-1:]
+                    if len(head) < CSV_CHUNK_SIZE:
+                        head += chunk
+                decoder.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            scan.error = f"El archivo no está en UTF-8 (byte {e.start})"
+            return scan
+        except OSError as e:
+            scan.error = f"No se pudo leer el archivo ({str(e)})"
+            return scan
+
+        lines = head.decode('utf-8', errors='ignore').splitlines()
+        if not lines:
+            scan.error = "El archivo está vacío"
+            return scan
+
+        # Same delimiter detection as JCRCsvParser
+        sample = head[:1024].decode('utf-8', errors='ignore')
+        delimiter = max(CSV_DELIMITERS, key=sample.count)
+        header = [column.strip() for column in lines[0].split(delimiter)]
+        if CSV_INVOICE_COLUMN not in header:
+            scan.error = f"Falta la columna {CSV_INVOICE_COLUMN}"
+            return scan
+
+        # Data lines: every newline minus the header, plus an unterminated last line
+        data_lines = newlines - 1 + (0 if last_byte == b"\n" else 1)
+        scan.estimated_lines = max(0, data_lines)
+
+        invoice_index = header.index(CSV_INVOICE_COLUMN)
+        sampled = [line.split(delimiter) for line in lines[1:CSV_SAMPLE_LINES + 1] if line.strip()]
+        invoices = {fields[invoice_index].strip() for fields in sampled if len(fields) > invoice_index}
+        invoices.discard('')
+        if invoices:
+            scan.estimated_invoices = max(1, round(scan.estimated_lines * len(invoices) / len(sampled)))
+        else:
+            scan.warning = "No se encontraron números de factura en las primeras líneas"
+        return scan
+
+    # --- XLSX ---
+    def _scan_xlsx(self, path: Path) -> InputScan:
+        """Validate the header of the active sheet and sample its first rows (the row count comes from the sheet's dimensions)"""
+        scan = InputScan(path=str(path), size=path.stat().st_size)
+        try:
+            workbook = load_workbook(path, read_only=True, data_only=True)
+        except Exception as e:
+            scan.error = f"No se pudo abrir el libro de Excel ({str(e)})"
+            return scan
+
+        try:
+            sheet = workbook.active
+            rows = sheet.iter_rows(max_row=CSV_SAMPLE_LINES + 1, values_only=True)
+            header = ['' if value is None else str(value).strip() for value in next(rows, ())]
+            if not header:
+                scan.error = "El archivo está vacío"
+                return scan
+            if CSV_INVOICE_COLUMN not in header:
+                scan.error = f"Falta la columna {CSV_INVOICE_COLUMN}"
+                return scan
+
+            invoice_index = header.index(CSV_INVOICE_COLUMN)
+            sampled = [row for row in rows if any(value is not None for value in row)]
+            invoices = {
+                str(row[invoice_index]).strip()
+                for row in sampled if len(row) > invoice_index and row[invoice_index] is not None
+            }
+            invoices.discard('')
+            scan.estimated_lines = max(len(sampled), (sheet.max_row or 0) - 1)
+        except Exception as e:
+            scan.error = f"No se pudo leer el libro de Excel ({str(e)})"
+            return scan
+        finally:
+            workbook.close()
+
+        if invoices:
+            scan.estimated_invoices = max(1, round(scan.estimated_lines * len(invoices) / len(sampled)))
+        else:
+            scan.warning = "No se encontraron números de factura en las primeras líneas"
+        return scan
+
+    # --- Loose XML ---
+    def _estimate_loose_xml(self, groups: List[Tuple[InputScan, List[Path]]]) -> None:
+        """Estimate lines per invoice from a few XMLs spread over all loose XML inputs"""
+        all_files = [f for _, files in groups for f in files]
+        line_counts = []
+        for xml_path in self._sample(all_files):
+            invoice = self._parse_sample(lambda: self._get_xml_parser().parse_xml_file(str(xml_path)))
+            if invoice is not None:
+                line_counts.append(invoice.get_product_count())
+
+        lines_per_invoice = sum(line_counts) / len(line_counts) if line_counts else 0
+        for scan, files in groups:
+            scan.estimated_invoices = len(files)
+            scan.estimated_lines = round(len(files) * lines_per_invoice)
+            if files and not line_counts:
+                scan.warning = "Ninguna de las facturas de muestra se pudo leer"
+
+    # --- Helpers ---
+    def _sample(self, items: list) -> list:
+        """Up to sample_size items spread evenly over the list"""
+        if len(items) <= self.sample_size:
+            return list(items)
+        step = len(items) / self.sample_size
+        return [items[int(i * step)] for i in range(self.sample_size)]
+
+    @staticmethod
+    def _parse_sample(parse):
+        """Parse one sampled XML; damaged archive errors propagate, XML errors do not"""
+        try:
+            return parse()
+        except DAMAGED_ZIP_ERRORS + (OSError,):
+            raise
+        except Exception as e:
+            print(f"Pre-flight: sample XML could not be parsed: {str(e)}")
+            return None
+
+    def _get_xml_parser(self):
+        if self._xml_parser is None:
+            from ..parsers.xml_invoice_parser import XMLInvoiceParser
+            self._xml_parser = XMLInvoiceParser()
+        return self._xml_parser
@@ -0,0 +1,267 @@
+"""
+Supervised Worker Pool - Worker processes with per-file time limits
+
+Tasks are generators that yield one result per input file. Each worker runs
+one task at a time and the per-file clock restarts whenever a result
+arrives: a worker that spends longer than the wall-clock limit on a single
+file is killed, and one that burns more CPU than allowed is stopped by the
+operating system (RLIMIT_CPU, POSIX only). Either way the task is reported
+as failed together with the number of results it delivered, a fresh worker
+takes the place of the dead one and the rest of the batch carries on.
+"""
+import multiprocessing
+import signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Any, Callable, Deque, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: only the wall-clock limit applies
+    resource = None
+
+
+EVENT_RESULT = 'result'  # The task finished one file; value is what it yielded
+EVENT_DONE = 'done'  # The task finished every file
+EVENT_FAILED = 'failed'  # The task stopped early; value is the reason, in Spanish
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    """Something that happened to a submitted task"""
+
+    task_id: int
+    kind: str  # EVENT_RESULT, EVENT_DONE or EVENT_FAILED
+    value: Any = None
+    completed: int = 0  # Results the task delivered before this event
+
+
+def _limit_cpu(cpu_timeout: Optional[float]) -> None:
+    """Let the current process use cpu_timeout more CPU seconds (SIGXCPU beyond that)"""
+    if resource is None or not cpu_timeout:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + cpu_timeout) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, cpu_timeout: Optional[float]) -> None:
+    """Worker process loop: run tasks until the pool sends None or goes away"""
+    # Ctrl+C reaches the whole process group; the pool stops its workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        task_id, func, arg = message
+        try:
+            results = iter(func(arg))
+            while True:
+                _limit_cpu(cpu_timeout)
+                try:
+                    value = next(results)
+                except StopIteration:
+                    break
+                conn.send((EVENT_RESULT, task_id, value))
+            conn.send((EVENT_DONE, task_id, None))
+        except Exception as e:
+            conn.send((EVENT_FAILED, task_id, f"error en el proceso de trabajo ({str(e)})"))
+
+
+class _Worker:
+    """One worker process and the task it is running"""
+
+    def __init__(self, context, cpu_timeout: Optional[float]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, cpu_timeout), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+        self.task_id: Optional[int] = None
+        self.completed = 0
+        self.deadline = float('inf')
+
+
+class SupervisedWorkerPool:
+    """Runs generator tasks on worker processes that are killed when a file hangs"""
+
+    def __init__(
+        self,
+        max_workers: int,
+        file_timeout: Optional[float] = None,
+        cpu_timeout: Optional[float] = None
+    ):
+        """
+        Initialize pool (workers start when the first events() call needs them)
+
+        Args:
+            max_workers: Worker processes
+            file_timeout: Wall-clock seconds a task may spend on one file (None: no limit)
+            cpu_timeout: CPU seconds a task may spend on one file (None: no limit)
+        """
+        self.max_workers = max(1, max_workers)
+        self.file_timeout = file_timeout
+        self.cpu_timeout = cpu_timeout
+
+        self._context = multiprocessing.get_context()
+        self._pending: Deque[Tuple[int, Callable, Any]] = deque()
+        self._pending_lock = threading.Lock()  # submit() and cancel() may come from other threads
+        self._workers: List[_Worker] = []
+        self._next_task_id = 0
+
+    def submit(self, func: Callable[[Any], Iterator], arg: Any) -> int:
+        """
+        Queue a task; allowed while events() is being consumed, also from another thread
+
+        Args:
+            func: Module-level function returning an iterator with one result per file
+            arg: Picklable argument for func
+
+        Returns:
+            Task id used in the events of the task
+        """
+        with self._pending_lock:
+            task_id = self._next_task_id
+            self._next_task_id += 1
+            self._pending.append((task_id, func, arg))
+        return task_id
+
+    def cancel(self, task_id: int) -> bool:
+        """
+        Remove a task no worker has started yet
+
+        Returns:
+            True if the task was removed, False once a worker has it (or it ended)
+        """
+        with self._pending_lock:
+            for task in self._pending:
+                if task[0] == task_id:
+                    self._pending.remove(task)
+                    return True
+        return False
+
+    def events(self) -> Iterator[TaskEvent]:
+        """Run the queued tasks, yielding their events until every task has ended"""
+        try:
+            while self._pending or self._busy_workers():
+                self._dispatch()
+                busy = self._busy_workers()
+                timeout = None
+                if self.file_timeout:
+                    timeout = max(0.0, min(worker.deadline for worker in busy) - time.monotonic())
+                ready = wait(
+                    [worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                    timeout
+                )
+                for worker in busy:
+                    yield from self._collect(worker, ready)
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stop every worker; busy ones are killed"""
+        for worker in self._workers:
+            self._stop(worker)
+        self._workers = []
+
+    # --- Internals ---
+    def _busy_workers(self) -> List[_Worker]:
+        return [worker for worker in self._workers if worker.task_id is not None]
+
+    def _dispatch(self) -> None:
+        """Hand queued tasks to idle workers, starting new ones up to max_workers"""
+        for worker in list(self._workers):
+            if worker.task_id is not None:
+                continue
+            task = self._next_pending()
+            if task is None:
+                break
+            try:
+                self._start(worker, task)
+            except OSError:
+                # Died while idle: replaced below
+                with self._pending_lock:
+                    self._pending.appendleft(task)
+                self._stop(worker)
+                self._workers.remove(worker)
+
+        while len(self._workers) < self.max_workers:
+            task = self._next_pending()
+            if task is None:
+                break
+            worker = _Worker(self._context, self.cpu_timeout)
+            self._workers.append(worker)
+            self._start(worker, task)
+
+    def _next_pending(self) -> Optional[Tuple[int, Callable, Any]]:
+        with self._pending_lock:
+            return self._pending.popleft() if self._pending else None
+
+    def _start(self, worker: _Worker, task: Tuple[int, Callable, Any]) -> None:
+        worker.conn.send(task)
+        worker.task_id = task[0]
+        worker.completed = 0
+        worker.deadline = time.monotonic() + self.file_timeout if self.file_timeout else float('inf')
+
+    def _collect(self, worker: _Worker, ready: list) -> Iterator[TaskEvent]:
+        """Yield the messages of a worker, then check it is alive and on time"""
+        reason = None
+        try:
+            while worker.task_id is not None and worker.conn.poll():
+                kind, task_id, value = worker.conn.recv()
+                event = TaskEvent(task_id, kind, value, worker.completed)
+                if kind == EVENT_RESULT:
+                    worker.completed += 1
+                    if self.file_timeout:
+                        worker.deadline = time.monotonic() + self.file_timeout
+                else:
+                    worker.task_id = None
+                yield event
+        except (EOFError, OSError):
+            reason = self._exit_reason(worker)
+
+        if worker.task_id is None:
+            return
+        if reason is None and worker.process.sentinel in ready and not worker.process.is_alive():
+            reason = self._exit_reason(worker)
+        if reason is None and time.monotonic() >= worker.deadline:
+            reason = f"tiempo límite excedido ({self.file_timeout:g} s)"
+        if reason is None:
+            return
+
+        task_id, completed = worker.task_id, worker.completed
+        self._stop(worker)
+        self._workers.remove(worker)
+        yield TaskEvent(task_id, EVENT_FAILED, reason, completed)
+
+    def _exit_reason(self, worker: _Worker) -> str:
+        worker.process.join(1)
+        exitcode = worker.process.exitcode
+        if resource is not None and exitcode == -signal.SIGXCPU:
+            return f"límite de CPU excedido ({self.cpu_timeout:g} s)"
+        return f"el proceso de trabajo terminó inesperadamente (código {exitcode})"
+
+    @staticmethod
+    def _stop(worker: _Worker) -> None:
+        if worker.task_id is None and worker.process.is_alive():
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(1)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        worker.task_id = None
+        worker.conn.close()
@@ -0,0 +1,543 @@
+"""
+Invoice Work Scheduler - Size-aware parallel parsing across all inputs
+
+Every ZIP member and loose XML of a run is enumerated up front with its
+uncompressed size, packed into chunks and dispatched largest-first to a
+process pool. Idle workers pull the next chunk from the shared queue, so one
+huge archive at the end of the selection no longer leaves the other cores
+idle. Results are reassembled in the order the user selected the inputs.
+
+Workers are supervised: a file that hangs or crashes its worker is skipped
+and reported, and the rest of its chunk is handed to a fresh worker.
+
+Juan Camilo Rosas CSV/TXT files go through the same workers, one task per
+file: a file that fails is reported and the others are still merged in the
+order they were selected.
+"""
+import os
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from ...domain.entities.invoice import Invoice
+from .invoice_codec import decode_invoices, encode_invoices
+from .supervised_pool import EVENT_FAILED, EVENT_RESULT, SupervisedWorkerPool
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """Smallest schedulable piece of work: one XML inside a ZIP or on disk"""
+
+    seq: int  # Position in user order across the whole run
+    input_index: int  # Index of the input path the unit belongs to
+    path: str
+    member: Optional[str] = None  # ZIP member name; None for a loose XML
+    size: int = 0  # Uncompressed size in bytes
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    """Chunk of consecutive work units sent to a worker as a single task"""
+
+    units: Tuple[WorkUnit, ...]
+
+    @property
+    def size(self) -> int:
+        return sum(unit.size for unit in self.units)
+
+
+@dataclass(frozen=True)
+class FileFailure:
+    """Input skipped because it could not be parsed, hung or crashed its worker"""
+
+    path: str
+    member: Optional[str]  # ZIP member name; None for a loose XML or a CSV/TXT file
+    reason: str
+
+    @property
+    def name(self) -> str:
+        if self.member is None:
+            return Path(self.path).name
+        return f"{Path(self.path).name}/{self.member}"
+
+
+# Failure reason of an XML the parser returned nothing for
+UNREADABLE_XML = "XML no válido o ilegible"
+
+# Parser instance reused by every task executed in the same worker process
+_worker_parser = None
+
+
+def _get_worker_parser():
+    global _worker_parser
+    if _worker_parser is None:
+        from ..parsers.xml_invoice_parser import XMLInvoiceParser
+        _worker_parser = XMLInvoiceParser()
+    return _worker_parser
+
+
+def parse_work_item(item: WorkItem) -> List[Tuple[int, List[Invoice], Optional[str]]]:
+    """
+    Parse every unit of a work item
+
+    Returns:
+        List of (unit seq, invoices, error) tuples
+    """
+    return list(iter_work_item(item))
+
+
+def iter_work_item(item: WorkItem) -> Iterator[Tuple[int, List[Invoice], Optional[str]]]:
+    """
+    Parse the units of a work item one by one (runs inside a worker process)
+
+    Yields:
+        (unit seq, invoices, error) for every unit, in order; error is None
+        unless the XML could not be read or parsed
+    """
+    parser = _get_worker_parser()
+    date_parser = parser.create_date_parser()
+    zip_ref = None
+    zip_path = None
+
+    try:
+        for unit in item.units:
+            invoices: List[Invoice] = []
+            error = None
+            try:
+                if unit.member is None:
+                    invoice = parser.parse_xml_file(unit.path, date_parser)
+                else:
+                    if unit.path != zip_path:
+                        if zip_ref is not None:
+                            zip_ref.close()
+                        zip_ref = zipfile.ZipFile(unit.path, "r")
+                        zip_path = unit.path
+                    invoice = parser.parse_xml_content(
+                        zip_ref.read(unit.member), unit.member, Path(unit.path).name, date_parser
+                    )
+                if invoice:
+                    invoices.append(invoice)
+                else:
+                    # The parser already printed why
+                    error = UNREADABLE_XML
+            except Exception as e:
+                print(f"Error parsing XML {unit.member or unit.path}: {str(e)}")
+                error = str(e)
+            yield unit.seq, invoices, error
+    finally:
+        if zip_ref is not None:
+            zip_ref.close()
+
+
+def iter_encoded_work_item(item: WorkItem) -> Iterator[Tuple[int, tuple]]:
+    """iter_work_item for worker processes: invoices travel in the compact wire format"""
+    for seq, invoices, error in iter_work_item(item):
+        yield seq, encode_invoices(invoices), error
+
+
+def iter_csv_file(task: Tuple[str, Optional[str]]) -> Iterator[Tuple[List[Invoice], Optional[str], List[str]]]:
+    """
+    Parse one JCR CSV/TXT file (runs inside a worker process)
+
+    Args:
+        task: (path, default IVA percentage)
+
+    Yields:
+        A single (invoices, None, warnings), or ([], error, []) when the file
+        cannot be parsed; warnings describe doubtful values in the file
+    """
+    from ..parsers.jcr_csv_parser import JCRCsvParser
+
+    path, iva_percentage = task
+    parser = JCRCsvParser(path, iva_percentage=iva_percentage)
+    try:
+        invoices = parser.parse()
+    except Exception as e:
+        print(f"Error processing {path}: {str(e)}")
+        yield [], str(e), []
+        return
+    yield invoices, None, parser.warnings
+
+
+def iter_encoded_csv_file(task: Tuple[str, Optional[str]]) -> Iterator[Tuple[tuple, Optional[str], List[str]]]:
+    """iter_csv_file for worker processes: invoices travel in the compact wire format"""
+    for invoices, error, warnings in iter_csv_file(task):
+        yield encode_invoices(invoices), error, warnings
+
+
+def iter_encoded_csv_chunk(task: tuple) -> Iterator[Tuple[tuple, Optional[str], Optional[dict]]]:
+    """
+    Parse one chunk of a JCR file (runs inside a worker process)
+
+    Args:
+        task: (path, default IVA percentage, CsvChunkPlan, chunk index)
+
+    Yields:
+        A single (payload, None, chunk stats), or (empty payload, error, None)
+    """
+    from ..parsers.jcr_csv_parser import JCRCsvParser
+
+    path, iva_percentage, plan, chunk_index = task
+    parser = JCRCsvParser(path, iva_percentage=iva_percentage)
+    try:
+        invoices = parser.parse_chunk(plan, chunk_index)
+    except Exception as e:
+        print(f"Error processing {path} (chunk {chunk_index + 1}): {str(e)}")
+        yield encode_invoices([]), str(e), None
+        return
+    yield encode_invoices(invoices), None, parser.chunk_stats()
+
+
+class InvoiceWorkScheduler:
+    """Plans and executes XML parsing for a whole run on a process pool"""
+
+    # Target uncompressed bytes / units per task (a larger unit gets its own task)
+    CHUNK_TARGET_BYTES = 4 * 1024 * 1024
+    CHUNK_MAX_UNITS = 100
+
+    # Below this many units the process pool costs more than it saves
+    # (only without time limits: limited runs always parse in workers)
+    MIN_PARALLEL_UNITS = 16
+
+    # JCR files from this size are parsed as chunks of about CSV_CHUNK_BYTES
+    CSV_CHUNK_MIN_BYTES = 32 * 1024 * 1024
+    CSV_CHUNK_BYTES = 16 * 1024 * 1024
+
+    # Default limits for a single XML; legitimate files take a few seconds at most
+    FILE_TIMEOUT = 300.0
+    CPU_TIMEOUT = 180.0
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        file_timeout: Optional[float] = FILE_TIMEOUT,
+        cpu_timeout: Optional[float] = CPU_TIMEOUT
+    ):
+        """
+        Initialize scheduler
+
+        Args:
+            max_workers: Worker processes (defaults to all cores but one)
+            file_timeout: Wall-clock seconds allowed per XML (None: no limit)
+            cpu_timeout: CPU seconds allowed per XML, POSIX only (None: no limit)
+        """
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.file_timeout = file_timeout
+        self.cpu_timeout = cpu_timeout
+
+    @classmethod
+    def from_config(cls, config_path: str = "config.json", max_workers: Optional[int] = None):
+        """Create the scheduler with the per-file limits of config.json app_settings"""
+        from .admission import load_app_settings
+        settings = load_app_settings(config_path)
+        return cls(
+            max_workers=max_workers,
+            file_timeout=settings.get('file_timeout_seconds', cls.FILE_TIMEOUT),
+            cpu_timeout=settings.get('file_cpu_timeout_seconds', cls.CPU_TIMEOUT)
+        )
+
+    def plan(self, input_paths: List[str], failures: Optional[List[FileFailure]] = None) -> List[WorkUnit]:
+        """
+        Enumerate every XML of every ZIP and every loose XML with its size
+
+        Args:
+            input_paths: ZIP or XML file paths in user order
+            failures: Optional list that receives the ZIP files that cannot be opened
+
+        Returns:
+            Work units in user order
+        """
+        units: List[WorkUnit] = []
+
+        for input_index, raw_path in enumerate(input_paths):
+            path = str(raw_path)
+
+            if path.lower().endswith(".zip"):
+                try:
+                    with zipfile.ZipFile(path, "r") as zip_ref:
+                        for info in zip_ref.infolist():
+                            if info.filename.lower().endswith(".xml"):
+                                units.append(WorkUnit(
+                                    seq=len(units),
+                                    input_index=input_index,
+                                    path=path,
+                                    member=info.filename,
+                                    size=info.file_size
+                                ))
+                except Exception as e:
+                    print(f"Error reading ZIP file {path}: {str(e)}")
+                    if failures is not None:
+                        failures.append(FileFailure(path, None, str(e)))
+            elif path.lower().endswith(".xml"):
+                try:
+                    size = Path(path).stat().st_size
+                except OSError:
+                    size = 0
+                units.append(WorkUnit(
+                    seq=len(units), input_index=input_index, path=path, size=size
+                ))
+
+        return units
+
+    def pack(self, units: List[WorkUnit]) -> List[WorkItem]:
+        """Group consecutive units into tasks of roughly CHUNK_TARGET_BYTES"""
+        items: List[WorkItem] = []
+        current: List[WorkUnit] = []
+        current_size = 0
+
+        for unit in units:
+            if current and (
+                current_size + unit.size > self.CHUNK_TARGET_BYTES
+                or len(current) >= self.CHUNK_MAX_UNITS
+            ):
+                items.append(WorkItem(tuple(current)))
+                current, current_size = [], 0
+            current.append(unit)
+            current_size += unit.size
+
+        if current:
+            items.append(WorkItem(tuple(current)))
+
+        return items
+
+    def parse(
+        self,
+        input_paths: List[str],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        failures: Optional[List[FileFailure]] = None
+    ) -> Iterator[Tuple[str, List[Invoice]]]:
+        """
+        Parse all inputs, yielding (input_path, invoices) in user order
+
+        Each input is yielded as soon as it and every input before it are
+        complete, so callers can start consuming while the pool is still busy.
+
+        Args:
+            input_paths: ZIP or XML file paths in user order
+            progress_callback: Optional callback (units_done, total_units)
+            failures: Optional list that receives the ZIP files that cannot be
+                opened and the XMLs skipped because they could not be parsed,
+                hung or crashed their worker
+        """
+        units = self.plan(input_paths, failures)
+        total_units = len(units)
+
+        seqs_by_input: Dict[int, List[int]] = {i: [] for i in range(len(input_paths))}
+        for unit in units:
+            seqs_by_input[unit.input_index].append(unit.seq)
+        remaining = {i: len(seqs) for i, seqs in seqs_by_input.items()}
+        results: Dict[int, List[Invoice]] = {}
+        done = 0
+        next_input = 0
+
+        def ready_inputs():
+            nonlocal next_input
+            while next_input < len(input_paths) and remaining[next_input] == 0:
+                invoices: List[Invoice] = []
+                for seq in seqs_by_input[next_input]:
+                    invoices.extend(results.pop(seq))
+                yield str(input_paths[next_input]), invoices
+                next_input += 1
+
+        if progress_callback:
+            progress_callback(0, total_units)
+
+        supervised = self.file_timeout is not None or self.cpu_timeout is not None
+        if not supervised and (self.max_workers <= 1 or total_units < self.MIN_PARALLEL_UNITS):
+            # Small run: parse inline in user order
+            for item in self.pack(units):
+                for seq, invoices, error in parse_work_item(item):
+                    if error is not None and failures is not None:
+                        failures.append(FileFailure(units[seq].path, units[seq].member, error))
+                    results[seq] = invoices
+                    remaining[units[seq].input_index] -= 1
+                done += len(item.units)
+                if progress_callback:
+                    progress_callback(done, total_units)
+                yield from ready_inputs()
+            yield from ready_inputs()
+            return
+
+        # Largest tasks first; idle workers pull the next one from the shared queue
+        items = sorted(self.pack(units), key=lambda item: item.size, reverse=True)
+
+        pool = SupervisedWorkerPool(min(self.max_workers, len(items)), self.file_timeout, self.cpu_timeout)
+        tasks = {pool.submit(iter_encoded_work_item, item): item for item in items}
+
+        try:
+            for event in pool.events():
+                item = tasks[event.task_id]
+                if event.kind == EVENT_RESULT:
+                    seq, payload, error = event.value
+                    if error is not None and failures is not None:
+                        failures.append(FileFailure(units[seq].path, units[seq].member, error))
+                    results[seq] = decode_invoices(payload)
+                    remaining[units[seq].input_index] -= 1
+                    done += 1
+                    yield from ready_inputs()
+                    continue
+
+                if event.kind == EVENT_FAILED and event.completed < len(item.units):
+                    # Skip the unit that was being parsed; the rest of the chunk
+                    # goes back to the queue for a fresh worker
+                    unit = item.units[event.completed]
+                    print(f"Skipping XML {unit.member or unit.path}: {event.value}")
+                    if failures is not None:
+                        failures.append(FileFailure(unit.path, unit.member, event.value))
+                    results[unit.seq] = []
+                    remaining[unit.input_index] -= 1
+                    done += 1
+
+                    rest = item.units[event.completed + 1:]
+                    if rest:
+                        tasks[pool.submit(iter_encoded_work_item, WorkItem(rest))] = WorkItem(rest)
+
+                if progress_callback:
+                    progress_callback(done, total_units)
+                yield from ready_inputs()
+        finally:
+            pool.shutdown()
+
+        yield from ready_inputs()
+
+    def parse_csv_files(
+        self,
+        csv_paths: List[str],
+        iva_percentage: Optional[str],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        failures: Optional[List[FileFailure]] = None,
+        warnings: Optional[List[str]] = None
+    ) -> Iterator[Tuple[str, List[Invoice]]]:
+        """
+        Parse JCR CSV/TXT files concurrently, yielding (path, invoices) in user order
+
+        Every file is its own task, so the per-file limits apply to whole
+        files, except files of CSV_CHUNK_MIN_BYTES or more: those are split at
+        line breaks into chunks parsed by several workers and merged back by
+        invoice number. A file that cannot be parsed, hangs or crashes a
+        worker is yielded without invoices and added to failures.
+
+        Args:
+            csv_paths: CSV/TXT file paths in user order
+            iva_percentage: Default IVA for rows without one
+            progress_callback: Optional callback (files_done, total_files)
+            failures: Optional list that receives the files that were skipped
+            warnings: Optional list that receives the parsers' warnings about
+                doubtful values (numbers off format, dates not understood)
+        """
+        total_files = len(csv_paths)
+        results: Dict[int, List[Invoice]] = {}
+        done = 0
+        next_index = 0
+
+        def ready_files():
+            nonlocal next_index
+            while next_index in results:
+                yield str(csv_paths[next_index]), results.pop(next_index)
+                next_index += 1
+
+        def finish(index: int, invoices: List[Invoice], error: Optional[str], file_warnings: List[str]) -> None:
+            nonlocal done
+            if error is not None and failures is not None:
+                failures.append(FileFailure(str(csv_paths[index]), None, error))
+            if warnings is not None:
+                warnings.extend(file_warnings)
+            results[index] = invoices
+            done += 1
+            if progress_callback:
+                progress_callback(done, total_files)
+
+        if progress_callback:
+            progress_callback(0, total_files)
+
+        # Very large files are split into chunks that parse in parallel
+        plans = {}
+        units: List[Tuple[int, int, Optional[int]]] = []  # (bytes, file index, chunk index or None)
+        for index, path in enumerate(csv_paths):
+            plan = self._plan_csv_chunks(str(path), iva_percentage)
+            if plan:
+                plans[index] = plan
+                units.extend((end - start, index, chunk) for chunk, (start, end) in enumerate(plan.ranges))
+            else:
+                units.append((self._file_size(path), index, None))
+
+        supervised = self.file_timeout is not None or self.cpu_timeout is not None
+        if not supervised and (self.max_workers <= 1 or len(units) < 2):
+            # Nothing to overlap: parse inline in user order
+            for index, path in enumerate(csv_paths):
+                for invoices, error, file_warnings in iter_csv_file((str(path), iva_percentage)):
+                    finish(index, invoices, error, file_warnings)
+                yield from ready_files()
+            return
+
+        # Largest first, like work items; results are still merged in user order
+        units.sort(key=lambda unit: unit[0], reverse=True)
+
+        pool = SupervisedWorkerPool(min(self.max_workers, len(units)), self.file_timeout, self.cpu_timeout)
+        tasks = {}
+        for _, index, chunk in units:
+            path = str(csv_paths[index])
+            if chunk is None:
+                tasks[pool.submit(iter_encoded_csv_file, (path, iva_percentage))] = (index, None)
+            else:
+                tasks[pool.submit(iter_encoded_csv_chunk, (path, iva_percentage, plans[index], chunk))] = (index, chunk)
+
+        # Chunk results of each split file, until its last chunk arrives
+        parts: Dict[int, list] = {index: [None] * len(plan.ranges) for index, plan in plans.items()}
+
+        def fail(index: int, reason: str) -> None:
+            print(f"Skipping {csv_paths[index]}: {reason}")
+            parts.pop(index, None)
+            finish(index, [], reason, [])
+
+        try:
+            for event in pool.events():
+                index, chunk = tasks[event.task_id]
+                if chunk is not None and index not in parts:
+                    continue  # Another chunk of the file already failed
+                if event.kind == EVENT_RESULT and chunk is None:
+                    payload, error, file_warnings = event.value
+                    finish(index, decode_invoices(payload), error, file_warnings)
+                elif event.kind == EVENT_RESULT:
+                    payload, error, stats = event.value
+                    if error is not None:
+                        fail(index, error)
+                    else:
+                        parts[index][chunk] = (decode_invoices(payload), stats)
+                        if all(part is not None for part in parts[index]):
+                            invoices, file_warnings = self._merge_csv_chunks(
+                                str(csv_paths[index]), iva_percentage, plans[index], parts.pop(index)
+                            )
+                            finish(index, invoices, None, file_warnings)
+                elif event.kind == EVENT_FAILED and event.completed == 0:
+                    fail(index, event.value)
+                yield from ready_files()
+        finally:
+            pool.shutdown()
+
+        yield from ready_files()
+
+    def _plan_csv_chunks(self, path: str, iva_percentage: Optional[str]):
+        """Chunk plan of a file large enough to be split (None: parsed as a whole)"""
+        if self.max_workers <= 1 or self._file_size(path) < self.CSV_CHUNK_MIN_BYTES:
+            return None
+        from ..parsers.jcr_csv_parser import JCRCsvParser
+        plan = JCRCsvParser(path, iva_percentage=iva_percentage).plan_chunks(self.CSV_CHUNK_BYTES)
+        if plan is None or len(plan.ranges) < 2:
+            return None
+        return plan
+
+    @staticmethod
+    def _merge_csv_chunks(path: str, iva_percentage: Optional[str], plan, parts: list) -> Tuple[List[Invoice], List[str]]:
+        from ..parsers.jcr_csv_parser import JCRCsvParser
+        parser = JCRCsvParser(path, iva_percentage=iva_percentage)
+        invoices = parser.merge_chunks(plan, parts)
+        return invoices, parser.warnings
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return Path(path).stat().st_size
+        except OSError:
+            return 0
@@ -0,0 +1,6 @@
+"""
+Temporary storage for large processing runs
+"""
+from .invoice_buffer import SpillingInvoiceBuffer
+
+__all__ = ['SpillingInvoiceBuffer']
@@ -0,0 +1,229 @@
+"""
+Spilling Invoice Buffer - Keeps parsed invoices in memory up to a budget and
+moves the overflow to a temporary SQLite file as compressed batches
+"""
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import zlib
+from typing import Iterable, Iterator, List, Optional
+
+from ...domain.entities.invoice import Invoice
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, None when it cannot be read"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if sys.platform == 'win32':
+        return _windows_peak_working_set()
+    return None
+
+
+def _windows_peak_working_set() -> Optional[int]:
+    """PeakWorkingSetSize from GetProcessMemoryInfo (the Windows peak RSS)"""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    try:
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        # K32GetProcessMemoryInfo is psapi's GetProcessMemoryInfo exported by kernel32 (Windows 7+)
+        if not kernel32.K32GetProcessMemoryInfo(
+            kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        ):
+            return None
+        return counters.PeakWorkingSetSize
+    except Exception as e:
+        print(f"Could not read peak working set: {str(e)}")
+        return None
+
+
+class SpillingInvoiceBuffer:
+    """
+    List-like container for the invoices of a single run.
+
+    Invoices are kept in RAM until their estimated size exceeds the memory
+    budget; then the pending invoices are pickled, zlib-compressed and written
+    to a temporary SQLite database in batches. Iterating the buffer streams the
+    spilled batches back in insertion order followed by the in-memory tail, so
+    exporters can consume it exactly like a list.
+    """
+
+    DEFAULT_MEMORY_BUDGET_MB = 256
+
+    # Approximate in-memory footprint of the entities (dataclass, strings, Decimals)
+    INVOICE_SIZE_ESTIMATE = 1500
+    PRODUCT_SIZE_ESTIMATE = 900
+
+    # Invoices per serialized batch
+    BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+        spill_dir: Optional[str] = None
+    ):
+        """
+        Initialize buffer
+
+        Args:
+            memory_budget_mb: Estimated megabytes of invoices kept in RAM before spilling
+            spill_dir: Directory for the temporary SQLite file (system temp if None)
+        """
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.spill_dir = spill_dir
+
+        self._pending: List[Invoice] = []
+        self._pending_bytes = 0
+        self._count = 0
+
+        self._db_path: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+        # Statistics
+        self.spill_count = 0
+        self.spilled_invoices = 0
+        self.spilled_bytes = 0
+        self.peak_rss_bytes: Optional[int] = None
+
+    def append(self, invoice: Invoice) -> None:
+        """Add an invoice, spilling to disk when the memory budget is exceeded"""
+        self._pending.append(invoice)
+        self._pending_bytes += self._estimate_size(invoice)
+        self._count += 1
+
+        if self._pending_bytes > self.memory_budget_bytes:
+            self._spill()
+
+    def extend(self, invoices: Iterable[Invoice]) -> None:
+        """Add several invoices"""
+        for invoice in invoices:
+            self.append(invoice)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Invoice]:
+        if self._conn is not None:
+            cursor = self._conn.execute('SELECT payload FROM batches ORDER BY id')
+            for (payload,) in cursor:
+                yield from pickle.loads(zlib.decompress(payload))
+        yield from self._pending
+
+    def stats(self) -> dict:
+        """Get buffer statistics (invoices, spills, bytes written, peak RSS)"""
+        self._sample_rss()
+        return {
+            'invoices': self._count,
+            'in_memory_invoices': len(self._pending),
+            'spill_count': self.spill_count,
+            'spilled_invoices': self.spilled_invoices,
+            'spilled_bytes': self.spilled_bytes,
+            'peak_rss_bytes': self.peak_rss_bytes
+        }
+
+    def summary(self) -> str:
+        """Human readable summary for the run message (empty if nothing spilled)"""
+        stats = self.stats()
+        if not stats['spill_count']:
+            return ""
+
+        text = (
+            f"Memoria: {stats['spilled_invoices']} facturas volcadas a disco en "
+            f"{stats['spill_count']} lotes ({stats['spilled_bytes'] / (1024 * 1024):.1f} MB)"
+        )
+        if stats['peak_rss_bytes']:
+            text += f", pico RSS {stats['peak_rss_bytes'] / (1024 * 1024):.0f} MB"
+        return text
+
+    def close(self) -> None:
+        """Release in-memory invoices and delete the temporary spill file"""
+        self._pending = []
+        self._pending_bytes = 0
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+        if self._db_path:
+            try:
+                os.remove(self._db_path)
+            except OSError:
+                pass
+            self._db_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Helpers ---
+    def _estimate_size(self, invoice: Invoice) -> int:
+        return self.INVOICE_SIZE_ESTIMATE + self.PRODUCT_SIZE_ESTIMATE * len(invoice.products)
+
+    def _ensure_store(self) -> sqlite3.Connection:
+        if self._conn is None:
+            fd, self._db_path = tempfile.mkstemp(
+                prefix='cali_sae_spill_', suffix='.db', dir=self.spill_dir
+            )
+            os.close(fd)
+            self._conn = sqlite3.connect(self._db_path)
+            self._conn.execute('PRAGMA journal_mode=OFF')
+            self._conn.execute('PRAGMA synchronous=OFF')
+            self._conn.execute(
+                'CREATE TABLE batches (id INTEGER PRIMARY KEY AUTOINCREMENT, payload BLOB NOT NULL)'
+            )
+        return self._conn
+
+    def _spill(self) -> None:
+        """Write all pending invoices to the spill store"""
+        if not self._pending:
+            return
+
+        self._sample_rss()
+        conn = self._ensure_store()
+
+        for start in range(0, len(self._pending), self.BATCH_SIZE):
+            batch = self._pending[start:start + self.BATCH_SIZE]
+            payload = zlib.compress(pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL), 1)
+            conn.execute('INSERT INTO batches (payload) VALUES (?)', (payload,))
+            self.spilled_bytes += len(payload)
+            self.spill_count += 1
+
+        conn.commit()
+        self.spilled_invoices += len(self._pending)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def _sample_rss(self) -> None:
+        """Record peak resident set size (peak working set on Windows)"""
+        peak = _peak_rss_bytes()
+        if peak:
+            self.peak_rss_bytes = max(self.peak_rss_bytes or 0, peak)
@@ -0,0 +1,9 @@
+"""
+Local HTTP API for integration with other systems
+"""
+from .processing_service import ProcessingService, ServiceBusyError, Job
+from .http_server import create_server
+from .spool_worker import SpoolWorker
+from .backfill_runner import BackfillRunner
+
+__all__ = ['ProcessingService', 'ServiceBusyError', 'Job', 'create_server', 'SpoolWorker', 'BackfillRunner']
@@ -0,0 +1,269 @@
+"""
+Backfill Runner - Regenerates historical outputs from a date-partitioned tree
+
+The tree follows the layout written by the exporters:
+    <root>/<company>/<dd-mm-YYYY>/...          input files of that day
+    <root>/<company>/<dd-mm-YYYY>/archivos/    generated outputs
+
+Each company/day folder becomes one task. Tasks run on a bounded pool with
+an optional input throughput limit, and their status is persisted so an
+interrupted backfill resumes with the pending days only.
+"""
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ...infrastructure.processing.backfill_store import (
+    BackfillTask,
+    BackfillTaskStore,
+    STATUS_DONE,
+    STATUS_FAILED,
+)
+from .job_runner import (
+    COMPANY_AGROBUITRON,
+    COMPANY_JCR,
+    COMPANY_PAISANO,
+    find_output_path,
+    normalize_company,
+    run_job,
+)
+
+
+DAY_FORMAT = "%d-%m-%Y"
+OUTPUT_FOLDER = "archivos"
+
+# Input files picked up in each day folder
+INPUT_SUFFIXES = {
+    COMPANY_AGROBUITRON: ('.zip',),
+    COMPANY_JCR: ('.csv', '.txt', '.xlsx', '.xlsm'),
+    COMPANY_PAISANO: ('.xml',),
+}
+
+
+class IOThrottle:
+    """Limits the input bytes handed to tasks per second, across all workers"""
+
+    def __init__(self, bytes_per_second: float = 0):
+        self.bytes_per_second = bytes_per_second
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    def acquire(self, nbytes: int) -> None:
+        """Block until nbytes fit in the configured throughput"""
+        if not self.bytes_per_second or nbytes <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + nbytes / self.bytes_per_second
+        if start > now:
+            time.sleep(start - now)
+
+
+class BackfillRunner:
+    """Splits a historical tree into per-day tasks and runs them unattended"""
+
+    def __init__(
+        self,
+        store: BackfillTaskStore,
+        use_case_factories: Dict[str, Callable[[], Any]],
+        max_workers: int = 2,
+        io_limit_mb_s: float = 0,
+        username: str = 'BACKFILL'
+    ):
+        """
+        Initialize runner
+
+        Args:
+            store: Persistent task status table
+            use_case_factories: Company -> callable returning a fresh use case for one task
+            max_workers: Days processed at the same time
+            io_limit_mb_s: Maximum input MB per second handed to tasks (0 = unlimited)
+            username: User recorded in the reports
+        """
+        self.store = store
+        self.use_case_factories = use_case_factories
+        self.max_workers = max(1, max_workers)
+        self.throttle = IOThrottle(io_limit_mb_s * 1024 * 1024)
+        self.username = username
+
+    # --- Planning ---
+    def plan(
+        self,
+        root: str,
+        backfill_id: str,
+        companies: Optional[List[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[BackfillTask]:
+        """
+        Register one task per company/day folder under root
+
+        Args:
+            root: Tree with <company>/<dd-mm-YYYY>/ folders
+            backfill_id: Name of the backfill, reusing it resumes pending days
+            companies: Only these companies (default: every supported folder)
+            date_from: First day included
+            date_to: Last day included
+
+        Returns:
+            Tasks in chronological order, including those already done
+        """
+        wanted = {normalize_company(c) for c in companies} if companies else None
+        tasks = []
+
+        for company_dir in sorted(p for p in Path(root).iterdir() if p.is_dir()):
+            company = normalize_company(company_dir.name)
+            if company not in self.use_case_factories or (wanted and company not in wanted):
+                continue
+
+            for day_dir in company_dir.iterdir():
+                day = self._parse_day(day_dir)
+                if day is None:
+                    continue
+                if (date_from and day < date_from) or (date_to and day > date_to):
+                    continue
+
+                inputs = self._day_inputs(company, day_dir)
+                if not inputs:
+                    continue
+
+                tasks.append(self.store.register(BackfillTask(
+                    backfill_id=backfill_id,
+                    company=company,
+                    day=day_dir.name,
+                    folder=str(day_dir.resolve()),
+                    input_count=len(inputs),
+                    input_bytes=sum(p.stat().st_size for p in inputs)
+                )))
+
+        return sorted(tasks, key=lambda t: (datetime.strptime(t.day, DAY_FORMAT), t.company))
+
+    # --- Execution ---
+    def run(
+        self,
+        backfill_id: str,
+        tasks: List[BackfillTask],
+        params: Optional[Dict[str, str]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> str:
+        """
+        Run the pending tasks and return the consolidated summary
+
+        Args:
+            backfill_id: Name of the backfill
+            tasks: Tasks returned by plan(); done tasks are skipped
+            params: Use case parameters (municipality, iva_percentage for JCR)
+            progress_callback: Optional callback (tasks finished, total tasks)
+        """
+        params = dict(params or {})
+        # Regenerating after rule changes must never be served from the run cache
+        params['force'] = True
+
+        pending = [task for task in tasks if task.status != STATUS_DONE]
+        skipped = len(tasks) - len(pending)
+        started = time.monotonic()
+        finished = 0
+
+        print(f"Backfill {backfill_id}: {len(pending)} días por procesar, {skipped} ya completados")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='backfill') as executor:
+            futures = [executor.submit(self._run_task, task, params) for task in pending]
+            for future in as_completed(futures):
+                task = future.result()
+                finished += 1
+                print(
+                    f"[{finished}/{len(pending)}] {task.company} {task.day}: "
+                    f"{'OK' if task.status == STATUS_DONE else 'ERROR'} ({task.records} registros)"
+                )
+                if progress_callback:
+                    progress_callback(finished, len(pending))
+
+        return self.summary(backfill_id, time.monotonic() - started)
+
+    def _run_task(self, task: BackfillTask, params: Dict[str, str]) -> BackfillTask:
+        try:
+            self.throttle.acquire(task.input_bytes)
+            self.store.mark_running(task)
+
+            day_dir = Path(task.folder)
+            inputs = [str(p) for p in self._day_inputs(task.company, day_dir)]
+            use_case = self.use_case_factories[task.company]()
+            success, message, records = run_job(
+                use_case, task.company, inputs, params, self.username
+            )
+
+            output_path = None
+            if success:
+                output_path = self._move_output(find_output_path(message), day_dir)
+            self.store.mark_finished(task, success, message, records if success else 0, output_path)
+        except Exception as exc:
+            self.store.mark_finished(task, False, f"Error inesperado: {exc}")
+        return task
+
+    def _move_output(self, output_file: Optional[str], day_dir: Path) -> Optional[str]:
+        """Move the generated file next to the day it belongs to"""
+        if not output_file:
+            return None
+        target_dir = day_dir / OUTPUT_FOLDER
+        target_dir.mkdir(parents=True, exist_ok=True)
+        target = target_dir / Path(output_file).name
+        if Path(output_file).resolve() != target.resolve():
+            shutil.move(output_file, target)
+        return str(target)
+
+    # --- Summary ---
+    def summary(self, backfill_id: str, elapsed_seconds: Optional[float] = None) -> str:
+        """Consolidated summary of every task of a backfill"""
+        tasks = self.store.get_by_backfill(backfill_id)
+        done = [t for t in tasks if t.status == STATUS_DONE]
+        failed = [t for t in tasks if t.status == STATUS_FAILED]
+        pending = len(tasks) - len(done) - len(failed)
+        total_mb = sum(t.input_bytes for t in done) / (1024 * 1024)
+
+        lines = [
+            f"Backfill {backfill_id}: {len(tasks)} días, {len(done)} completados, "
+            f"{len(failed)} con error, {pending} pendientes"
+        ]
+        for company in sorted({t.company for t in tasks}):
+            company_done = [t for t in done if t.company == company]
+            lines.append(
+                f"  {company}: {len(company_done)} días, "
+                f"{sum(t.records for t in company_done)} registros, "
+                f"{sum(t.input_count for t in company_done)} archivos"
+            )
+        if elapsed_seconds:
+            minutes = elapsed_seconds / 60
+            lines.append(
+                f"Tiempo: {minutes:.1f} min, {total_mb:.1f} MB procesados "
+                f"({total_mb / minutes if minutes else 0:.1f} MB/min)"
+            )
+        if failed:
+            lines.append("Días con error:")
+            for task in failed:
+                first_line = task.message.split('\n')[0]
+                lines.append(f"  {task.company} {task.day}: {first_line}")
+        return "\n".join(lines)
+
+    # --- Helpers ---
+    @staticmethod
+    def _parse_day(path: Path) -> Optional[datetime]:
+        if not path.is_dir():
+            return None
+        try:
+            return datetime.strptime(path.name, DAY_FORMAT)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _day_inputs(company: str, day_dir: Path) -> List[Path]:
+        """Input files of a day folder, outputs under archivos/ excluded"""
+        suffixes = INPUT_SUFFIXES.get(company, ())
+        output_dir = day_dir / OUTPUT_FOLDER
+        return sorted(
+            p for p in day_dir.rglob('*')
+            if p.is_file() and p.suffix.lower() in suffixes and output_dir not in p.parents
+        )
@@ -0,0 +1,171 @@
+"""
+HTTP Server - Local REST interface over the processing service
+
+Endpoints:
+    POST /jobs                     JSON {"company", "paths", "municipality", "iva_percentage", "username"}
+    POST /jobs/upload?company=...&filename=...[&municipality=...&iva_percentage=...]
+                                   Raw file body (ZIP, CSV/TXT or XML) processed as a new job
+    GET  /jobs                     List of jobs
+    GET  /jobs/<id>                Job status
+    GET  /jobs/<id>/events         Status stream, one JSON line per change until the job ends
+    GET  /jobs/<id>/output         Generated Reggis XLSX / CSV file
+"""
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from .processing_service import ProcessingService, ServiceBusyError
+
+
+CONTENT_TYPES = {
+    '.csv': 'text/csv; charset=utf-8',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class ProcessingRequestHandler(BaseHTTPRequestHandler):
+    """Request handler; the service is reached through self.server.service"""
+
+    server_version = 'CaliSAE/1.0'
+
+    @property
+    def service(self) -> ProcessingService:
+        return self.server.service
+
+    # --- Routing ---
+    def do_POST(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+
+        try:
+            if parts == ['jobs']:
+                body = self._read_json()
+                job = self.service.submit(
+                    company=body.get('company', ''),
+                    paths=body.get('paths') or [],
+                    params={
+                        'municipality': body.get('municipality', ''),
+                        'iva_percentage': str(body.get('iva_percentage', '0')),
+                        'force': bool(body.get('force', False)),
+                    },
+                    username=body.get('username', 'API')
+                )
+                return self._send_json(202, job.to_dict())
+
+            if parts == ['jobs', 'upload']:
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                content = self._read_body()
+                if not content:
+                    return self._send_error(400, "Archivo vacío")
+                job = self.service.submit_upload(
+                    company=query.get('company', ''),
+                    filename=query.get('filename', 'upload'),
+                    content=content,
+                    params={
+                        'municipality': query.get('municipality', ''),
+                        'iva_percentage': query.get('iva_percentage', '0'),
+                        'force': query.get('force', '').lower() in ('1', 'true'),
+                    },
+                    username=query.get('username', 'API')
+                )
+                return self._send_json(202, job.to_dict())
+        except ServiceBusyError as exc:
+            return self._send_error(503, str(exc))
+        except ValueError as exc:
+            return self._send_error(400, str(exc))
+
+        self._send_error(404, "Ruta no encontrada")
+
+    def do_GET(self):
+        parts = [p for p in urlparse(self.path).path.split('/') if p]
+
+        if parts == ['jobs']:
+            return self._send_json(200, [job.to_dict() for job in self.service.list_jobs()])
+
+        if len(parts) >= 2 and parts[0] == 'jobs':
+            job = self.service.get(parts[1])
+            if job is None:
+                return self._send_error(404, "Trabajo no encontrado")
+            if len(parts) == 2:
+                return self._send_json(200, job.to_dict())
+            if parts[2:] == ['events']:
+                return self._stream_events(job)
+            if parts[2:] == ['output']:
+                return self._send_output(job)
+
+        self._send_error(404, "Ruta no encontrada")
+
+    # --- Responses ---
+    def _stream_events(self, job):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        version = -1
+        while True:
+            status = self.service.wait_for_change(job, version)
+            if status['version'] != version:
+                version = status['version']
+                self.wfile.write((json.dumps(status) + '\n').encode('utf-8'))
+                self.wfile.flush()
+            if job.is_finished() and version == job.version:
+                break
+
+    def _send_output(self, job):
+        if not job.is_finished():
+            return self._send_error(409, "El trabajo aún no ha terminado")
+        if not job.output_path or not Path(job.output_path).is_file():
+            return self._send_error(404, "El trabajo no generó archivo de salida")
+
+        path = Path(job.output_path)
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES.get(path.suffix.lower(), 'application/octet-stream'))
+        self.send_header('Content-Length', str(path.stat().st_size))
+        self.send_header('Content-Disposition', f'attachment; filename="{path.name}"')
+        self.end_headers()
+        with path.open('rb') as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+
+    def _send_json(self, status: int, payload) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {'error': message})
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length > 0 else b''
+
+    def _read_json(self) -> dict:
+        body = self._read_body()
+        if not body:
+            return {}
+        try:
+            data = json.loads(body.decode('utf-8'))
+        except ValueError:
+            raise ValueError("JSON inválido")
+        if not isinstance(data, dict):
+            raise ValueError("Se esperaba un objeto JSON")
+        return data
+
+    def log_message(self, format, *args):
+        print(f"[API] {self.address_string()} - {format % args}")
+
+
+def create_server(service: ProcessingService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """Create the threaded HTTP server bound to host:port (port 0 picks a free one)"""
+    server = ThreadingHTTPServer((host, port), ProcessingRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
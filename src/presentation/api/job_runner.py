@@ -0,0 +1,100 @@
+"""
+Job Runner - Executes a processing job through the matching use case
+
+Shared by the HTTP service and the spool workers so both call the existing
+use cases exactly like the UI tabs do.
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+COMPANY_AGROBUITRON = 'AGROBUITRON'
+COMPANY_JCR = 'JUAN CAMILO ROSAS'
+COMPANY_PAISANO = 'EL PAISANO'
+
+# Accepted spellings of each company in job requests
+COMPANY_ALIASES = {
+    'AGROBUITRON': COMPANY_AGROBUITRON,
+    'JCR': COMPANY_JCR,
+    'JUAN CAMILO ROSAS': COMPANY_JCR,
+    'PAISANO': COMPANY_PAISANO,
+    'EL PAISANO': COMPANY_PAISANO,
+}
+
+
+def normalize_company(company: str) -> Optional[str]:
+    """Return the canonical company name or None if not supported"""
+    return COMPANY_ALIASES.get((company or '').strip().upper())
+
+
+def validate_job(company: str, paths: List[str], params: Dict[str, str]) -> str:
+    """
+    Validate a job request
+
+    Returns:
+        Canonical company name
+
+    Raises:
+        ValueError: Unknown company, missing paths or parameters
+    """
+    company_key = normalize_company(company)
+    if company_key is None:
+        raise ValueError(f"Empresa no soportada: {company}")
+    if not paths:
+        raise ValueError("Debe indicar al menos un archivo o carpeta")
+    if company_key == COMPANY_JCR and not (params or {}).get('municipality'):
+        raise ValueError("Debe indicar el municipio")
+    return company_key
+
+
+def run_job(
+    use_case,
+    company: str,
+    paths: List[str],
+    params: Dict[str, str],
+    username: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> tuple:
+    """
+    Execute the use case of a company
+
+    Args:
+        params: municipality, iva_percentage and force (reprocess an identical run)
+
+    Returns:
+        Tuple of (success, message, records_processed)
+    """
+    force = bool(params.get('force'))
+    if company == COMPANY_AGROBUITRON:
+        return use_case.execute(
+            zip_files=paths,
+            company=COMPANY_AGROBUITRON,
+            username=username,
+            output_format='csv',
+            progress_callback=progress_callback,
+            force=force
+        )
+    if company == COMPANY_JCR:
+        return use_case.execute(
+            csv_files=paths,
+            municipality=params.get('municipality', ''),
+            iva_percentage=params.get('iva_percentage', '0') or '0',
+            username=username,
+            progress_callback=progress_callback,
+            force=force
+        )
+    return use_case.execute(
+        input_paths=paths,
+        username=username,
+        progress_callback=progress_callback,
+        force=force
+    )
+
+
+def find_output_path(message: str) -> Optional[str]:
+    """Extract the generated file path from a use case result message"""
+    for line in message.split('\n'):
+        line = line.strip()
+        if line and Path(line).is_file():
+            return str(Path(line).resolve())
+    return None
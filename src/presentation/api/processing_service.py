@@ -0,0 +1,262 @@
+"""
+Processing Service - Queues invoice processing jobs on a bounded worker pool
+
+Used by the local HTTP API so other systems (e.g. the ERP) can submit
+Agrobuitron, Juan Camilo Rosas and El Paisano batches without the PyQt UI.
+"""
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .job_runner import (
+    COMPANY_AGROBUITRON,
+    COMPANY_JCR,
+    COMPANY_PAISANO,
+    find_output_path,
+    run_job,
+    validate_job,
+)
+
+
+class ServiceBusyError(Exception):
+    """Raised when the job queue is full"""
+
+
+@dataclass
+class Job:
+    """Processing job submitted through the API"""
+
+    id: str
+    company: str
+    paths: List[str]
+    params: Dict[str, str]
+    username: str
+    status: str = 'queued'  # queued, running, done, failed
+    message: str = ''
+    records: int = 0
+    output_path: Optional[str] = None
+    progress_current: int = 0
+    progress_total: int = 0
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    version: int = 0  # Incremented on every change, used by status streams
+    upload_folder: Optional[str] = None  # Uploaded inputs, deleted when the job finishes
+
+    def is_finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'company': self.company,
+            'status': self.status,
+            'message': self.message,
+            'records': self.records,
+            'has_output': bool(self.output_path),
+            'progress': {'current': self.progress_current, 'total': self.progress_total},
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ProcessingService:
+    """Runs processing jobs on a bounded pool so no client blocks the others"""
+
+    def __init__(
+        self,
+        use_case_factories: Dict[str, Callable[[], Any]],
+        max_workers: int = 2,
+        max_queued_jobs: int = 20,
+        upload_dir: str = 'data/api/uploads',
+        finished_job_retention_seconds: float = 3600
+    ):
+        """
+        Initialize service
+
+        Args:
+            use_case_factories: Company -> callable returning a fresh use case for one job
+            max_workers: Jobs executed at the same time
+            max_queued_jobs: Jobs waiting for a worker before new ones are rejected
+            upload_dir: Folder where uploaded input files are stored
+            finished_job_retention_seconds: How long finished jobs can still be queried
+        """
+        self.use_case_factories = use_case_factories
+        self.max_workers = max_workers
+        self.max_queued_jobs = max_queued_jobs
+        self.upload_dir = Path(upload_dir)
+        self.finished_job_retention = timedelta(seconds=finished_job_retention_seconds)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    # --- Submission ---
+    def submit(
+        self,
+        company: str,
+        paths: List[str],
+        params: Optional[Dict[str, str]] = None,
+        username: str = 'API'
+    ) -> Job:
+        """
+        Queue a job for existing server-side paths
+
+        Raises:
+            ValueError: Unknown company, missing paths or parameters
+            ServiceBusyError: Too many jobs waiting
+        """
+        params = dict(params or {})
+        company_key = self._validate(company, paths, params)
+        return self._enqueue(company_key, [str(p) for p in paths], params, username)
+
+    def submit_upload(
+        self,
+        company: str,
+        filename: str,
+        content: bytes,
+        params: Optional[Dict[str, str]] = None,
+        username: str = 'API'
+    ) -> Job:
+        """
+        Queue a job for an uploaded input file
+
+        The request is validated before the file is stored, and the file is
+        deleted once the job finishes.
+
+        Raises:
+            ValueError: Unknown company, missing parameters
+            ServiceBusyError: Too many jobs waiting
+        """
+        params = dict(params or {})
+        company_key = self._validate(company, [filename or 'upload'], params)
+        with self._lock:
+            self._check_queue()
+
+        folder, path = self._save_upload(filename, content)
+        try:
+            return self._enqueue(company_key, [path], params, username, upload_folder=folder)
+        except Exception:
+            # Queue filled up meanwhile
+            shutil.rmtree(folder, ignore_errors=True)
+            raise
+
+    # --- Queries ---
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._prune_finished()
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            self._prune_finished()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def wait_for_change(self, job: Job, last_version: int, timeout: float = 15.0) -> dict:
+        """Block until the job changes (or timeout) and return its status"""
+        with self._changed:
+            self._changed.wait_for(lambda: job.version != last_version, timeout=timeout)
+            return dict(job.to_dict(), version=job.version)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    # --- Helpers ---
+    def _validate(self, company: str, paths: List[str], params: Dict[str, str]) -> str:
+        """Canonical company name of a valid request served by this service"""
+        company_key = validate_job(company, paths, params)
+        if company_key not in self.use_case_factories:
+            raise ValueError(f"Empresa no soportada: {company}")
+        return company_key
+
+    def _check_queue(self) -> None:
+        """Raise ServiceBusyError when no more jobs can wait (call with the lock held)"""
+        queued = sum(1 for job in self._jobs.values() if job.status == 'queued')
+        if queued >= self.max_queued_jobs:
+            raise ServiceBusyError("Cola de trabajos llena, intente más tarde")
+
+    def _enqueue(
+        self,
+        company_key: str,
+        paths: List[str],
+        params: Dict[str, str],
+        username: str,
+        upload_folder: Optional[str] = None
+    ) -> Job:
+        with self._lock:
+            self._prune_finished()
+            self._check_queue()
+
+            job = Job(
+                id=uuid.uuid4().hex,
+                company=company_key,
+                paths=paths,
+                params=params,
+                username=username or 'API',
+                upload_folder=upload_folder
+            )
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job)
+        return job
+
+    def _save_upload(self, filename: str, content: bytes) -> tuple:
+        """Store an uploaded input file in its own folder and return (folder, file path)"""
+        safe_name = Path(filename or 'upload').name
+        folder = self.upload_dir / uuid.uuid4().hex
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / safe_name
+        path.write_bytes(content)
+        return str(folder), str(path.resolve())
+
+    def _prune_finished(self) -> None:
+        """Forget jobs finished longer than the retention ago (call with the lock held)"""
+        oldest = datetime.now() - self.finished_job_retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_finished() and job.finished_at and job.finished_at < oldest
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    # --- Execution ---
+    def _update(self, job: Job, **changes) -> None:
+        with self._changed:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._changed.notify_all()
+
+    def _run(self, job: Job) -> None:
+        self._update(job, status='running', started_at=datetime.now())
+
+        def on_progress(current: int, total: int):
+            self._update(job, progress_current=current, progress_total=total)
+
+        try:
+            use_case = self.use_case_factories[job.company]()
+            success, message, records = run_job(
+                use_case, job.company, job.paths, job.params, job.username, on_progress
+            )
+        except Exception as exc:
+            success, message, records = False, f"Error inesperado: {exc}", 0
+
+        # Uploaded inputs are only needed by the run itself
+        if job.upload_folder:
+            shutil.rmtree(job.upload_folder, ignore_errors=True)
+
+        self._update(
+            job,
+            status='done' if success else 'failed',
+            message=message,
+            records=records,
+            output_path=find_output_path(message) if success else None,
+            finished_at=datetime.now()
+        )
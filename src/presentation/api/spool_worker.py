@@ -0,0 +1,101 @@
+"""
+Spool Worker - Claims jobs from a shared JobSpool and runs them
+
+Start as many workers as needed, on one machine or on several machines
+sharing the spool folder, to add processing capacity.
+"""
+import os
+import socket
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from .job_runner import find_output_path, run_job
+
+
+class SpoolWorker:
+    """Runs spool jobs through the existing use cases"""
+
+    def __init__(
+        self,
+        spool,
+        use_case_factories: Dict[str, Callable[[], Any]],
+        worker_id: Optional[str] = None,
+        heartbeat_interval: float = 15.0
+    ):
+        """
+        Initialize worker
+
+        Args:
+            spool: JobSpool shared with clients and other workers
+            use_case_factories: Company -> callable returning a fresh use case for one job
+            worker_id: Name stored in the claim (defaults to host-pid-random)
+            heartbeat_interval: Seconds between heartbeats, must be below spool.stale_after
+        """
+        self.spool = spool
+        self.use_case_factories = use_case_factories
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.heartbeat_interval = heartbeat_interval
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self, poll_interval: float = 2.0) -> None:
+        """Process jobs until stop() is called"""
+        print(f"Worker {self.worker_id} esperando trabajos en {self.spool.spool_dir}")
+        while not self._stop.is_set():
+            if not self.run_once():
+                self._stop.wait(poll_interval)
+
+    def run_once(self) -> bool:
+        """
+        Claim and run one job
+
+        Returns:
+            True if a job was processed, False if the queue was empty
+        """
+        job = self.spool.claim(self.worker_id)
+        if job is None:
+            return False
+
+        print(f"Worker {self.worker_id}: procesando trabajo {job.id} ({job.company})")
+        lost_claim = threading.Event()
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat_loop, args=(job.id, finished, lost_claim), daemon=True
+        )
+        heartbeat.start()
+
+        try:
+            factory = self.use_case_factories.get(job.company)
+            if factory is None:
+                raise ValueError(f"Empresa no soportada: {job.company}")
+            paths = [str(self.spool.resolve(path)) for path in job.paths]
+            success, message, records = run_job(
+                factory(), job.company, paths, job.params, job.username
+            )
+        except Exception as exc:
+            success, message, records = False, f"Error inesperado: {exc}", 0
+        finally:
+            finished.set()
+            heartbeat.join()
+
+        if lost_claim.is_set():
+            print(f"Worker {self.worker_id}: se perdió el trabajo {job.id}, resultado descartado")
+            return True
+
+        output_file = find_output_path(message) if success else None
+        if not self.spool.complete(job.id, self.worker_id, success, message, records, output_file):
+            print(f"Worker {self.worker_id}: se perdió el trabajo {job.id}, resultado descartado")
+        return True
+
+    def _heartbeat_loop(self, job_id: str, finished: threading.Event, lost_claim: threading.Event) -> None:
+        while not finished.wait(self.heartbeat_interval):
+            try:
+                if not self.spool.heartbeat(job_id, self.worker_id):
+                    lost_claim.set()
+                    return
+            except Exception as exc:
+                # Share temporarily unavailable, keep trying until the claim goes stale
+                print(f"Error enviando heartbeat: {exc}")
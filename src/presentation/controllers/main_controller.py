@@ -35,7 +35,9 @@ class MainController:
         download_update_use_case: DownloadUpdate,
         current_user: User,
         paisano_conversion_repository,
-        update_state=None
+        update_state=None,
+        parse_cache=None,  # SpeculativeParseCache - background parsing of selected inputs
+        preflight_scanner=None  # PreflightScanner - integrity check and estimate of a selection
     ):
         """
 
@@ -60,6 +62,8 @@ class MainController:
         self.current_user = current_user
         self.paisano_conversion_repository = paisano_conversion_repository
         self.update_state = update_state
+        self.parse_cache = parse_cache
+        self.preflight_scanner = preflight_scanner
 
 
     def process_invoices(
@@ -76,7 +80,9 @@ class MainController:
 
         excel_sheet: Optional[str] = None,
 
-        progress_callback: Optional[Callable[[int, int], None]] = None
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+
+        force: bool = False
 
     ) -> Tuple[bool, str, int]:
 
@@ -100,6 +106,8 @@ class MainController:
 
             progress_callback: Optional callback for progress updates
 
+            force: Process again even if an identical run was already exported
+
 
 
         Returns:
@@ -122,7 +130,9 @@ class MainController:
 
             excel_sheet=excel_sheet,
 
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+
+            force=force
 
         )
 
@@ -138,7 +148,9 @@ class MainController:
 
         iva_percentage: str,
 
-        progress_callback: Optional[Callable[[int, int], None]] = None
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+
+        force: bool = False
 
     ) -> Tuple[bool, str, int]:
 
@@ -158,6 +170,8 @@ class MainController:
 
             progress_callback: Optional callback for progress updates
 
+            force: Process again even if an identical run was already exported
+
 
 
         Returns:
@@ -171,13 +185,15 @@ class MainController:
             municipality=municipality,
             iva_percentage=iva_percentage,
             username=self.current_user.username,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            force=force
         )
 
     def process_paisano_invoices(
         self,
         file_paths: List[str],
-        progress_callback: Optional[Callable[[int, int], None]] = None
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        force: bool = False
     ) -> Tuple[bool, str, int]:
         """
         Process El Paisano invoices from XML or PDF (folders or files)
@@ -185,9 +201,45 @@ class MainController:
         return self.process_paisano_invoices_use_case.execute(
             input_paths=file_paths,
             username=self.current_user.username,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            force=force
         )
 
+    def prefetch_zip_files(self, zip_files: List[str]) -> None:
+        """Start parsing newly selected Agrobuitron ZIP files in the background"""
+        if self.parse_cache:
+            self.parse_cache.prefetch('zip', zip_files)
+
+    def prefetch_csv_files(self, csv_files: List[str], iva_percentage: str) -> None:
+        """Start parsing Juan Camilo Rosas CSV/TXT files with the IVA currently entered"""
+        if self.parse_cache:
+            self.parse_cache.prefetch('jcr', csv_files, iva_percentage)
+
+    def prefetch_xml_paths(self, file_paths: List[str]) -> None:
+        """Start parsing newly selected El Paisano XML files or folders in the background"""
+        if self.parse_cache:
+            self.parse_cache.prefetch('xml', file_paths)
+
+    def preflight_inputs(self, company: str, paths: List[str]) -> Optional[str]:
+        """
+        Check the selected inputs and estimate the run
+
+        Returns:
+            Summary for the status line, or None without a pre-flight scanner
+        """
+        if not self.preflight_scanner or not paths:
+            return None
+        try:
+            return self.preflight_scanner.scan(company, paths).summary()
+        except Exception as e:
+            print(f"Error in pre-flight scan: {str(e)}")
+            return None
+
+    def cancel_prefetch(self, paths: List[str]) -> None:
+        """Drop background parses of inputs removed from a selection"""
+        if self.parse_cache:
+            self.parse_cache.cancel(paths)
+
     def add_paisano_conversion(self, name: str, factor: float) -> Tuple[bool, str]:
         """Add or update a conversion factor for El Paisano"""
         try:
@@ -14,6 +14,9 @@ import subprocess
 import platform
 from pathlib import Path
 
+from ....domain.entities.cached_run import REUSED_RUN_NOTICE
+from .preflight_thread import PreflightThread
+
 
 class ProcessingThread(QThread):
     """Thread for processing invoices without blocking UI"""
@@ -21,7 +24,7 @@ class ProcessingThread(QThread):
     progress_update = pyqtSignal(int, int)  # current, total
     finished = pyqtSignal(bool, str, int)  # success, message, records
 
-    def __init__(self, controller, zip_files, company, output_format, excel_file=None, excel_sheet=None):
+    def __init__(self, controller, zip_files, company, output_format, excel_file=None, excel_sheet=None, force=False):
         super().__init__()
         self.controller = controller
         self.zip_files = zip_files
@@ -29,6 +32,7 @@ class ProcessingThread(QThread):
         self.output_format = output_format
         self.excel_file = excel_file
         self.excel_sheet = excel_sheet
+        self.force = force
 
     def run(self):
         """Run processing in background thread"""
@@ -38,7 +42,8 @@ class ProcessingThread(QThread):
             output_format=self.output_format,
             excel_file=self.excel_file,
             excel_sheet=self.excel_sheet,
-            progress_callback=self.progress_update.emit
+            progress_callback=self.progress_update.emit,
+            force=self.force
         )
         self.finished.emit(success, message, records)
 
@@ -52,6 +57,7 @@ class AgrobuitronTab(QWidget):
         self.zip_files: List[str] = []
         self.excel_file: Optional[str] = None
         self.processing_thread: Optional[ProcessingThread] = None
+        self.preflight_threads: List[PreflightThread] = []
         self.card_style = (
             "QFrame { background-color: white; border-radius: 8px; "
             "padding: 15px; border: 1px solid #e0e0e0; }"
@@ -262,18 +268,41 @@ class AgrobuitronTab(QWidget):
                 if file not in self.zip_files:
                     self.zip_files.append(file)
                     self.zip_list.addItem(file)
+            # Parse in the background while the output options are chosen
+            self.main_controller.prefetch_zip_files(files)
+            self._start_preflight()
 
     def remove_zip_file(self):
         """Remove selected ZIP file"""
         current_row = self.zip_list.currentRow()
         if current_row >= 0:
-            self.zip_files.pop(current_row)
+            removed = self.zip_files.pop(current_row)
             self.zip_list.takeItem(current_row)
+            self.main_controller.cancel_prefetch([removed])
+            self._start_preflight()
 
     def clear_zip_files(self):
         """Clear all ZIP files"""
+        self.main_controller.cancel_prefetch(self.zip_files)
         self.zip_files.clear()
         self.zip_list.clear()
+        self._start_preflight()
+
+    def _start_preflight(self):
+        """Check the selection and show its estimate without blocking the UI"""
+        if not self.zip_files:
+            self.status_label.setText("")
+            return
+        self.preflight_threads = [t for t in self.preflight_threads if t.isRunning()]
+        thread = PreflightThread(self.main_controller, "AGROBUITRON", self.zip_files)
+        thread.finished.connect(self._on_preflight_finished)
+        self.preflight_threads.append(thread)
+        thread.start()
+
+    def _on_preflight_finished(self, paths: list, summary: str):
+        # Ignore scans of an older selection and leave the status of a run alone
+        if paths == self.zip_files and self.isEnabled():
+            self.status_label.setText(summary)
 
     def select_excel_file(self):
         """Select Excel file"""
@@ -309,8 +338,8 @@ class AgrobuitronTab(QWidget):
         else:
             self.excel_frame.hide()
 
-    def process_invoices(self):
-        """Process invoice ZIP files"""
+    def process_invoices(self, force: bool = False):
+        """Process invoice ZIP files (force: ignore an identical previous run)"""
         if not self.zip_files:
             QMessageBox.warning(self, "Error", "Por favor seleccione al menos un archivo ZIP")
             return
@@ -333,7 +362,8 @@ class AgrobuitronTab(QWidget):
             "AGROBUITRON",
             output_format,
             self.excel_file if output_format == 'excel' else None,
-            self.sheet_combo.currentText() if output_format == 'excel' else None
+            self.sheet_combo.currentText() if output_format == 'excel' else None,
+            force=force
         )
 
         self.processing_thread.progress_update.connect(self._on_progress_update)
@@ -370,6 +400,11 @@ class AgrobuitronTab(QWidget):
         # Add custom buttons
         msg_box.addButton("OK", QMessageBox.ButtonRole.AcceptRole)
 
+        # Output reused from an identical run, offer to process again
+        reprocess_btn = None
+        if REUSED_RUN_NOTICE in message:
+            reprocess_btn = msg_box.addButton("Reprocesar", QMessageBox.ButtonRole.ActionRole)
+
         if file_path:
             open_folder_btn = msg_box.addButton("Abrir carpeta", QMessageBox.ButtonRole.ActionRole)
             msg_box.exec()
@@ -380,6 +415,9 @@ class AgrobuitronTab(QWidget):
         else:
             msg_box.exec()
 
+        if reprocess_btn and msg_box.clickedButton() == reprocess_btn:
+            self.process_invoices(force=True)
+
     def _extract_file_path_from_message(self, message: str) -> Optional[str]:
         """Extract file path from success message"""
         # Messages typically contain the path after a colon or newline
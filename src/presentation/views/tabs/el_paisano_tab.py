@@ -13,6 +13,9 @@ import subprocess
 import platform
 from pathlib import Path
 
+from ....domain.entities.cached_run import REUSED_RUN_NOTICE
+from .preflight_thread import PreflightThread
+
 
 class PaisanoProcessingThread(QThread):
     """Thread for processing El Paisano invoices without blocking UI"""
@@ -20,15 +23,17 @@ class PaisanoProcessingThread(QThread):
     progress_update = pyqtSignal(int, int)
     finished = pyqtSignal(bool, str, int)
 
-    def __init__(self, controller, file_paths: List[str]):
+    def __init__(self, controller, file_paths: List[str], force: bool = False):
         super().__init__()
         self.controller = controller
         self.file_paths = file_paths
+        self.force = force
 
     def run(self):
         success, message, records = self.controller.process_paisano_invoices(
             file_paths=self.file_paths,
-            progress_callback=self.progress_update.emit
+            progress_callback=self.progress_update.emit,
+            force=self.force
         )
         self.finished.emit(success, message, records)
 
@@ -41,6 +46,7 @@ class ElPaisanoTab(QWidget):
         self.main_controller = main_controller
         self.file_paths: List[str] = []
         self.processing_thread: Optional[PaisanoProcessingThread] = None
+        self.preflight_threads: List[PreflightThread] = []
         self.init_ui()
 
     def init_ui(self):
@@ -210,12 +216,35 @@ class ElPaisanoTab(QWidget):
 
         if not added:
             QMessageBox.information(self, "Sin cambios", "No se agregaron nuevas rutas.")
+            return
+
+        # Parse in the background; Process then only converts and exports
+        self.main_controller.prefetch_xml_paths(self.file_paths)
+        self._start_preflight()
 
     def clear_xml_paths(self):
+        self.main_controller.cancel_prefetch(self.file_paths)
         self.file_paths.clear()
         self.xml_list.clear()
+        self._start_preflight()
 
-    def process_invoices(self):
+    def _start_preflight(self):
+        """Check the selection and show its estimate without blocking the UI"""
+        if not self.file_paths:
+            self.status_label.setText("")
+            return
+        self.preflight_threads = [t for t in self.preflight_threads if t.isRunning()]
+        thread = PreflightThread(self.main_controller, "EL PAISANO", self.file_paths)
+        thread.finished.connect(self._on_preflight_finished)
+        self.preflight_threads.append(thread)
+        thread.start()
+
+    def _on_preflight_finished(self, paths: list, summary: str):
+        # Ignore scans of an older selection and leave the status of a run alone
+        if paths == self.file_paths and self.isEnabled():
+            self.status_label.setText(summary)
+
+    def process_invoices(self, force: bool = False):
         if not self.file_paths:
             QMessageBox.warning(self, "Error", "Seleccione al menos una carpeta o archivo XML")
             return
@@ -226,7 +255,8 @@ class ElPaisanoTab(QWidget):
 
         self.processing_thread = PaisanoProcessingThread(
             self.main_controller,
-            self.file_paths
+            self.file_paths,
+            force=force
         )
         self.processing_thread.progress_update.connect(self._on_progress_update)
         self.processing_thread.finished.connect(self._on_processing_finished)
@@ -264,8 +294,16 @@ class ElPaisanoTab(QWidget):
         msg_box.setWindowTitle("Éxito")
         msg_box.setText(message)
         msg_box.addButton("OK", QMessageBox.ButtonRole.AcceptRole)
+
+        # Output reused from an identical run, offer to process again
+        reprocess_btn = None
+        if REUSED_RUN_NOTICE in message:
+            reprocess_btn = msg_box.addButton("Reprocesar", QMessageBox.ButtonRole.ActionRole)
         msg_box.exec()
 
+        if reprocess_btn and msg_box.clickedButton() == reprocess_btn:
+            self.process_invoices(force=True)
+
     def _extract_file_path_from_message(self, message: str) -> Optional[str]:
         """Extract file path from success message"""
         # Messages typically contain the path after a colon or newline
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """
 Juan Camilo Rosas Tab - Invoice processing interface for Juan Camilo Rosas
-Processes CSV/TXT files and converts to Reggis format with unit conversions
+Processes CSV/TXT (or Excel) files and converts to Reggis format with unit conversions
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
@@ -15,6 +15,9 @@ import subprocess
 import platform
 from pathlib import Path
 
+from ....domain.entities.cached_run import REUSED_RUN_NOTICE
+from .preflight_thread import PreflightThread
+
 
 class JCRProcessingThread(QThread):
     """Thread for processing JCR invoices without blocking UI"""
@@ -22,12 +25,13 @@ class JCRProcessingThread(QThread):
     progress_update = pyqtSignal(int, int)  # current, total
     finished = pyqtSignal(bool, str, int)  # success, message, records
 
-    def __init__(self, controller, csv_files, municipality, iva_percentage):
+    def __init__(self, controller, csv_files, municipality, iva_percentage, force=False):
         super().__init__()
         self.controller = controller
         self.csv_files = csv_files
         self.municipality = municipality
         self.iva_percentage = iva_percentage
+        self.force = force
 
     def run(self):
         """Run processing in background thread"""
@@ -35,7 +39,8 @@ class JCRProcessingThread(QThread):
             csv_files=self.csv_files,
             municipality=self.municipality,
             iva_percentage=self.iva_percentage,
-            progress_callback=self.progress_update.emit
+            progress_callback=self.progress_update.emit,
+            force=self.force
         )
         self.finished.emit(success, message, records)
 
@@ -48,6 +53,7 @@ class JuanCamiloRosasTab(QWidget):
         self.main_controller = main_controller
         self.csv_files: List[str] = []
         self.processing_thread: Optional[JCRProcessingThread] = None
+        self.preflight_threads: List[PreflightThread] = []
         self.init_ui()
 
     def init_ui(self):
@@ -143,7 +149,7 @@ class JuanCamiloRosasTab(QWidget):
         layout.setSpacing(10)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        label = QLabel("Archivos CSV/TXT de Facturas:")
+        label = QLabel("Archivos CSV/TXT/Excel de Facturas:")
         label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
         layout.addWidget(label)
 
@@ -207,6 +213,8 @@ class JuanCamiloRosasTab(QWidget):
         self.iva_input = QLineEdit()
         self.iva_input.setPlaceholderText("Ej: 0, 5, 19")
         self.iva_input.setText("0")  # Default value
+        # Rows without IVA take this default while parsing, so parse again when it changes
+        self.iva_input.editingFinished.connect(self._prefetch_csv_files)
         iva_layout.addWidget(iva_label)
         iva_layout.addWidget(self.iva_input)
         layout.addLayout(iva_layout)
@@ -258,12 +266,12 @@ class JuanCamiloRosasTab(QWidget):
         return frame
 
     def add_csv_files(self):
-        """Add CSV/TXT files to the list"""
+        """Add CSV/TXT or Excel files to the list"""
         files, _ = QFileDialog.getOpenFileNames(
             self,
-            "Seleccionar Archivos CSV/TXT",
+            "Seleccionar Archivos CSV/TXT/Excel",
             "",
-            "CSV/TXT Files (*.csv *.txt);;All Files (*.*)"
+            "CSV/TXT/Excel Files (*.csv *.txt *.xlsx *.xlsm);;All Files (*.*)"
         )
 
         if files:
@@ -271,26 +279,57 @@ class JuanCamiloRosasTab(QWidget):
                 if file not in self.csv_files:
                     self.csv_files.append(file)
                     self.csv_list.addItem(file)
+            self._prefetch_csv_files()
+            self._start_preflight()
 
     def remove_csv_file(self):
         """Remove selected CSV file"""
         current_row = self.csv_list.currentRow()
         if current_row >= 0:
-            self.csv_files.pop(current_row)
+            removed = self.csv_files.pop(current_row)
             self.csv_list.takeItem(current_row)
+            self.main_controller.cancel_prefetch([removed])
+            self._start_preflight()
 
     def clear_csv_files(self):
         """Clear all CSV files"""
+        self.main_controller.cancel_prefetch(self.csv_files)
         self.csv_files.clear()
         self.csv_list.clear()
+        self._start_preflight()
+
+    def _prefetch_csv_files(self):
+        """Parse the selected files in the background while the form is filled in"""
+        iva_percentage = self.iva_input.text().strip() or "0"
+        try:
+            float(iva_percentage)
+        except ValueError:
+            return  # Process reports the invalid IVA
+        self.main_controller.prefetch_csv_files(self.csv_files, iva_percentage)
 
-    def process_invoices(self):
-        """Process invoice CSV/TXT files"""
+    def _start_preflight(self):
+        """Check the selection and show its estimate without blocking the UI"""
+        if not self.csv_files:
+            self.status_label.setText("")
+            return
+        self.preflight_threads = [t for t in self.preflight_threads if t.isRunning()]
+        thread = PreflightThread(self.main_controller, "JUAN CAMILO ROSAS", self.csv_files)
+        thread.finished.connect(self._on_preflight_finished)
+        self.preflight_threads.append(thread)
+        thread.start()
+
+    def _on_preflight_finished(self, paths: list, summary: str):
+        # Ignore scans of an older selection and leave the status of a run alone
+        if paths == self.csv_files and self.isEnabled():
+            self.status_label.setText(summary)
+
+    def process_invoices(self, force: bool = False):
+        """Process invoice CSV/TXT files (force: ignore an identical previous run)"""
         if not self.csv_files:
             QMessageBox.warning(
                 self,
                 "Error",
-                "Por favor seleccione al menos un archivo CSV/TXT"
+                "Por favor seleccione al menos un archivo CSV/TXT o Excel"
             )
             return
 
@@ -328,7 +367,8 @@ class JuanCamiloRosasTab(QWidget):
             self.main_controller,
             self.csv_files,
             municipality,
-            iva_percentage
+            iva_percentage,
+            force=force
         )
 
         self.processing_thread.progress_update.connect(self._on_progress_update)
@@ -369,6 +409,11 @@ class JuanCamiloRosasTab(QWidget):
         # Add custom buttons
         msg_box.addButton("OK", QMessageBox.ButtonRole.AcceptRole)
 
+        # Output reused from an identical run, offer to process again
+        reprocess_btn = None
+        if REUSED_RUN_NOTICE in message:
+            reprocess_btn = msg_box.addButton("Reprocesar", QMessageBox.ButtonRole.ActionRole)
+
         if file_path:
             open_folder_btn = msg_box.addButton("Abrir carpeta", QMessageBox.ButtonRole.ActionRole)
             msg_box.exec()
@@ -379,6 +424,9 @@ class JuanCamiloRosasTab(QWidget):
         else:
             msg_box.exec()
 
+        if reprocess_btn and msg_box.clickedButton() == reprocess_btn:
+            self.process_invoices(force=True)
+
     def _extract_file_path_from_message(self, message: str) -> Optional[str]:
         """Extract file path from success message"""
         # Messages typically contain the path after a colon or newline
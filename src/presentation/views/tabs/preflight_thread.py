@@ -0,0 +1,21 @@
+"""
+Pre-flight Thread - Scans a selection without blocking the UI
+"""
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class PreflightThread(QThread):
+    """Thread for the pre-flight scan (integrity check and estimate) of the selected inputs"""
+
+    finished = pyqtSignal(list, str)  # scanned paths, summary
+
+    def __init__(self, controller, company, paths):
+        super().__init__()
+        self.controller = controller
+        self.company = company
+        self.paths = list(paths)
+
+    def run(self):
+        """Run the scan in background thread"""
+        summary = self.controller.preflight_inputs(self.company, self.paths)
+        self.finished.emit(self.paths, summary or "")
@@ -0,0 +1,144 @@
+"""
+Pruebas del control de admisión global (archivos abiertos y memoria)
+"""
+import threading
+import time
+
+import pytest
+
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.infrastructure.processing.admission import AdmissionController, load_app_settings
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+from testing_support import CapturingExporter, MemoryReportRepository, write_jcr_csv
+
+
+def _paths(count):
+    return [f"no_existe_{idx}.csv" for idx in range(count)]
+
+
+def _admit_in_thread(controller, company, paths, order):
+    def run():
+        ticket = controller.admit(company, paths)
+        order.append(company)
+        return ticket
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('ticket', run()))
+    thread.start()
+    return thread, result
+
+
+def _wait_waiting(controller, count):
+    for _ in range(200):
+        if sum(controller.stats()['waiting'].values()) == count:
+            return
+        time.sleep(0.005)
+    raise AssertionError("Los trabajos no quedaron en espera")
+
+
+def test_config_is_read():
+    settings = load_app_settings("config.json")
+    controller = AdmissionController.from_config("config.json")
+    assert controller.max_concurrent_files == settings['max_concurrent_files'] == 50
+    assert controller.memory_budget_mb == settings['memory_budget_mb']
+
+
+def test_file_cap_and_round_robin_fairness():
+    controller = AdmissionController(max_concurrent_files=4, memory_budget_mb=10000)
+    running = controller.admit('AGROBUITRON', _paths(4))
+
+    # Agrobuitron encola tres trabajos antes que las otras empresas;
+    # cada trabajo ocupa todos los archivos y termina apenas es admitido
+    order = []
+
+    def run(company):
+        with controller.admit(company, _paths(4)):
+            order.append(company)
+
+    threads = []
+    for company in ['AGROBUITRON', 'AGROBUITRON', 'AGROBUITRON', 'JUAN CAMILO ROSAS', 'EL PAISANO']:
+        threads.append(threading.Thread(target=run, args=(company,)))
+        threads[-1].start()
+        _wait_waiting(controller, len(threads))
+
+    running.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ['JUAN CAMILO ROSAS', 'EL PAISANO', 'AGROBUITRON', 'AGROBUITRON', 'AGROBUITRON']
+    assert controller.stats() == {'files_in_use': 0, 'memory_in_use_mb': 0, 'waiting': {}}
+
+
+def test_memory_budget_reserves_room_for_large_runs(tmp_path):
+    big = tmp_path / 'grande.csv'
+    big.write_bytes(b'x' * 25 * 1024 * 1024)  # 150 MB estimados + base
+    controller = AdmissionController(max_concurrent_files=50, memory_budget_mb=200)
+
+    first = controller.admit('EL PAISANO', _paths(1))
+    order = []
+    large_thread, large = _admit_in_thread(controller, 'JUAN CAMILO ROSAS', [str(big)], order)
+    _wait_waiting(controller, 1)
+
+    # Un trabajo pequeño de otra empresa no se adelanta al grande en espera
+    small_thread, small = _admit_in_thread(controller, 'AGROBUITRON', _paths(1), order)
+    _wait_waiting(controller, 2)
+
+    first.release()
+    large_thread.join(5)
+    assert order == ['JUAN CAMILO ROSAS']
+    large['ticket'].release()
+    small_thread.join(5)
+    assert order == ['JUAN CAMILO ROSAS', 'AGROBUITRON']
+    small['ticket'].release()
+
+
+def test_oversized_run_is_clamped_and_runs_alone():
+    controller = AdmissionController(max_concurrent_files=10, memory_budget_mb=100)
+    with controller.admit('EL PAISANO', _paths(500)) as ticket:
+        assert ticket.files == 10
+        assert controller.stats()['files_in_use'] == 10
+    assert controller.stats()['files_in_use'] == 0
+
+
+def test_run_is_charged_the_files_it_opens_at_once():
+    controller = AdmissionController(max_concurrent_files=10, memory_budget_mb=10000)
+    with controller.admit('AGROBUITRON', _paths(500), open_files=3) as ticket:
+        assert ticket.files == 3
+        # Otra corrida cabe en los archivos que la primera no abre
+        with controller.admit('EL PAISANO', _paths(40), open_files=7):
+            assert controller.stats()['files_in_use'] == 10
+
+
+def test_use_case_charges_its_parsing_workers(tmp_path):
+    class RecordingController(AdmissionController):
+        def admit(self, company, paths, open_files=None):
+            ticket = super().admit(company, paths, open_files)
+            charged.append(ticket.files)
+            return ticket
+
+    rows = "FV00001;9001;CLIENTE 1;ARROZ;5;UND;10000.00;2024-05-10;2024-06-10;5\n"
+    paths = [write_jcr_csv(tmp_path / f'dia{n}.csv', rows.replace('FV00001', f'FV0000{n}')) for n in range(6)]
+    charged = []
+    for scheduler in (None, InvoiceWorkScheduler(max_workers=2)):
+        use_case = ProcessJCRInvoices(
+            MemoryReportRepository(), None, CapturingExporter(), work_scheduler=scheduler,
+            admission_controller=RecordingController(max_concurrent_files=50)
+        )
+        success, message, _ = use_case.execute(paths, 'Cali', '5', 'tester')
+        assert success, message
+    assert charged == [1, 2]
+
+
+def test_ticket_is_released_when_the_run_cannot_start(tmp_path):
+    controller = AdmissionController(max_concurrent_files=1, memory_budget_mb=10000)
+
+    def broken_buffer():
+        raise OSError("disco lleno")
+
+    path = write_jcr_csv(tmp_path / 'dia.csv', "FV1;9001;CLIENTE 1;ARROZ;5;UND;10000.00;2024-05-10;2024-06-10;5\n")
+    use_case = ProcessJCRInvoices(
+        MemoryReportRepository(), None, CapturingExporter(), invoice_buffer_factory=broken_buffer,
+        admission_controller=controller
+    )
+    with pytest.raises(OSError):
+        use_case.execute([path], 'Cali', '5', 'tester')
+    assert controller.stats()['files_in_use'] == 0
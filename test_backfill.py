@@ -0,0 +1,87 @@
+"""
+Pruebas del reprocesamiento histórico (backfill) por días
+Usa casos de uso simulados sobre un árbol <empresa>/<dd-mm-YYYY>/
+"""
+from pathlib import Path
+
+from src.infrastructure.processing.backfill_store import BackfillTaskStore
+from src.presentation.api.backfill_runner import BackfillRunner, IOThrottle
+from src.presentation.api.job_runner import COMPANY_JCR, COMPANY_PAISANO
+
+
+class FakeUseCase:
+    """Writes the output where the exporters do; fails for files named 'malo'"""
+
+    def __init__(self, company: str):
+        self.company = company
+        self.calls = []
+
+    def execute(self, username, progress_callback=None, force=False, **kwargs):
+        paths = kwargs.get('csv_files') or kwargs.get('input_paths')
+        self.calls.append((paths, force))
+        if any('malo' in Path(p).name for p in paths):
+            return False, "Error procesando archivo malo.csv", 0
+        output_dir = Path('data') / self.company / 'hoy' / 'archivos'
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output = output_dir / f"{Path(paths[0]).parent.name}.xlsx"
+        output.write_text("x", encoding='utf-8')
+        return True, f"Datos exportados exitosamente al formato Reggis:\n{output}", len(paths)
+
+
+def _write(path: Path, content: str = "x"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+
+
+def test_backfill_runs_per_day_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / 'historico'
+    _write(root / COMPANY_JCR / '01-02-2024' / 'a.csv')
+    _write(root / COMPANY_JCR / '01-02-2024' / 'b.txt')
+    _write(root / COMPANY_JCR / '01-02-2024' / 'archivos' / 'viejo.csv')  # salida previa, se ignora
+    _write(root / COMPANY_JCR / '15-01-2024' / 'malo.csv')
+    _write(root / COMPANY_PAISANO / '02-02-2024' / 'xml' / 'f1.xml')
+    _write(root / COMPANY_PAISANO / 'otra-carpeta' / 'f2.xml')  # no es un día
+    _write(root / COMPANY_PAISANO / '03-03-2023' / 'notas.txt')  # sin entradas
+
+    use_cases = {COMPANY_JCR: FakeUseCase(COMPANY_JCR), COMPANY_PAISANO: FakeUseCase(COMPANY_PAISANO)}
+    store = BackfillTaskStore(str(tmp_path / 'backfill.db'))
+    runner = BackfillRunner(store, {c: (lambda uc=uc: uc) for c, uc in use_cases.items()}, max_workers=3)
+
+    tasks = runner.plan(str(root), 'prueba')
+    assert [(t.company, t.day, t.input_count) for t in tasks] == [
+        (COMPANY_JCR, '15-01-2024', 1),
+        (COMPANY_JCR, '01-02-2024', 2),
+        (COMPANY_PAISANO, '02-02-2024', 1),
+    ]
+
+    summary = runner.run('prueba', tasks, {'municipality': 'Cali'})
+    assert "3 días, 2 completados, 1 con error, 0 pendientes" in summary
+    assert "JUAN CAMILO ROSAS 15-01-2024: Error procesando archivo malo.csv" in summary
+    assert all(force for _, force in use_cases[COMPANY_JCR].calls)
+
+    # La salida queda junto al día que le corresponde
+    done = store.get('prueba', COMPANY_JCR, '01-02-2024')
+    assert Path(done.output_path) == root / COMPANY_JCR / '01-02-2024' / 'archivos' / '01-02-2024.xlsx'
+    assert Path(done.output_path).is_file()
+    assert done.records == 2
+
+    # Al reanudar solo se reintentan los días sin completar
+    (root / COMPANY_JCR / '15-01-2024' / 'malo.csv').rename(root / COMPANY_JCR / '15-01-2024' / 'bueno.csv')
+    use_cases[COMPANY_JCR].calls.clear()
+    summary = runner.run('prueba', runner.plan(str(root), 'prueba'), {'municipality': 'Cali'})
+    assert len(use_cases[COMPANY_JCR].calls) == 1
+    assert "3 días, 3 completados, 0 con error" in summary
+    assert store.get('prueba', COMPANY_JCR, '15-01-2024').attempts == 2
+
+
+def test_io_throttle_spaces_out_tasks(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr('src.presentation.api.backfill_runner.time.sleep', sleeps.append)
+    throttle = IOThrottle(bytes_per_second=1000)
+    throttle.acquire(500)
+    throttle.acquire(2000)
+    throttle.acquire(1000)
+    assert len(sleeps) == 2
+    assert 0.4 < sleeps[0] <= 0.5
+    assert 2.4 < sleeps[1] <= 2.5
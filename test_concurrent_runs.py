@@ -0,0 +1,73 @@
+"""
+Pruebas de procesamientos concurrentes que comparten los exportadores
+"""
+from concurrent.futures import ThreadPoolExecutor
+from openpyxl import load_workbook
+
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.domain.use_cases.process_paisano_invoices import ProcessPaisanoInvoices
+from src.infrastructure.exporters.csv_exporter import CSVExporter
+from src.infrastructure.exporters.jcr_reggis_exporter import JCRReggisExporter
+from testing_support import HEADER, MemoryReportRepository, make_invoice
+
+
+ROWS = (
+    "FV00001;9001;CLIENTE 1;ARROZ;5;UND;10000.00;2024-05-10;2024-06-10;5\n"
+    "FV00002;9002;CLIENTE 2;ARROZ;3;UND;6000.00;2024-05-11;2024-06-11;5\n"
+)
+MUNICIPALITY_COLUMN = 15
+RUNS = 24
+
+
+class FakeXMLParser:
+    """Builds one El Paisano invoice per XML path without reading it"""
+
+    def parse_xml_file(self, path):
+        return make_invoice(seller_name='EL PAISANO', municipality='PALMIRA')
+
+
+def _municipalities(output_file):
+    ws = load_workbook(output_file, read_only=True).active
+    return {row[MUNICIPALITY_COLUMN - 1] for row in ws.iter_rows(min_row=2, values_only=True)}
+
+
+def test_concurrent_runs_share_one_reggis_exporter(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ROWS, encoding='utf-8')
+    xml_file = tmp_path / 'factura.xml'
+    xml_file.write_text('<Invoice/>', encoding='utf-8')
+
+    exporter = JCRReggisExporter()
+    jcr = ProcessJCRInvoices(MemoryReportRepository(), None, exporter)
+    paisano = ProcessPaisanoInvoices(MemoryReportRepository(), FakeXMLParser(), exporter)
+
+    def run(index):
+        if index % 3 == 2:
+            success, message, _ = paisano.execute([str(xml_file)], 'tester')
+            expected = 'PALMIRA'
+        else:
+            expected = 'Cali' if index % 3 == 0 else 'Buga'
+            success, message, _ = jcr.execute([str(csv_file)], expected, '5', 'tester')
+        assert success, message
+        return expected, message.split('\n')[1]
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(run, range(RUNS)))
+
+    # Every run kept its own municipality and wrote its own file
+    for expected, output_file in results:
+        assert _municipalities(output_file) == {expected}
+    assert len({output_file for _, output_file in results}) == RUNS
+    assert exporter.municipality == ''
+
+
+def test_concurrent_csv_exports_never_overwrite(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exporter = CSVExporter()
+    invoice = FakeXMLParser().parse_xml_file('factura.xml')
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        outputs = list(executor.map(lambda _: exporter.export_to_csv([invoice], 'AGROBUITRON'), range(RUNS)))
+
+    assert len(set(outputs)) == RUNS
@@ -0,0 +1,66 @@
+"""
+Pruebas de la exportación CSV en streaming
+Verifica el BOM, el separador, el orden de columnas y que acepte cualquier
+iterable de facturas
+"""
+import csv
+from datetime import datetime
+from decimal import Decimal
+
+from src.domain.entities.invoice import Invoice
+from src.domain.entities.product import Product
+from src.infrastructure.exporters.csv_exporter import CSVExporter
+
+
+def _invoice(number, buyer_name, lines):
+    invoice = Invoice(
+        invoice_number=number,
+        issue_date=datetime(2024, 5, 10),
+        due_date=None,
+        currency='USD',
+        seller_nit='800',
+        seller_name='VENDEDOR',
+        seller_municipality='Cali',
+        buyer_nit='9001',
+        buyer_name=buyer_name,
+    )
+    for line in range(lines):
+        invoice.add_product(Product(
+            name=f'SAL;REFINADA {line}',
+            underlying_code=None,
+            unit_of_measure='Kg',
+            quantity=Decimal('2.5'),
+            unit_price=Decimal('1000'),
+            total_price=Decimal('2500'),
+            iva_percentage=Decimal('19'),
+        ))
+    return invoice
+
+
+def test_streams_invoices_from_a_generator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    invoices = [_invoice('F1', 'CLIENTE "UNO"', 2), _invoice('F2', 'SIN LINEAS', 0), _invoice('F3', 'OTRO', 1)]
+
+    path = CSVExporter().export_to_csv((invoice for invoice in invoices), 'AGROBUITRON')
+
+    raw = open(path, 'rb').read()
+    assert raw.startswith(b'\xef\xbb\xbf')
+    lines = raw.decode('utf-8-sig').split('\r\n')
+    assert lines[0] == ';'.join(CSVExporter.ROW_FIELDS)
+    assert lines[1] == (
+        'F1;"SAL;REFINADA 0";;Kg;2,50000;1000,00000;2500,00000;2024-05-10;;9001;"CLIENTE ""UNO""";800;'
+        'VENDEDOR;V;Cali;19,00000%;;S?;S?;;2,50000;2'
+    )
+    rows = list(csv.reader(lines[1:-1], delimiter=';'))
+    assert [row[0] for row in rows] == ['F1', 'F1', 'F3']
+    assert lines[-1] == ''
+
+
+def test_custom_column_order_matches_dict_writer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exporter = CSVExporter()
+    monkeypatch.setattr(exporter, '_get_column_order', lambda company: ['Moneda', 'Extra', 'N? Factura'])
+
+    path = exporter.export_to_csv([_invoice('F1', 'UNO', 1)], 'AGROBUITRON')
+
+    assert open(path, encoding='utf-8-sig', newline='').read() == 'Moneda;Extra;N? Factura\r\n2;;F1\r\n'
@@ -0,0 +1,54 @@
+"""
+Pruebas de la detección del formato de fechas
+"""
+from datetime import datetime
+
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.infrastructure.parsers.date_format import DateParser
+from src.infrastructure.parsers.xml_invoice_parser import XMLInvoiceParser
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+from testing_support import HEADER, CapturingExporter, MemoryReportRepository
+
+
+def test_format_is_detected_from_the_sample():
+    parser = DateParser()
+    assert parser.infer(['05/13/2024', '06/01/2024', '']) == '%m/%d/%Y'
+    # Ambiguous for the priority order alone, not for the file
+    assert parser.parse('06/01/2024') == datetime(2024, 6, 1)
+
+    parser = DateParser()
+    assert parser.infer(['2024-05-10', '2024-05-11']) == '%Y-%m-%d'
+    assert parser.parse('2024-05-10') == datetime(2024, 5, 10)
+    assert parser.parse('10/05/2024') == datetime(2024, 5, 10)  # Other formats still work
+    assert parser.parse('') is None and parser.failures == 0
+    assert parser.parse('mañana') is None and parser.parse('mañana') is None
+    assert (parser.failures, parser.examples) == (2, ['mañana'])
+
+
+def test_xml_dates_are_iso_only():
+    parser = XMLInvoiceParser()
+    date_parser = parser.create_date_parser()
+    assert parser._parse_date('2024-05-10', date_parser) == datetime(2024, 5, 10)
+    assert date_parser.parse('10/05/2024') is None
+    # Cada lote tiene su propio memo: la instancia compartida no guarda estado
+    assert parser.create_date_parser() is not date_parser
+    assert not hasattr(parser, 'date_parser')
+
+
+def test_unknown_dates_are_reported_in_the_run(tmp_path):
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(
+        HEADER
+        + "FV1;9001;CLIENTE;ARROZ;1;UND;100;2024-05-10;2024-06-10;5\n"
+        + "FV2;9001;CLIENTE;ARROZ;1;UND;100;31/31/2024;2024-06-10;5\n",
+        encoding='utf-8'
+    )
+
+    for scheduler in (None, InvoiceWorkScheduler(max_workers=2)):
+        exporter = CapturingExporter()
+        use_case = ProcessJCRInvoices(MemoryReportRepository(), None, exporter, work_scheduler=scheduler)
+        success, message, _ = use_case.execute([str(csv_file)], 'Cali', '5', 'tester')
+        assert success, message
+        assert exporter.invoices[0].issue_date == datetime(2024, 5, 10)
+        assert "jcr.csv: 1 fecha(s) no reconocida(s)" in message
+        assert "'31/31/2024'" in message
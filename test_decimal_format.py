@@ -0,0 +1,37 @@
+"""
+Pruebas del formato de montos con 5 decimales y coma decimal
+"""
+from decimal import Decimal
+
+from src.domain.services.decimal_format import DecimalFormatter, format_decimal
+from src.infrastructure.exporters.jcr_reggis_exporter import JCRReggisExporter
+
+
+def test_matches_formatting_the_decimal_itself():
+    values = [
+        Decimal('0'), Decimal('-0'), Decimal('2.5'), Decimal('1234.567891'),
+        Decimal('0.000005'), Decimal('0.000015'), Decimal('-0.000001'), Decimal('1E+3'),
+        Decimal('NaN'), Decimal('Infinity'), 7, 2.675,
+    ]
+    for value in values:
+        assert format_decimal(value) == f"{value:.5f}".replace('.', ',')
+        assert format_decimal(value, 2) == f"{value:.2f}".replace('.', ',')
+
+
+def test_large_amounts_are_exact():
+    # Through float this came out as 12345678901234567168,00000
+    assert format_decimal(Decimal('12345678901234567890.123456')) == '12345678901234567890,12346'
+    assert format_decimal(Decimal('1E-7'), 8) == '0,00000010'
+
+
+def test_memo_starts_over_when_full():
+    formatter = DecimalFormatter(memo_size=2)
+    assert [formatter.format(Decimal(n)) for n in (1, 2, 3, 1)] == ['1,00000', '2,00000', '3,00000', '1,00000']
+    assert len(formatter._memo) <= 2
+
+
+def test_reggis_exporter_uses_exact_rounding():
+    exporter = JCRReggisExporter()
+    assert exporter._format_decimal(Decimal('8075.871875')) == '8075,87188'
+    assert exporter._format_decimal('3528.585625') == '3528,58562'
+    assert exporter._format_decimal('no es un numero') == '0,00000'
@@ -0,0 +1,192 @@
+"""
+Pruebas de la exportación a un libro de Excel existente
+Compara la escritura directa de la hoja dentro del .xlsx con la de openpyxl
+(load_workbook + save) y verifica cuándo se recurre a openpyxl
+"""
+import shutil
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+
+from openpyxl import Workbook, load_workbook
+
+from src.domain.entities.invoice import Invoice
+from src.domain.entities.product import Product
+from src.infrastructure.exporters.excel_exporter import ExcelExporter
+from src.infrastructure.exporters import xlsx_append
+from src.infrastructure.exporters.xlsx_append import append_rows
+
+
+HEADERS = ['N° Factura', 'Nombre Producto', 'Codigo Subyacente', 'Cantidad Original', ' Precio Total ', 'Otra', 'Nombre Comprador', 'Fecha Pago', 'Moneda']
+
+
+def _invoices():
+    invoices = []
+    for n, buyer in enumerate(['CLIENTE & <HIJOS>', ' CON ESPACIOS ', '=NO ES FORMULA']):
+        invoice = Invoice(
+            invoice_number=f'F{n}',
+            issue_date=datetime(2024, 5, 10),
+            due_date=None,
+            currency='USD',
+            seller_nit='800',
+            seller_name='VENDEDOR',
+            seller_municipality='Cali',
+            buyer_nit='9001',
+            buyer_name=buyer,
+        )
+        for line in range(2):
+            invoice.add_product(Product(
+                name=f'ARROZ {line}',
+                underlying_code=None,
+                unit_of_measure='Kg',
+                quantity=Decimal('2.5'),
+                unit_price=Decimal('1000'),
+                total_price=Decimal('2500'),
+                iva_percentage=Decimal('5'),
+            ))
+        invoices.append(invoice)
+    return invoices
+
+
+def _workbook(path, history_rows=3):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Datos'
+    ws.append(HEADERS)
+    for row in range(history_rows):
+        ws.append([f'OLD{row}', 'PRODUCTO', None, '1,00000', 5, 'x', 'CLIENTE', None, '1'])
+    other = wb.create_sheet('Historia')
+    other['A1'] = 'sin cambios'
+    other['C9'] = 3.5
+    wb.save(path)
+
+
+def _contents(path):
+    wb = load_workbook(path)
+    return {ws.title: [[cell.value for cell in row] for row in ws.iter_rows()] for ws in wb.worksheets}
+
+
+def _compare(tmp_path, prepare, sheet_name=None):
+    fast, slow = tmp_path / 'rapido.xlsx', tmp_path / 'openpyxl.xlsx'
+    prepare(fast)
+    shutil.copy(fast, slow)
+
+    ExcelExporter().export_to_excel(_invoices(), str(fast), sheet_name)
+    ExcelExporter()._append_to_workbook(_invoices(), str(slow), sheet_name)
+    assert _contents(fast) == _contents(slow)
+    return fast
+
+
+def test_sheet_part_append_matches_openpyxl(tmp_path):
+    path = _compare(tmp_path, _workbook, 'Datos')
+
+    rows = _contents(path)['Datos']
+    assert len(rows) == 1 + 3 + 6
+    assert rows[4] == ['F0', 'ARROZ 0', None, '2,50000', '2500,00000', None, 'CLIENTE & <HIJOS>', None, '2']
+    assert rows[-1][6] == '=NO ES FORMULA'
+    assert load_workbook(path)['Datos'].max_row == 10
+
+
+def test_workbook_is_not_loaded_when_the_sheet_allows_it(tmp_path, monkeypatch):
+    path = tmp_path / 'maestro.xlsx'
+    _workbook(path)
+    monkeypatch.setattr(ExcelExporter, '_append_to_workbook', None)  # Would fail if called
+
+    ExcelExporter().export_to_excel(_invoices(), str(path))
+    ExcelExporter().export_to_excel(_invoices(), str(path))
+
+    assert len(_contents(path)['Datos']) == 1 + 3 + 12
+
+
+def test_gap_in_first_column_falls_back_without_changes(tmp_path):
+    path = tmp_path / 'hueco.xlsx'
+    _workbook(path)
+    wb = load_workbook(path)
+    wb['Datos']['A3'] = None
+    wb.save(path)
+    original = path.read_bytes()
+
+    assert append_rows(str(path), 'Datos', lambda headers: iter([{1: 'X'}])) is False
+    assert path.read_bytes() == original
+    assert list(tmp_path.iterdir()) == [path]
+
+    # openpyxl fills the gap first, as before
+    _compare(tmp_path, lambda target: target.write_bytes(original), 'Datos')
+
+
+def test_header_only_and_active_sheet(tmp_path):
+    _compare(tmp_path, lambda target: _workbook(target, history_rows=0))
+    _compare(tmp_path, _workbook, 'Historia')  # Data in other columns only: falls back
+
+
+class _Unseekable:
+    """Write-only stream: zipfile then writes each size after the data (data descriptor)"""
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+
+def test_unchanged_parts_are_copied_compressed(tmp_path):
+    path = tmp_path / 'maestro.xlsx'
+    _workbook(path)
+    # Same workbook at the lowest compression level, every part followed by a
+    # data descriptor, plus a stored part: recompressing would change the sizes
+    with zipfile.ZipFile(path) as source, open(tmp_path / 'flujo.xlsx', 'wb') as file:
+        with zipfile.ZipFile(_Unseekable(file), 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as target:
+            for info in source.infolist():
+                target.writestr(info.filename, source.read(info))
+            target.writestr('customXml/datos.bin', b'sin comprimir' * 100, zipfile.ZIP_STORED)
+            target.writestr('customXml/nivel1.xml', ''.join(f'<v>{n % 97}</v>' for n in range(5000)))
+    path = tmp_path / 'flujo.xlsx'
+
+    with zipfile.ZipFile(path) as source:
+        before = {info.filename: (info.compress_type, info.compress_size, info.CRC) for info in source.infolist()}
+        assert all(info.flag_bits & 0x8 for info in source.infolist())
+
+    assert append_rows(str(path), 'Datos', lambda headers: iter([{1: 'NUEVA'}])) is True
+
+    with zipfile.ZipFile(path) as result:
+        assert result.testzip() is None
+        after = {info.filename: (info.compress_type, info.compress_size, info.CRC) for info in result.infolist()}
+        assert result.read('customXml/datos.bin') == b'sin comprimir' * 100
+    sheet = 'xl/worksheets/sheet1.xml'
+    assert list(after) == list(before)
+    assert after[sheet] != before[sheet]
+    assert {name: value for name, value in after.items() if name != sheet} == {
+        name: value for name, value in before.items() if name != sheet
+    }
+    assert _contents(path)['Datos'][-1][0] == 'NUEVA'
+
+
+def test_names_folders_and_attributes_survive_the_copy(tmp_path):
+    path = tmp_path / 'maestro.xlsx'
+    _workbook(path)
+    with zipfile.ZipFile(path, 'a') as workbook:
+        workbook.mkdir('customXml')
+        workbook.writestr('customXml/año ñandú.xml', '<datos>ü</datos>')
+
+    with zipfile.ZipFile(path) as source:
+        before = [(info.filename, info.date_time, info.external_attr) for info in source.infolist()]
+    assert append_rows(str(path), 'Datos', lambda headers: iter([{1: 'NUEVA'}])) is True
+
+    with zipfile.ZipFile(path) as result:
+        assert result.testzip() is None
+        assert [(info.filename, info.date_time, info.external_attr) for info in result.infolist()] == before
+        assert result.read('customXml/año ñandú.xml').decode('utf-8') == '<datos>ü</datos>'
+
+
+def test_archive_needing_zip64_falls_back_without_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'maestro.xlsx'
+    _workbook(path)
+    original = path.read_bytes()
+    monkeypatch.setattr(xlsx_append, '_MAX_ENTRIES', 2)
+
+    assert append_rows(str(path), 'Datos', lambda headers: iter([{1: 'NUEVA'}])) is False
+    assert path.read_bytes() == original
+    assert list(tmp_path.iterdir()) == [path]
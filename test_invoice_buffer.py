@@ -0,0 +1,49 @@
+"""
+Pruebas del buffer de facturas que vuelca a disco al superar su presupuesto de memoria
+"""
+import os
+
+from src.infrastructure.storage.invoice_buffer import SpillingInvoiceBuffer
+from testing_support import make_invoice
+
+
+def _invoice(number):
+    return make_invoice(f"FE{number}", products=2)
+
+
+def test_spills_past_budget_and_keeps_insertion_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(SpillingInvoiceBuffer, 'BATCH_SIZE', 3)
+    # Budget for about 4 invoices of 2 products (1500 + 2 * 900 bytes estimated each)
+    buffer = SpillingInvoiceBuffer(memory_budget_mb=4 * 3300 / (1024 * 1024), spill_dir=str(tmp_path))
+
+    buffer.extend(_invoice(n) for n in range(4))
+    assert buffer.spill_count == 0 and not os.listdir(tmp_path)
+
+    buffer.extend(_invoice(n) for n in range(4, 23))
+    stats = buffer.stats()
+    assert len(buffer) == 23
+    assert stats['spilled_invoices'] == 20 and stats['in_memory_invoices'] == 3
+    assert stats['spill_count'] == 8  # Four spills of 5 invoices, in batches of 3 + 2
+    assert stats['spilled_bytes'] > 0
+    assert "20 facturas volcadas a disco en 8 lotes" in buffer.summary()
+
+    # Spilled batches first, then the in-memory tail, in the order they were added; twice
+    for _ in range(2):
+        invoices = list(buffer)
+        assert [invoice.invoice_number for invoice in invoices] == [f"FE{n}" for n in range(23)]
+    assert [str(p.total_price) for p in invoices[0].products] == ['100', '200']
+
+    spill_files = os.listdir(tmp_path)
+    assert len(spill_files) == 1 and spill_files[0].startswith('cali_sae_spill_')
+
+    buffer.close()
+    assert not os.listdir(tmp_path)
+    assert list(buffer) == []
+
+
+def test_small_run_never_touches_disk(tmp_path):
+    with SpillingInvoiceBuffer(memory_budget_mb=1, spill_dir=str(tmp_path)) as buffer:
+        buffer.extend(_invoice(n) for n in range(10))
+        assert [invoice.invoice_number for invoice in buffer] == [f"FE{n}" for n in range(10)]
+        assert buffer.summary() == ""
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,73 @@
+"""
+Pruebas del formato compacto de facturas entre procesos
+"""
+import pickle
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.domain.entities.invoice import Invoice
+from src.domain.entities.product import Product
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from src.infrastructure.processing.invoice_codec import decode_invoices, encode_invoices
+from testing_support import HEADER
+
+
+ROWS = (
+    "FV00001;9001;CLIENTE 1;FRIJOL CALIMA*500G;10;UND;25000.50;2024-05-10;2024-06-10;\n"
+    "FV00001;9001;CLIENTE 1;ARROZ;5;UND;10000.00;2024-05-10;2024-06-10;5\n"
+    "FV00002;9002;CLIENTE 2;ARROZ;3;UND;6000.00;2024-05-11;2024-06-11;19\n"
+)
+
+
+def _invoice(number, due_date=None):
+    invoice = Invoice(
+        invoice_number=number, issue_date=datetime(2024, 5, 10, 8, 30), due_date=due_date, currency='COP',
+        seller_nit='900691476', seller_name='DISTRIBUIDORA EL PAISANO SAS', seller_municipality='PALMIRA',
+        buyer_nit='9001', buyer_name='CLIENTE Ñ', xml_filename=f'{number}.xml', zip_filename=None,
+        processed_at=datetime(2024, 5, 10, 9, 0, 1, 123456)
+    )
+    invoice.add_product(Product(
+        name='ACEITE*3000ML', underlying_code='7701', unit_of_measure='Lt', quantity=Decimal('36.000'),
+        unit_price=Decimal('-0.00012345678901234567890123'), total_price=Decimal('1.5E+7'),
+        iva_percentage=Decimal('19'), original_quantity=Decimal('12'), original_unit_code='CJ'
+    ))
+    invoice.add_product(Product(
+        name='ARROZ', underlying_code='', unit_of_measure='Kg', quantity=Decimal('2.50'),
+        unit_price=Decimal('100'), total_price=Decimal('250.00'), iva_percentage=Decimal('0')
+    ))
+    return invoice
+
+
+def test_round_trip_keeps_every_field_exactly():
+    invoices = [_invoice('FE1'), _invoice('FE2', due_date=datetime(2024, 6, 10)), _invoice('FE3')]
+    invoices[2].products = []
+
+    decoded = decode_invoices(pickle.loads(pickle.dumps(encode_invoices(invoices))))
+
+    assert decoded == invoices
+    for original, copy in zip(invoices, decoded):
+        for product, decoded_product in zip(original.products, copy.products):
+            # Same digits and exponent, not just the same value
+            for field in ('quantity', 'unit_price', 'total_price', 'iva_percentage', 'original_quantity'):
+                assert str(getattr(decoded_product, field)) == str(getattr(product, field))
+            assert decoded_product.line_number == product.line_number
+    assert decode_invoices(encode_invoices([])) == []
+
+
+def test_round_trip_of_parsed_csv_invoices_and_size(tmp_path):
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ROWS * 20, encoding='utf-8')
+    invoices = JCRCsvParser(str(csv_file), iva_percentage='5').parse()
+
+    payload = pickle.dumps(encode_invoices(invoices), protocol=pickle.HIGHEST_PROTOCOL)
+    assert decode_invoices(pickle.loads(payload)) == invoices
+    # Repeated names, units and file names travel once per batch
+    assert len(payload) < len(pickle.dumps(invoices, protocol=pickle.HIGHEST_PROTOCOL)) / 2
+
+
+def test_other_versions_are_rejected():
+    version, strings, rows = encode_invoices([_invoice('FE1')])
+    with pytest.raises(ValueError):
+        decode_invoices((version + 1, strings, rows))
@@ -0,0 +1,71 @@
+"""
+Pruebas de la lectura por fragmentos de archivos grandes de Juan Camilo Rosas
+"""
+import random
+
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+from testing_support import HEADER
+
+
+PRODUCTS = ("ARROZ X 500 GR", "ACEITE 1000 ML", "AZUCAR", "SAL X 1 KG")
+
+
+def _write_input(path, shuffle=False):
+    rows = [
+        f"FV{n:04d};900{n % 7};CLIENTE {n % 7};{PRODUCTS[line % 4]};{line + 1};UND;{1000 + n},{line}0;10/05/2024;10/06/2024;5\n"
+        for n in range(1, 120)
+        for line in range(n % 4 + 1)
+    ]
+    rows.append("FV9999;9001;CLIENTE;ARROZ;1;UND;1.234,50;ayer;10/06/2024;5\n")
+    if shuffle:
+        random.Random(7).shuffle(rows)
+    path.write_text(HEADER + "".join(rows), encoding='utf-8')
+    return str(path)
+
+
+def _snapshot(invoices):
+    return [
+        (invoice.invoice_number, invoice.issue_date.date(), invoice.buyer_nit,
+         [(p.name, p.quantity, p.unit_price, p.total_price, p.line_number) for p in invoice.products])
+        for invoice in invoices
+    ]
+
+
+def test_chunks_merge_into_the_same_invoices(tmp_path):
+    for shuffle in (False, True):
+        path = _write_input(tmp_path / f'grande{shuffle}.csv', shuffle)
+        sequential = JCRCsvParser(path, iva_percentage='5')
+        expected = _snapshot(sequential.parse())
+
+        plan = JCRCsvParser(path, iva_percentage='5').plan_chunks(chunk_bytes=500)
+        assert plan is not None and len(plan.ranges) > 5
+        chunks = []
+        for index in range(len(plan.ranges)):
+            parser = JCRCsvParser(path, iva_percentage='5')
+            chunks.append((parser.parse_chunk(plan, index), parser.chunk_stats()))
+
+        merger = JCRCsvParser(path, iva_percentage='5')
+        assert _snapshot(merger.merge_chunks(plan, chunks)) == expected
+        assert merger.warnings == sequential.warnings
+
+
+def test_quoted_files_are_not_split(tmp_path):
+    path = tmp_path / 'comillas.csv'
+    path.write_text(HEADER + 'FV1;9001;"CLIENTE; S.A.";ARROZ;1;UND;10;2024-05-10;2024-06-10;5\n', encoding='utf-8')
+    assert JCRCsvParser(str(path)).plan_chunks(chunk_bytes=10) is None
+
+
+def test_scheduler_parses_large_files_by_chunks(tmp_path, monkeypatch):
+    paths = [_write_input(tmp_path / 'grande.csv', shuffle=True), _write_input(tmp_path / 'otro.csv')]
+    expected = [_snapshot(JCRCsvParser(path, iva_percentage='5').parse()) for path in paths]
+
+    monkeypatch.setattr(InvoiceWorkScheduler, 'CSV_CHUNK_MIN_BYTES', 1000)
+    monkeypatch.setattr(InvoiceWorkScheduler, 'CSV_CHUNK_BYTES', 700)
+    failures, warnings = [], []
+    results = list(InvoiceWorkScheduler(max_workers=3).parse_csv_files(paths, '5', failures=failures, warnings=warnings))
+
+    assert [path for path, _ in results] == paths
+    assert [_snapshot(invoices) for _, invoices in results] == expected
+    assert not failures
+    assert len(warnings) == 2 and all("fecha(s) no reconocida(s)" in warning for warning in warnings)
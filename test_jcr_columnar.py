@@ -0,0 +1,67 @@
+"""
+Pruebas de la conversión por columnas de los archivos de Juan Camilo Rosas
+"""
+import random
+
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from testing_support import HEADER
+
+
+PRODUCTS = ['FRIJOL CALIMA*500G', 'PANELA MEGA', 'ARROZ', 'PANELA PASTILLA KILO', 'ATUN 170G', 'PANELA 4 LIBRAS']
+QUANTITIES = ['1', '3', '0', '2,5', '1.000', '7']
+VALUES = ['1000.50', '$ 2.500,75', '1,234.56', '0', '99', 'no es número']
+IVAS = ['5', '19%', '', '0']
+
+
+def _write(path, invoices=400):
+    rng = random.Random(11)
+    lines = [HEADER]
+    for n in range(1, invoices + 1):
+        for _ in range(rng.randint(1, 5)):
+            lines.append(
+                f"FV{n:05d};{9000 + n};CLIENTE {n};{rng.choice(PRODUCTS)};{rng.choice(QUANTITIES)};UND;"
+                f"{rng.choice(VALUES)};2024-05-10;2024-06-10;{rng.choice(IVAS)}\n"
+            )
+    # Short row: missing amounts fall back like csv.DictReader
+    lines.append("FV99999;1;CLIENTE;ARROZ\n")
+    path.write_text(''.join(lines), encoding='utf-8')
+
+
+def _products(invoices):
+    return [
+        (invoice.invoice_number, p.line_number, p.name, p.unit_of_measure, p.original_unit_code,
+         str(p.quantity), str(p.unit_price), str(p.total_price), str(p.iva_percentage), str(p.original_quantity),
+         p.get_formatted_quantity(), p.get_formatted_unit_price())
+        for invoice in invoices for p in invoice.products
+    ]
+
+
+def test_columnar_path_matches_row_path(tmp_path, monkeypatch):
+    csv_file = tmp_path / 'jcr.csv'
+    _write(csv_file)
+    monkeypatch.setattr(JCRCsvParser, 'COLUMNAR_BATCH_ROWS', 64)
+
+    for iva in ('0', '5%', ''):
+        by_row = JCRCsvParser(str(csv_file), iva_percentage=iva, columnar=False).parse()
+        by_column = JCRCsvParser(str(csv_file), iva_percentage=iva, columnar=True).parse()
+        assert [i.invoice_number for i in by_column] == [i.invoice_number for i in by_row]
+        assert _products(by_column) == _products(by_row)
+
+
+def test_columnar_path_is_chosen_by_file_size(tmp_path, monkeypatch):
+    csv_file = tmp_path / 'jcr.csv'
+    _write(csv_file, invoices=20)
+    calls = []
+    original = JCRCsvParser._create_products_columnar
+
+    def spy(self, rows):
+        calls.append(len(rows))
+        return original(self, rows)
+    monkeypatch.setattr(JCRCsvParser, '_create_products_columnar', spy)
+
+    JCRCsvParser(str(csv_file)).parse()
+    assert not calls
+
+    monkeypatch.setattr(JCRCsvParser, 'COLUMNAR_MIN_BYTES', 1)
+    JCRCsvParser(str(csv_file)).parse()
+    assert calls
@@ -0,0 +1,52 @@
+"""
+Pruebas del procesamiento de varios archivos de Juan Camilo Rosas con archivos dañados
+"""
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+from testing_support import HEADER, CapturingExporter, MemoryReportRepository, write_jcr_csv
+
+
+def _write_inputs(tmp_path):
+    paths = []
+    for n in range(1, 5):
+        rows = "".join(
+            f"FV{n}{line:03d};9001;CLIENTE;ARROZ;{line};UND;1000.00;2024-05-10;2024-06-10;5\n"
+            for line in range(1, 3 + n)
+        )
+        paths.append(write_jcr_csv(tmp_path / f'dia{n}.csv', rows))
+    # Not UTF-8: the parser fails on this file only
+    broken = tmp_path / 'dañado.csv'
+    broken.write_bytes((HEADER + "FV9;1;JOSÉ;ARROZ;1;UND;10;2024-01-01;2024-01-01;5\n").encode('latin-1'))
+    paths.insert(2, str(broken))
+    return paths
+
+
+def _run(paths, work_scheduler):
+    exporter = CapturingExporter()
+    use_case = ProcessJCRInvoices(MemoryReportRepository(), None, exporter, work_scheduler=work_scheduler)
+    progress = []
+    result = use_case.execute(paths, 'Cali', '5', 'tester', lambda done, total: progress.append((done, total)))
+    return result, exporter.invoices, progress
+
+
+def test_bad_file_is_reported_and_the_rest_merged_in_order(tmp_path):
+    paths = _write_inputs(tmp_path)
+    expected = [f"FV{n}{line:03d}" for n in range(1, 5) for line in range(1, 3 + n)]
+
+    for scheduler in (None, InvoiceWorkScheduler(max_workers=3)):
+        (success, message, records), invoices, progress = _run(paths, scheduler)
+        assert success, message
+        assert [invoice.invoice_number for invoice in invoices] == expected
+        assert records == len(expected)
+        assert "1 archivo(s) omitido(s)" in message
+        assert "- dañado.csv:" in message
+        assert progress[-1] == (len(paths), len(paths))
+
+
+def test_run_with_only_bad_files_explains_why(tmp_path):
+    broken = _write_inputs(tmp_path)[2]
+
+    (success, message, records), _, _ = _run([broken], InvoiceWorkScheduler(max_workers=2))
+    assert not success
+    assert "No se encontraron facturas validas" in message
+    assert "- dañado.csv:" in message
@@ -0,0 +1,111 @@
+"""
+Pruebas de la lectura por flujo de los archivos de Juan Camilo Rosas
+"""
+import random
+
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from testing_support import HEADER
+
+
+PRODUCTS = ['FRIJOL CALIMA*500G', 'PANELA MEGA', 'ARROZ', 'PANELA PASTILLA KILO', 'ATUN 170G']
+
+
+def _rows(invoices=60):
+    rng = random.Random(7)
+    rows = []
+    for n in range(1, invoices + 1):
+        for line in range(rng.randint(1, 4)):
+            rows.append(
+                f"FV{n:05d};{9000 + n};CLIENTE {n};{rng.choice(PRODUCTS)};{line + 1};UND;"
+                f"{rng.randint(1000, 9999)}.50;2024-05-10;2024-06-10;5\n"
+            )
+    return rows
+
+
+def _summary(invoices):
+    return [
+        (invoice.invoice_number, invoice.buyer_nit, [(p.name, p.original_quantity, p.total_price) for p in invoice.products])
+        for invoice in invoices
+    ]
+
+
+def test_sorted_file_is_streamed_invoice_by_invoice(tmp_path, monkeypatch):
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ''.join(_rows()), encoding='utf-8')
+
+    def no_sort(self, records):
+        raise AssertionError("A sorted file must not be sorted again")
+    monkeypatch.setattr(JCRCsvParser, '_iter_external_sort', no_sort)
+
+    invoices = JCRCsvParser(str(csv_file), iva_percentage='5').iter_invoices()
+    first = next(invoices)
+    assert first.invoice_number == 'FV00001'
+    assert len([first] + list(invoices)) == 60
+
+
+def test_grouped_file_in_any_order_is_read_once(tmp_path, monkeypatch):
+    # Invoices keep their rows together but are not in text order (FV9 > FV10)
+    rows = _rows(12)
+    runs = {}
+    for row in rows:
+        runs.setdefault(row.split(';')[0], []).append(row.replace('FV000', 'FV'))
+    order = sorted(runs, key=lambda number: -int(number[2:]) % 7)
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ''.join(row for number in order for row in runs[number]), encoding='utf-8')
+
+    def no_sort(self, records):
+        raise AssertionError("Grouped invoices must not be sorted")
+    monkeypatch.setattr(JCRCsvParser, '_iter_external_sort', no_sort)
+    reads = []
+    read_rows = JCRCsvParser._read_rows
+    monkeypatch.setattr(JCRCsvParser, '_read_rows', lambda self: reads.append(1) or read_rows(self))
+
+    invoices = JCRCsvParser(str(csv_file), iva_percentage='5').parse()
+    assert [invoice.invoice_number for invoice in invoices] == [number.replace('FV000', 'FV') for number in order]
+    assert len(reads) == 1
+
+
+def test_reappearing_invoice_is_sorted(tmp_path):
+    rows = _rows(20)
+    # FV00003 reappears after other invoices, at the end of the file
+    rows.append("FV00003;9003;CLIENTE 3;ARROZ;9;UND;10.00;2024-05-10;2024-06-10;5\n")
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ''.join(rows), encoding='utf-8')
+
+    parsed = JCRCsvParser(str(csv_file), iva_percentage='5').parse()
+    streamed = list(JCRCsvParser(str(csv_file), iva_percentage='5').iter_invoices())
+    assert _summary(parsed) == _summary(streamed)
+    assert len(parsed) == 20
+    assert parsed[2].products[-1].name == 'ARROZ'
+    assert str(parsed[2].products[-1].original_quantity) == '9'
+
+
+def test_unsorted_file_matches_first_appearance_grouping(tmp_path, monkeypatch):
+    rows = _rows()
+    random.Random(3).shuffle(rows)
+    # One interleaved invoice with padded header names and a short row
+    rows.append("FV00001;9001;CLIENTE 1;ARROZ;9;UND;10.00\n")
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(" NUMERO DE FACTURA " + HEADER[len("NUMERO DE FACTURA"):] + ''.join(rows), encoding='utf-8')
+
+    # Expected: invoices in order of first appearance, rows in file order
+    expected = {}
+    for row in rows:
+        fields = row.rstrip('\n').split(';')
+        expected.setdefault(fields[0], []).append((fields[3], fields[4]))
+
+    # Small chunks force several spilled runs to be merged
+    monkeypatch.setattr(JCRCsvParser, 'SORT_CHUNK_ROWS', 25)
+    monkeypatch.setattr(JCRCsvParser, 'SPILL_BLOCK_ROWS', 4)
+    invoices = JCRCsvParser(str(csv_file), iva_percentage='5').parse()
+
+    assert [invoice.invoice_number for invoice in invoices] == list(expected)
+    for invoice in invoices:
+        assert [(p.name, str(p.original_quantity)) for p in invoice.products] == expected[invoice.invoice_number]
+    assert invoices[[i.invoice_number for i in invoices].index('FV00001')].products[-1].iva_percentage == 5
+
+    # Same invoices as parsing the sorted file
+    sorted_file = tmp_path / 'sorted.csv'
+    sorted_file.write_text(HEADER + ''.join(sorted(rows, key=lambda r: r.split(';')[0])), encoding='utf-8')
+    by_number = {entry[0]: entry for entry in _summary(JCRCsvParser(str(sorted_file), iva_percentage='5').parse())}
+    assert _summary(invoices) == [by_number[number] for number in expected]
@@ -0,0 +1,112 @@
+"""
+Pruebas de la lectura de libros de Excel de Juan Camilo Rosas
+"""
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+
+from openpyxl import Workbook
+
+from src.infrastructure.parsers import jcr_csv_parser
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from src.infrastructure.processing.preflight import PreflightScanner
+from testing_support import COLUMNS
+
+
+PRODUCTS = ['FRIJOL CALIMA*500G', 'PANELA MEGA', 'ARROZ', 'ATUN 170G']
+
+
+def _rows():
+    return [
+        [f"FV{n:04d}", 9000 + n % 5, f"CLIENTE {n % 5}", PRODUCTS[(n + line) % 4], line + 0.5,
+         "UND", 1000 + n * 0.25, datetime(2024, 5, 1 + n % 28), datetime(2024, 6, 1 + n % 28), 5]
+        for n in range(1, 80)
+        for line in range(n % 3 + 1)
+    ]
+
+
+def _write_xlsx(path, rows):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([f" {name} " for name in COLUMNS])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def _summary(invoices):
+    return [
+        (invoice.invoice_number, invoice.buyer_nit, invoice.issue_date, invoice.due_date,
+         [(p.name, p.original_quantity, p.unit_price, p.total_price, p.iva_percentage) for p in invoice.products])
+        for invoice in invoices
+    ]
+
+
+def test_workbook_parses_like_the_same_csv(tmp_path, monkeypatch):
+    rows = _rows()
+    xlsx_file = _write_xlsx(tmp_path / 'jcr.xlsx', rows)
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(
+        ";".join(COLUMNS) + "\n" + "".join(
+            ";".join(JCRCsvParser._cell_text(value) if not isinstance(value, str) else value for value in row) + "\n"
+            for row in rows
+        ),
+        encoding='utf-8'
+    )
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path / 'spool'))
+    (tmp_path / 'spool').mkdir()
+
+    parser = JCRCsvParser(xlsx_file, iva_percentage='5')
+    assert _summary(parser.parse()) == _summary(JCRCsvParser(str(csv_file), iva_percentage='5').parse())
+    assert not parser.warnings
+    # The temporary copy of the rows is gone once the file is parsed
+    assert not list((tmp_path / 'spool').iterdir())
+    assert parser.plan_chunks() is None
+
+
+def test_scattered_workbook_is_read_once(tmp_path, monkeypatch):
+    # Las filas de cada factura quedan separadas: hay que ordenar el archivo
+    rows = sorted(_rows(), key=lambda row: row[3])
+    xlsx_file = _write_xlsx(tmp_path / 'jcr.xlsx', rows)
+    expected = _summary(JCRCsvParser(xlsx_file, iva_percentage='5').parse())
+
+    loads = []
+    original = jcr_csv_parser.load_workbook
+
+    def load_workbook(*args, **kwargs):
+        loads.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(jcr_csv_parser, 'load_workbook', load_workbook)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path / 'spool'))
+    (tmp_path / 'spool').mkdir()
+
+    assert _summary(JCRCsvParser(xlsx_file, iva_percentage='5').parse()) == expected
+    assert _summary(JCRCsvParser(xlsx_file, iva_percentage='5').iter_invoices()) == expected
+    assert len(loads) == 2
+    assert not list((tmp_path / 'spool').iterdir())
+
+
+def test_workbook_numbers_are_never_read_as_thousands(tmp_path):
+    xlsx_file = _write_xlsx(tmp_path / 'jcr.xlsx', [
+        ["FV1", 9001, "CLIENTE", "ARROZ", 2.125, "UND", 1500.5, datetime(2024, 5, 10), None, 5],
+        ["FV1", 9001, "CLIENTE", "ARROZ", "1.234,50", "UND", 840, "10/05/2024", None, 5],
+    ])
+
+    invoice, = JCRCsvParser(xlsx_file, iva_percentage='5').parse()
+    assert [p.original_quantity for p in invoice.products] == [Decimal('2.125'), Decimal('1234.50')]
+    assert invoice.issue_date == datetime(2024, 5, 10)
+
+
+def test_preflight_estimates_workbooks(tmp_path):
+    xlsx_file = _write_xlsx(tmp_path / 'jcr.xlsx', _rows())
+    broken = tmp_path / 'roto.xlsx'
+    broken.write_bytes(b'no es un libro')
+
+    report = PreflightScanner().scan('JUAN CAMILO ROSAS', [xlsx_file, str(broken)])
+    scan, broken_scan = report.inputs
+    assert scan.error is None
+    assert scan.estimated_lines == len(_rows())
+    assert scan.estimated_invoices == 79
+    assert broken_scan.error.startswith("No se pudo abrir el libro de Excel")
@@ -0,0 +1,119 @@
+"""
+Pruebas de la cola de trabajos en carpeta compartida (spool)
+Varios workers reclaman trabajos del mismo spool con casos de uso simulados
+"""
+import threading
+import time
+from pathlib import Path
+
+from src.infrastructure.processing.job_spool import JobSpool
+from src.presentation.api.job_runner import COMPANY_JCR
+from src.presentation.api.spool_worker import SpoolWorker
+
+
+class FakeUseCase:
+    """Writes one output line per input file"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = output_dir
+
+    def execute(self, csv_files, municipality, iva_percentage, username, progress_callback=None, force=False):
+        output = self.output_dir / f"salida_{threading.get_ident()}_{time.time_ns()}.csv"
+        lines = [Path(path).read_text(encoding='utf-8') for path in csv_files]
+        output.write_text(f"{municipality};{iva_percentage}\n" + "".join(lines), encoding='utf-8')
+        return True, f"Datos exportados exitosamente en:\n{output}", len(csv_files)
+
+
+def _drain(worker):
+    while worker.run_once():
+        pass
+
+
+def test_workers_claim_each_job_once(tmp_path):
+    inputs = tmp_path / 'inputs'
+    inputs.mkdir()
+    outputs = tmp_path / 'outputs'
+    outputs.mkdir()
+
+    spool = JobSpool(str(tmp_path / 'spool'))
+    jobs = []
+    for idx in range(12):
+        source = inputs / f"f{idx}.csv"
+        source.write_text(f"FV{idx}\n", encoding='utf-8')
+        jobs.append(spool.submit(COMPANY_JCR, [str(source)], {'municipality': 'Cali', 'iva_percentage': '5'}))
+
+    # Cada worker usa su propia instancia del spool, como otro proceso o máquina
+    workers = [
+        SpoolWorker(JobSpool(str(tmp_path / 'spool')), {COMPANY_JCR: lambda: FakeUseCase(outputs)},
+                    worker_id=f"w{idx}")
+        for idx in range(4)
+    ]
+    threads = [threading.Thread(target=_drain, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    for idx, job in enumerate(jobs):
+        done = spool.get(job.id)
+        assert done.status == 'done'
+        assert done.attempts == 1
+        assert done.records == 1
+        result = spool.resolve(done.output_path)
+        assert result.read_text(encoding='utf-8') == f"Cali;5\nFV{idx}\n"
+
+
+def test_stale_claim_is_requeued(tmp_path):
+    source = tmp_path / 'f.csv'
+    source.write_text("FV1\n", encoding='utf-8')
+
+    spool = JobSpool(str(tmp_path / 'spool'), stale_after=0.05, max_attempts=2)
+    job = spool.submit(COMPANY_JCR, [str(source)], {'municipality': 'Cali'})
+
+    # El primer worker "muere" sin heartbeat
+    assert spool.claim('caido').id == job.id
+    assert spool.claim('otro') is None
+    time.sleep(0.1)
+
+    assert spool.claim('otro').id == job.id
+    assert not spool.heartbeat(job.id, 'caido')
+    assert not spool.complete(job.id, 'caido', True, 'tarde')
+    assert spool.complete(job.id, 'otro', False, 'Error de prueba')
+    assert spool.get(job.id).status == 'failed'
+
+    # Superado el número de intentos el trabajo queda fallido
+    job = spool.submit(COMPANY_JCR, [str(source)], {'municipality': 'Cali'})
+    spool.claim('a')
+    time.sleep(0.1)
+    spool.claim('b')
+    time.sleep(0.1)
+    assert spool.requeue_stale() == 0
+    assert spool.get(job.id).status == 'failed'
+
+
+def test_simultaneous_claims_give_the_job_to_one_worker(tmp_path):
+    source = tmp_path / 'f.csv'
+    source.write_text("FV1\n", encoding='utf-8')
+    spool = JobSpool(str(tmp_path / 'spool'))
+    job = spool.submit(COMPANY_JCR, [str(source)], {'municipality': 'Cali'})
+
+    # Todos intentan reclamar a la vez, como workers en varias máquinas
+    start = threading.Barrier(8)
+    claimed = []
+
+    def claim(name):
+        other = JobSpool(str(tmp_path / 'spool'))
+        start.wait()
+        if other.claim(name):
+            claimed.append(name)
+
+    threads = [threading.Thread(target=claim, args=(f"w{idx}",)) for idx in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(claimed) == 1
+    assert spool.get(job.id).worker_id == claimed[0]
+    assert spool.complete(job.id, claimed[0], True, 'ok')
+    assert spool.get(job.id).status == 'done'
@@ -0,0 +1,39 @@
+"""
+Pruebas de la inferencia del formato numérico por columna
+"""
+from decimal import Decimal
+
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from src.infrastructure.parsers.number_format import COMMA_DECIMAL, DOT_DECIMAL, infer_convention
+from testing_support import HEADER
+
+
+def test_convention_is_inferred_from_unambiguous_cells():
+    assert infer_convention(['1,234.56', '25', '1,234']) == DOT_DECIMAL
+    assert infer_convention(['840,50', '1.234.567', '7']) == COMMA_DECIMAL
+    assert infer_convention(['1,234', '1.234', '5']) is None
+    assert infer_convention(['$ 12.000,00', '$ 3.500,10', '99.5']) == COMMA_DECIMAL
+
+
+def test_comma_decimal_file_is_parsed_consistently(tmp_path):
+    values = ['1.234,56', '840,50', '1,234', '12.000', '$ 2.500,75', '840.5']
+    rows = "".join(
+        f"FV{n:03d};9001;CLIENTE;ARROZ;1;UND;{value};2024-05-10;2024-06-10;5\n"
+        for n, value in enumerate(values, start=1)
+    )
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + rows * 3, encoding='utf-8')
+
+    for columnar in (False, True):
+        parser = JCRCsvParser(str(csv_file), columnar=columnar)
+        invoices = parser.parse()
+        totals = [invoice.products[0].total_price for invoice in invoices]
+        assert totals == [
+            Decimal('1234.56'), Decimal('840.50'), Decimal('1.234'),
+            Decimal('12000'), Decimal('2500.75'), Decimal('840.5')
+        ]
+
+        # '840.5' does not follow the file's format: parsed on its own and reported
+        assert len(parser.warnings) == 1
+        assert "3 valor(es) de VALOR BRUTO" in parser.warnings[0]
+        assert "'840.5'" in parser.warnings[0]
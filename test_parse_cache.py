@@ -0,0 +1,113 @@
+"""
+Pruebas del análisis especulativo en segundo plano de los archivos seleccionados
+"""
+import os
+import time
+from decimal import Decimal
+
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.infrastructure.exporters.jcr_reggis_exporter import JCRReggisExporter
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from src.infrastructure.processing import parse_cache
+from src.infrastructure.processing.parse_cache import KIND_JCR, SpeculativeParseCache
+from testing_support import HEADER, MemoryReportRepository
+
+
+ROWS = (
+    "FV00001;9001;CLIENTE 1;FRIJOL CALIMA*500G;10;UND;25000.50;2024-05-10;2024-06-10;\n"
+    "FV00001;9001;CLIENTE 1;ARROZ;5;UND;10000.00;2024-05-10;2024-06-10;5\n"
+)
+
+
+def _prefetch_and_wait(cache, csv_file, iva_percentage):
+    """Prefetch and let the background parse finish (take() cancels queued ones)"""
+    cache.prefetch(KIND_JCR, [str(csv_file)], iva_percentage)
+    for entry in list(cache._entries.values()):
+        entry.future.result()
+
+
+def test_prefetched_results_are_validated(tmp_path):
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ROWS, encoding='utf-8')
+    cache = SpeculativeParseCache()
+
+    try:
+        _prefetch_and_wait(cache, csv_file, '19')
+        invoices = cache.take(KIND_JCR, str(csv_file), '19')
+        assert [p.iva_percentage for p in invoices[0].products] == [Decimal('19'), Decimal('5')]
+
+        # Each take returns fresh objects the run can convert in place
+        invoices[0].products.clear()
+        assert len(cache.take(KIND_JCR, str(csv_file), '19')[0].products) == 2
+
+        # A different default IVA changes the result: the run parses again
+        assert cache.take(KIND_JCR, str(csv_file), '5') is None
+
+        # So does editing the file after it was selected
+        _prefetch_and_wait(cache, csv_file, '19')
+        assert cache.take(KIND_JCR, str(csv_file), '19') is not None
+        csv_file.write_text(HEADER + ROWS + ROWS, encoding='utf-8')
+        assert cache.take(KIND_JCR, str(csv_file), '19') is None
+
+        # Removing the file from the selection forgets it
+        cache.prefetch(KIND_JCR, [str(csv_file)], '19')
+        cache.cancel([str(csv_file)])
+        assert cache.take(KIND_JCR, str(csv_file), '19') is None
+    finally:
+        cache.shutdown()
+
+
+def test_run_only_converts_and_exports_prefetched_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ROWS, encoding='utf-8')
+    cache = SpeculativeParseCache()
+
+    try:
+        _prefetch_and_wait(cache, csv_file, '5')
+
+        def no_parse(self):
+            raise AssertionError(f"{self.file_path} was parsed again")
+        monkeypatch.setattr(JCRCsvParser, 'parse', no_parse)
+
+        use_case = ProcessJCRInvoices(
+            MemoryReportRepository(), None, JCRReggisExporter(), parse_cache=cache
+        )
+        success, message, records = use_case.execute([str(csv_file)], 'Cali', '5', 'tester')
+        assert success, message
+        assert records == 2
+        assert os.path.isfile(message.split('\n')[1])
+    finally:
+        cache.shutdown()
+
+
+_real_parse_input = parse_cache.parse_input
+
+
+def _slow_parse_input(kind, path, iva_percentage=None):
+    if path.endswith('lento.csv'):
+        time.sleep(60)
+    return _real_parse_input(kind, path, iva_percentage)
+
+
+def test_stuck_parse_does_not_hold_the_run_or_the_worker(tmp_path, monkeypatch):
+    # Forked workers inherit the patched function
+    monkeypatch.setattr(parse_cache, 'parse_input', _slow_parse_input)
+    slow = tmp_path / 'lento.csv'
+    quick = tmp_path / 'rapido.csv'
+    for csv_file in (slow, quick):
+        csv_file.write_text(HEADER + ROWS, encoding='utf-8')
+    cache = SpeculativeParseCache(wait_timeout=0.2, file_timeout=1, cpu_timeout=None)
+
+    try:
+        cache.prefetch(KIND_JCR, [str(slow)], '5')
+        time.sleep(0.5)  # El trabajador ya empezó con el archivo lento
+        started = time.monotonic()
+        assert cache.take(KIND_JCR, str(slow), '5') is None
+        assert time.monotonic() - started < 5
+
+        # Al vencer el límite por archivo el trabajador se reemplaza y sigue con los demás
+        _prefetch_and_wait(cache, quick, '5')
+        assert len(cache.take(KIND_JCR, str(quick), '5')) == 1
+    finally:
+        cache.shutdown()
@@ -0,0 +1,90 @@
+"""
+Pruebas del análisis previo (pre-flight) de las entradas seleccionadas
+"""
+import zipfile
+
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.infrastructure.database.sqlite_throughput_repository import SQLiteThroughputRepository
+from src.infrastructure.exporters.jcr_reggis_exporter import JCRReggisExporter
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from src.infrastructure.processing.preflight import PreflightScanner
+from testing_support import HEADER, MemoryReportRepository
+
+
+ROWS = (
+    "FV00001;9001;CLIENTE 1;FRIJOL CALIMA*500G;10;UND;25000.50;2024-05-10;2024-06-10;5\n"
+    "FV00001;9001;CLIENTE 1;ARROZ;5;UND;10000.00;2024-05-10;2024-06-10;5\n"
+    "FV00002;9002;CLIENTE 2;ARROZ;3;UND;6000.00;2024-05-11;2024-06-11;5"
+)
+
+
+def test_csv_lines_invoices_and_throughput_estimate(tmp_path):
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ROWS, encoding='utf-8')
+    throughput = SQLiteThroughputRepository(str(tmp_path / 'tp.db'))
+    scanner = PreflightScanner(throughput)
+
+    report = scanner.scan('JUAN CAMILO ROSAS', [str(csv_file)])
+    assert not report.errors
+    assert (report.estimated_lines, report.estimated_invoices) == (3, 2)
+    assert report.estimated_seconds is None
+    assert "sin historial" in report.summary()
+
+    # Two runs at 1000 and 3000 bytes/s: the estimate uses the median
+    throughput.record('JUAN CAMILO ROSAS', 1000, 1.0, 10)
+    throughput.record('JUAN CAMILO ROSAS', 6000, 2.0, 10)
+    report = scanner.scan('JUAN CAMILO ROSAS', [str(csv_file)])
+    assert report.estimated_seconds == csv_file.stat().st_size / 2000
+
+
+def test_broken_inputs_are_reported(tmp_path):
+    good = tmp_path / 'bueno.zip'
+    with zipfile.ZipFile(good, 'w') as zf:
+        zf.writestr('f1.xml', '<Invoice/>')
+        zf.writestr('f2.xml', '<Invoice/>')
+    truncated = tmp_path / 'cortado.zip'
+    truncated.write_bytes(good.read_bytes()[:40])
+    no_xml = tmp_path / 'vacio.zip'
+    with zipfile.ZipFile(no_xml, 'w') as zf:
+        zf.writestr('leeme.txt', 'x')
+    latin1 = tmp_path / 'latin1.csv'
+    latin1.write_bytes((HEADER + "FV1;1;JOSÉ;ARROZ;1;UND;10;2024-01-01;2024-01-01;5\n").encode('latin-1'))
+    no_column = tmp_path / 'columnas.csv'
+    no_column.write_text("FACTURA;PRODUCTO\nFV1;ARROZ\n", encoding='utf-8')
+
+    report = PreflightScanner().scan('AGROBUITRON', [str(good), str(truncated), str(no_xml)])
+    assert [scan.name for scan in report.errors] == ['cortado.zip', 'vacio.zip']
+    assert report.inputs[0].xml_files == 2
+    assert report.estimated_invoices == 2  # Broken inputs are not counted
+
+    report = PreflightScanner().scan('JUAN CAMILO ROSAS', [str(latin1), str(no_column)])
+    assert "UTF-8" in report.inputs[0].error
+    assert "NUMERO DE FACTURA" in report.inputs[1].error
+
+
+def test_run_fails_before_parsing_a_bad_selection(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    good = tmp_path / 'jcr.csv'
+    good.write_text(HEADER + ROWS, encoding='utf-8')
+    bad = tmp_path / 'malo.csv'
+    bad.write_text("sin encabezado\n", encoding='utf-8')
+
+    def no_parse(self):
+        raise AssertionError("The selection should fail before parsing")
+    monkeypatch.setattr(JCRCsvParser, 'parse', no_parse)
+
+    throughput = SQLiteThroughputRepository(str(tmp_path / 'tp.db'))
+    use_case = ProcessJCRInvoices(
+        MemoryReportRepository(), None, JCRReggisExporter(),
+        preflight_scanner=PreflightScanner(throughput)
+    )
+    success, message, records = use_case.execute([str(good), str(bad)], 'Cali', '5', 'tester')
+    assert not success
+    assert "malo.csv: Falta la columna NUMERO DE FACTURA" in message
+
+    # A successful run feeds the throughput history
+    monkeypatch.undo()
+    monkeypatch.chdir(tmp_path)
+    success, message, records = use_case.execute([str(good)], 'Cali', '5', 'tester')
+    assert success, message
+    assert throughput.bytes_per_second('JUAN CAMILO ROSAS') > 0
@@ -0,0 +1,172 @@
+"""
+Pruebas del servicio HTTP local de procesamiento
+Levanta el servidor en localhost (puerto libre) con casos de uso simulados
+"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from src.presentation.api.processing_service import (
+    ProcessingService,
+    ServiceBusyError,
+    COMPANY_JCR,
+    COMPANY_PAISANO,
+)
+from src.presentation.api.http_server import create_server
+
+
+class FakeUseCase:
+    """Writes a small output file; blocks while `gate` is not set"""
+
+    def __init__(self, output_dir: Path, gate: threading.Event = None):
+        self.output_dir = output_dir
+        self.gate = gate
+
+    def execute(self, username, progress_callback=None, **kwargs):
+        paths = kwargs.get('csv_files') or kwargs.get('input_paths')
+        if self.gate is not None:
+            self.gate.wait(10)
+        for idx in range(len(paths)):
+            progress_callback(idx + 1, len(paths))
+        output = self.output_dir / f"salida_{len(list(self.output_dir.iterdir()))}.csv"
+        output.write_text("N° Factura;Cantidad\nFV1;1,00000\n", encoding='utf-8')
+        return True, f"Datos exportados exitosamente en:\n{output}", len(paths)
+
+
+def _request(url, data=None, method='GET'):
+    req = urllib.request.Request(url, data=data, method=method)
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+
+
+def _wait_done(base, job_id):
+    for _ in range(200):
+        _, body = _request(f"{base}/jobs/{job_id}")
+        status = json.loads(body)
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError("El trabajo no terminó")
+
+
+def test_service_processes_jobs_concurrently(tmp_path):
+    gate = threading.Event()
+    service = ProcessingService(
+        {
+            COMPANY_JCR: lambda: FakeUseCase(tmp_path),
+            COMPANY_PAISANO: lambda: FakeUseCase(tmp_path, gate),
+        },
+        max_workers=2,
+        upload_dir=str(tmp_path / 'uploads'),
+    )
+    server = create_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        # Trabajo lento (bloqueado) de El Paisano
+        status, body = _request(
+            f"{base}/jobs", json.dumps({'company': 'PAISANO', 'paths': ['a.xml']}).encode(), 'POST'
+        )
+        assert status == 202
+        slow_id = json.loads(body)['id']
+
+        # Un trabajo JCR subido como archivo termina aunque el otro siga corriendo
+        status, body = _request(
+            f"{base}/jobs/upload?company=JCR&filename=f.csv&municipality=Cali", b"x;y\n1;2\n", 'POST'
+        )
+        assert status == 202
+        fast = _wait_done(base, json.loads(body)['id'])
+        assert fast['status'] == 'done'
+        assert fast['progress'] == {'current': 1, 'total': 1}
+        assert json.loads(_request(f"{base}/jobs/{slow_id}")[1])['status'] == 'running'
+
+        status, body = _request(f"{base}/jobs/{fast['id']}/output")
+        assert status == 200
+        assert body.startswith("N° Factura".encode('utf-8'))
+
+        # Resultado aún no disponible para el trabajo en curso
+        assert _request(f"{base}/jobs/{slow_id}/output")[0] == 409
+
+        # El stream de estado termina con el trabajo
+        gate.set()
+        status, body = _request(f"{base}/jobs/{slow_id}/events")
+        events = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        assert events[-1]['status'] == 'done'
+
+        # Validaciones
+        assert _request(f"{base}/jobs", json.dumps({'company': 'MG', 'paths': ['x']}).encode(), 'POST')[0] == 400
+        assert _request(f"{base}/jobs", json.dumps({'company': 'JCR', 'paths': ['x']}).encode(), 'POST')[0] == 400
+        assert _request(f"{base}/jobs/desconocido")[0] == 404
+    finally:
+        gate.set()
+        server.shutdown()
+        server.server_close()
+        service.shutdown()
+
+
+def _wait_finished(job):
+    for _ in range(200):
+        if job.is_finished():
+            return
+        time.sleep(0.02)
+    raise AssertionError("El trabajo no terminó")
+
+
+def test_uploads_are_validated_first_and_removed_with_the_job(tmp_path):
+    uploads = tmp_path / 'uploads'
+    outputs = tmp_path / 'salidas'
+    outputs.mkdir()
+    gate = threading.Event()
+    service = ProcessingService(
+        {COMPANY_JCR: lambda: FakeUseCase(outputs, gate)},
+        max_workers=1,
+        max_queued_jobs=1,
+        upload_dir=str(uploads),
+        finished_job_retention_seconds=0,
+    )
+
+    try:
+        # Solicitudes inválidas no dejan archivos subidos
+        with pytest.raises(ValueError):
+            service.submit_upload('JCR', 'f.csv', b"x;y\n", params={})
+        with pytest.raises(ValueError):
+            service.submit_upload('PAISANO', 'f.xml', b"<x/>")
+        assert not uploads.exists() or not any(uploads.iterdir())
+
+        params = {'municipality': 'Cali'}
+        running = service.submit_upload('JCR', 'f.csv', b"x;y\n", params=params)
+        for _ in range(200):
+            if running.status == 'running':
+                break
+            time.sleep(0.02)
+        queued = service.submit_upload('JCR', 'g.csv', b"x;y\n", params=params)
+        assert len(list(uploads.iterdir())) == 2
+
+        # Cola llena: el archivo no se guarda
+        with pytest.raises(ServiceBusyError):
+            service.submit_upload('JCR', 'h.csv', b"x;y\n", params=params)
+        assert len(list(uploads.iterdir())) == 2
+
+        gate.set()
+        _wait_finished(running)
+        _wait_finished(queued)
+        assert queued.status == 'done'
+        assert not any(uploads.iterdir())
+
+        # Terminados y vencidos: ya no se consultan
+        assert service.get(running.id) is None
+        assert service.list_jobs() == []
+    finally:
+        gate.set()
+        service.shutdown()
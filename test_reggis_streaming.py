@@ -0,0 +1,88 @@
+"""
+Pruebas de la exportación Reggis en modo streaming (write-only)
+Verifica los anchos de columna, el encabezado y el paso a una nueva hoja
+cuando se supera el límite de filas sin partir facturas
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from openpyxl import load_workbook
+
+from src.domain.entities.invoice import Invoice
+from src.domain.entities.product import Product
+from src.infrastructure.exporters.jcr_reggis_exporter import JCRReggisExporter
+
+
+def _invoices(lines_per_invoice):
+    invoices = []
+    for n, lines in enumerate(lines_per_invoice):
+        invoice = Invoice(
+            invoice_number=f'FV{n:05d}',
+            issue_date=datetime(2024, 5, 10),
+            due_date=datetime(2024, 6, 10),
+            currency='COP',
+            seller_nit='1003516945',
+            seller_name='JUAN CAMILO ROSAS',
+            seller_municipality='Cali',
+            buyer_nit='9001',
+            buyer_name='CLIENTE CON UN NOMBRE BASTANTE LARGO PARA PROBAR EL ANCHO MAXIMO',
+        )
+        for line in range(lines):
+            invoice.add_product(Product(
+                name=f'ARROZ {line}',
+                underlying_code='',
+                unit_of_measure='Kg',
+                quantity=Decimal('2.5'),
+                unit_price=Decimal('1000'),
+                total_price=Decimal('2500'),
+                iva_percentage=Decimal('5'),
+            ))
+        invoices.append(invoice)
+    return invoices
+
+
+def _export(tmp_path, monkeypatch, invoices):
+    monkeypatch.chdir(tmp_path)
+    return load_workbook(JCRReggisExporter(municipality='Cali').export_to_reggis_csv(invoices))
+
+
+def test_single_sheet_keeps_header_and_widths(tmp_path, monkeypatch):
+    wb = _export(tmp_path, monkeypatch, _invoices([2, 3]))
+
+    assert wb.sheetnames == ['Facturas Reggis']
+    ws = wb.active
+    rows = list(ws.iter_rows(values_only=True))
+    assert list(rows[0]) == JCRReggisExporter.REGGIS_COLUMNS
+    assert ws['A1'].font.bold
+    assert len(rows) == 6
+    assert rows[1][0] == 'FV00000' and rows[5][0] == 'FV00001'
+    assert ws.column_dimensions['K'].width == 50  # Buyer name capped
+    assert ws.column_dimensions['C'].width == len(JCRReggisExporter.REGGIS_COLUMNS[2]) + 2  # Header wider than 'SPN-1'
+
+
+def test_rollover_moves_whole_invoices_to_next_sheet(tmp_path, monkeypatch):
+    monkeypatch.setattr(JCRReggisExporter, 'MAX_SHEET_ROWS', 6)
+    monkeypatch.setattr(JCRReggisExporter, 'SPOOL_BLOCK_ROWS', 2)
+    wb = _export(tmp_path, monkeypatch, _invoices([3, 3, 1, 8]))
+
+    assert wb.sheetnames == ['Facturas Reggis', 'Facturas Reggis 2', 'Facturas Reggis 3', 'Facturas Reggis 4']
+    numbers = []
+    for ws in wb.worksheets:
+        rows = list(ws.iter_rows(values_only=True))
+        assert list(rows[0]) == JCRReggisExporter.REGGIS_COLUMNS
+        assert len(rows) <= 6
+        numbers.append([row[0] for row in rows[1:]])
+
+    # FV00001 does not fit after FV00000; FV00003 is longer than a sheet
+    assert numbers == [
+        ['FV00000'] * 3,
+        ['FV00001'] * 3 + ['FV00002'],
+        ['FV00003'] * 5,
+        ['FV00003'] * 3,
+    ]
+    assert all(ws.column_dimensions['K'].width == 50 for ws in wb.worksheets)
+
+
+def test_empty_export_writes_header_only(tmp_path, monkeypatch):
+    wb = _export(tmp_path, monkeypatch, [])
+    assert [list(row) for row in wb.active.iter_rows(values_only=True)] == [JCRReggisExporter.REGGIS_COLUMNS]
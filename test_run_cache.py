@@ -0,0 +1,96 @@
+"""
+Pruebas de la reutilización de procesamientos idénticos (run cache)
+Procesa el mismo CSV de Juan Camilo Rosas varias veces y verifica que no se
+regenere el archivo ni se dupliquen reportes
+"""
+from src.domain.entities.cached_run import REUSED_RUN_NOTICE
+from src.domain.use_cases.process_invoices import ProcessInvoices
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.infrastructure.database.sqlite_run_cache_repository import SQLiteRunCacheRepository
+from src.infrastructure.exporters.csv_exporter import CSVExporter
+from src.infrastructure.exporters.jcr_reggis_exporter import JCRReggisExporter
+from testing_support import HEADER, MemoryReportRepository, make_invoice
+
+
+ROWS = (
+    "FV00001;9001;CLIENTE 1;FRIJOL CALIMA*500G;10;UND;25000.50;2024-05-10;2024-06-10;5\n"
+    "FV00001;9001;CLIENTE 1;ARROZ;5;UND;10000.00;2024-05-10;2024-06-10;5\n"
+)
+
+
+def test_identical_run_reuses_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv_file = tmp_path / 'jcr.csv'
+    csv_file.write_text(HEADER + ROWS, encoding='utf-8')
+
+    reports = MemoryReportRepository()
+    run_cache = SQLiteRunCacheRepository(str(tmp_path / 'cache.db'), code_version='test')
+    use_case = ProcessJCRInvoices(reports, None, JCRReggisExporter(), run_cache=run_cache)
+
+    def run(**kwargs):
+        return use_case.execute([str(csv_file)], 'Cali', '5', 'tester', **kwargs)
+
+    success, message, records = run()
+    assert success and REUSED_RUN_NOTICE not in message
+    assert records == 2
+    assert len(reports.reports) == 1
+
+    # Misma selección: se devuelve el archivo existente sin nuevo reporte
+    success, reused, records = run()
+    assert success and reused.startswith(REUSED_RUN_NOTICE)
+    assert reused.split('\n')[-1] == message.split('\n')[1]
+    assert records == 2
+    assert len(reports.reports) == 1
+
+    # Forzar reprocesa aunque sea idéntico
+    success, message, _ = run(force=True)
+    assert success and REUSED_RUN_NOTICE not in message
+    assert len(reports.reports) == 2
+
+    # Otros parámetros u otro contenido generan otra huella
+    success, message, _ = use_case.execute([str(csv_file)], 'Palmira', '5', 'tester')
+    assert REUSED_RUN_NOTICE not in message
+    csv_file.write_text(HEADER + ROWS.replace('25000.50', '26000.00'), encoding='utf-8')
+    success, message, _ = run()
+    assert REUSED_RUN_NOTICE not in message
+    assert len(reports.reports) == 4
+
+
+class FlakyZipParser:
+    """One invoice per ZIP path; the ZIP files listed in broken fail to parse"""
+
+    def __init__(self):
+        self.broken = set()
+
+    def parse_zip_file(self, path):
+        if path in self.broken:
+            raise ValueError("ZIP dañado")
+        return [make_invoice()]
+
+
+def test_partial_run_is_not_reused(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    zip_files = []
+    for name in ('a.zip', 'b.zip'):
+        (tmp_path / name).write_bytes(b'PK')
+        zip_files.append(str(tmp_path / name))
+
+    parser = FlakyZipParser()
+    run_cache = SQLiteRunCacheRepository(str(tmp_path / 'cache.db'), code_version='test')
+    use_case = ProcessInvoices(MemoryReportRepository(), parser, CSVExporter(), run_cache=run_cache)
+
+    # b.zip falla: se exporta a.zip, pero el resultado no se guarda para reutilizar
+    parser.broken = {zip_files[1]}
+    success, message, records = use_case.execute(zip_files, 'AGROBUITRON', 'tester')
+    assert success and records == 1
+    assert "1 archivo(s) omitido(s)" in message and "b.zip" in message
+
+    parser.broken = set()
+    success, message, records = use_case.execute(zip_files, 'AGROBUITRON', 'tester')
+    assert success and REUSED_RUN_NOTICE not in message
+    assert records == 2
+
+    # Completo: ahora sí se reutiliza
+    success, message, records = use_case.execute(zip_files, 'AGROBUITRON', 'tester')
+    assert message.startswith(REUSED_RUN_NOTICE)
+    assert records == 2
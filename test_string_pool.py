@@ -0,0 +1,70 @@
+"""
+Pruebas del pool de cadenas compartido por las facturas de un procesamiento
+"""
+import sys
+
+from src.domain.use_cases.process_jcr_invoices import ProcessJCRInvoices
+from src.infrastructure.parsers.jcr_csv_parser import JCRCsvParser
+from src.infrastructure.parsers.string_pool import StringPool
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+from testing_support import CapturingExporter, MemoryReportRepository, write_jcr_csv
+
+
+def _write_inputs(tmp_path, files=3):
+    paths = []
+    for n in range(files):
+        rows = "".join(
+            f"FV{n}{line:03d};9001;CLIENTE UNO;ARROZ X 500 GR;{line + 1};UND;1000.00;2024-05-10;2024-06-10;5\n"
+            for line in range(4)
+        )
+        paths.append(write_jcr_csv(tmp_path / f'dia{n}.csv', rows))
+    return paths
+
+
+def test_pool_returns_the_first_object_and_counts_the_copies():
+    pool = StringPool()
+    first = ''.join(['CLIENTE', ' UNO'])
+    copy = ''.join(['CLIENTE ', 'UNO'])
+    assert copy is not first
+
+    assert pool.intern(first) is first
+    assert pool.intern(copy) is first
+    assert pool.intern(first) is first  # The pooled object itself is not a copy
+    assert pool.intern(None) is None
+    assert (len(pool), pool.duplicates, pool.bytes_saved) == (1, 1, sys.getsizeof(copy))
+    assert "1 textos repetidos" in pool.summary()
+    assert StringPool().summary() == ""
+
+
+def test_pool_shares_names_between_invoices(tmp_path):
+    path = _write_inputs(tmp_path, files=1)[0]
+    pool = StringPool()
+
+    invoices = JCRCsvParser(path, iva_percentage='5').parse()
+    pool.intern_invoices(invoices)
+    assert len(invoices) == 4
+    assert len({id(invoice.buyer_name) for invoice in invoices}) == 1
+    assert len({id(product.name) for invoice in invoices for product in invoice.products}) == 1
+    assert pool.duplicates > 0
+
+
+def test_run_pools_invoices_from_every_file(tmp_path):
+    paths = _write_inputs(tmp_path)
+
+    for scheduler in (None, InvoiceWorkScheduler(max_workers=2)):
+        exporter = CapturingExporter()
+        pools = []
+
+        def create_pool():
+            pools.append(StringPool())
+            return pools[-1]
+
+        use_case = ProcessJCRInvoices(
+            MemoryReportRepository(), None, exporter, work_scheduler=scheduler, string_pool_factory=create_pool
+        )
+        success, message, _ = use_case.execute(paths, 'Cali', '5', 'tester')
+        assert success, message
+        assert len(exporter.invoices) == 12
+        assert len({id(invoice.buyer_name) for invoice in exporter.invoices}) == 1
+        assert len(pools) == 1 and pools[0].duplicates > 0
+        assert message.split('\n')[-1] == pools[0].summary()
@@ -0,0 +1,98 @@
+"""
+Pruebas de los procesos de trabajo supervisados con límite de tiempo por archivo
+"""
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from src.domain.entities.invoice import Invoice
+from src.infrastructure.processing import work_scheduler
+from src.infrastructure.processing.supervised_pool import (
+    EVENT_DONE, EVENT_FAILED, EVENT_RESULT, SupervisedWorkerPool
+)
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+
+
+def _files(names):
+    """Task used by the tests: 'lento' hangs, 'roto' kills the worker, 'cpu' spins"""
+    for name in names:
+        if name == 'lento':
+            time.sleep(60)
+        elif name == 'roto':
+            os._exit(3)
+        elif name == 'cpu':
+            while True:
+                pass
+        yield name
+
+
+class PathologicalParser:
+    """Hangs on lento.xml and crashes on roto.xml"""
+
+    def create_date_parser(self):
+        return None
+
+    def parse_xml_file(self, path, date_parser=None):
+        name = os.path.basename(path)
+        if name == 'lento.xml':
+            time.sleep(60)
+        if name == 'roto.xml':
+            os._exit(3)
+        return Invoice(
+            invoice_number=name, issue_date=datetime(2024, 5, 10), due_date=None, currency='COP',
+            seller_nit='900', seller_name='EL PAISANO', seller_municipality='PALMIRA',
+            buyer_nit='9001', buyer_name='CLIENTE 1'
+        )
+
+
+def test_hung_and_crashed_tasks_fail_alone():
+    pool = SupervisedWorkerPool(2, file_timeout=1)
+    ok = pool.submit(_files, ['a', 'b'])
+    hung = pool.submit(_files, ['c', 'lento', 'd'])
+    crashed = pool.submit(_files, ['roto'])
+    after = pool.submit(_files, ['e'])
+
+    started = time.monotonic()
+    events = list(pool.events())
+    assert time.monotonic() - started < 10
+
+    by_task = {}
+    for event in events:
+        by_task.setdefault(event.task_id, []).append((event.kind, event.value))
+    assert by_task[ok] == [(EVENT_RESULT, 'a'), (EVENT_RESULT, 'b'), (EVENT_DONE, None)]
+    assert by_task[hung][0] == (EVENT_RESULT, 'c')
+    assert by_task[hung][1][0] == EVENT_FAILED and "tiempo límite" in by_task[hung][1][1]
+    assert by_task[crashed] == [(EVENT_FAILED, "el proceso de trabajo terminó inesperadamente (código 3)")]
+    assert by_task[after] == [(EVENT_RESULT, 'e'), (EVENT_DONE, None)]
+
+    failed = [event for event in events if event.kind == EVENT_FAILED and event.task_id == hung]
+    assert failed[0].completed == 1  # 'lento' is the offending file
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="CPU limits use RLIMIT_CPU")
+def test_cpu_limit_stops_a_spinning_task():
+    pool = SupervisedWorkerPool(1, file_timeout=30, cpu_timeout=1)
+    task = pool.submit(_files, ['a', 'cpu'])
+    events = list(pool.events())
+    assert [event.kind for event in events] == [EVENT_RESULT, EVENT_FAILED]
+    assert "CPU" in events[1].value and events[1].completed == 1
+    assert events[1].task_id == task
+
+
+def test_scheduler_skips_and_reports_pathological_xml(tmp_path, monkeypatch):
+    names = [f"f{i:02d}.xml" for i in range(6)] + ['lento.xml', 'roto.xml'] + [f"g{i:02d}.xml" for i in range(6)]
+    for name in names:
+        (tmp_path / name).write_text('<Invoice/>', encoding='utf-8')
+    # Forked workers inherit the parser
+    monkeypatch.setattr(work_scheduler, '_worker_parser', PathologicalParser())
+
+    scheduler = InvoiceWorkScheduler(max_workers=2, file_timeout=1)
+    failures = []
+    parsed = list(scheduler.parse([str(tmp_path / name) for name in names], failures=failures))
+
+    assert [path for path, _ in parsed] == [str(tmp_path / name) for name in names]
+    numbers = [invoice.invoice_number for _, invoices in parsed for invoice in invoices]
+    assert numbers == [name for name in names if name not in ('lento.xml', 'roto.xml')]
+    assert sorted(failure.name for failure in failures) == ['lento.xml', 'roto.xml']
@@ -0,0 +1,114 @@
+"""
+Pruebas del clasificador compilado de UnitConverter contra las reglas originales
+"""
+import random
+import re
+from decimal import Decimal
+
+from src.infrastructure.parsers.jcr_csv_parser import UnitConverter, _classify_product_name
+
+
+def _reference_unit(product_name, unit_of_measure):
+    """Original chain of substring checks, kept as the specification"""
+    name = (product_name or "").upper()
+    um = (unit_of_measure or "").upper().strip()
+    if "MEGA" in name:
+        return "MEGA"
+    if "REDONDA" in name:
+        return "REDONDA"
+    if "4 LIBRAS" in name or "4 LIBRA" in name:
+        return "LIBRAS"
+    if ("PARTIDA" in name or "PAQUETE" in name) and ("LIBRA" in name or "LIBRAS" in name):
+        return "LIBRAS"
+    if "PASTILLA" in name and ("KILO" in name or "KG" in name):
+        return "PASTILLA KILO"
+    if "PASTILLA" in name and "LIBRA" in name:
+        return "PASTILLA LIBRA"
+    if "PASTUANIO" in name or "PASTU" in name:
+        return "PASTUANIO"
+    if "KILO" in name or "KILOS" in name:
+        return "KILO"
+    return um or name
+
+
+def _reference_grams(product_name):
+    match = re.search(r'(\d+)\s*G\b', (product_name or "").upper())
+    return int(match.group(1)) if match else 0
+
+
+def _reference_category(product_name):
+    name = (product_name or "").upper()
+    return next((c for c in UnitConverter.CONVERSION_FACTORS if c in name), 'GRANOS')
+
+
+NAMES = [
+    "FRIJOL CALIMA*500G", "ACEITE SOYA*500CC", "PANELA*125G*8UND TEJO", "ACEITE*3000ML REF FRISOYA",
+    "ACEITE*3000ML X 6UNID", "ACEITE SOYA*500CC LA ORLANDESA E", "BLANQUILLO*400G FRIJOL",
+    "Panela Partida Paquete x10 libras", "PANELA PASTILLA KILO", "PANELA PASTILLA 1 KG",
+    "PANELA PASTILLA LIBRA", "PANELA 4 LIBRAS CJX10", "PANELA REDONDA", "PANELA MEGA 7 LIBRAS",
+    "PANELA KILOS", "PASTUANIO", "PASTA SPAGHETTI 250 G", "ATUN 170G", "HARINA*1000G", "12G3",
+    "GRANOS 400 G 500G", "FRIJOLENTEJA 450G", "", None, "arroz",
+]
+WORDS = ['MEGA', 'REDONDA', '4 LIBRAS', '4 LIBRA', 'PARTIDA', 'PAQUETE', 'LIBRA', 'LIBRAS', 'PASTILLA',
+         'KILO', 'KILOS', 'KG', 'PASTU', 'PASTUANIO', 'PASTA', 'GRANO', 'FRIJOL', 'ATUN', 'ACEITE',
+         '500G', '12 G', '7G8', 'X', '*', ' ', 'OMEGA', 'KILOGRAMO']
+
+
+def test_compiled_rules_match_the_original_priority():
+    rng = random.Random(11)
+    names = NAMES + [''.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6))) for _ in range(3000)]
+
+    for name in names:
+        for unit in ('', 'UND', ' p25 '):
+            assert UnitConverter.detect_unit_from_product_name(name, unit) == _reference_unit(name, unit), name
+        assert UnitConverter.extract_grams_from_name(name) == _reference_grams(name), name
+        assert UnitConverter.detect_product_category(name) == _reference_category(name), name
+
+
+def test_conversion_and_bounded_memo():
+    assert UnitConverter.convert_with_grams("PANELA MEGA", Decimal("2")) == Decimal("35.0")
+    assert UnitConverter.convert_with_grams("FRIJOL CALIMA*500G", Decimal("10")) == Decimal("125.0")
+    assert UnitConverter.convert_with_grams("ARROZ", Decimal("3")) == Decimal("3")
+
+    _classify_product_name.cache_clear()
+    for _ in range(3):
+        UnitConverter.convert_with_grams("ATUN 170G", Decimal("1"))
+    info = _classify_product_name.cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (2, 1, UnitConverter.CLASSIFY_CACHE_SIZE)
+
+
+def _reference_convert(product_name, quantity):
+    """Original convert_with_grams: the name itself counts when it is exactly a type"""
+    unit_type = _reference_unit(product_name, "")
+    if unit_type in UnitConverter.CONVERSIONS:
+        return quantity * UnitConverter.CONVERSIONS[unit_type]['total_kg']
+    grams = _reference_grams(product_name)
+    if grams > 0:
+        factor = UnitConverter.CONVERSION_FACTORS.get(_reference_category(product_name), Decimal('25'))
+        return (Decimal(str(grams)) * quantity) / Decimal('1000') * factor
+    return quantity
+
+
+def _apply_terms(product_name, quantity):
+    total_kg, grams, factor = UnitConverter.conversion_terms(product_name)
+    if total_kg is not None:
+        return quantity * total_kg
+    if grams is not None:
+        return (grams * quantity) / Decimal('1000') * factor
+    return quantity
+
+
+def test_name_that_is_exactly_a_type_is_converted():
+    quantity = Decimal('4')
+    cases = {'LIBRAS': Decimal('80'), 'libras': Decimal('80'), 'Redonda': None, ' libras ': quantity, 'LIBRAS\t': quantity}
+    for name, expected in cases.items():
+        expected = expected if expected is not None else _reference_convert(name, quantity)
+        assert UnitConverter.convert_with_grams(name, quantity) == expected, name
+        assert _apply_terms(name, quantity) == expected, name
+
+    rng = random.Random(5)
+    names = NAMES + list(UnitConverter.CONVERSIONS) + [key.lower() for key in UnitConverter.CONVERSIONS]
+    names += [''.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) for _ in range(2000)]
+    for name in names:
+        assert UnitConverter.convert_with_grams(name, quantity) == _reference_convert(name, quantity), name
+        assert _apply_terms(name, quantity) == _reference_convert(name, quantity), name
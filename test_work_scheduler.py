@@ -0,0 +1,88 @@
+"""
+Pruebas de la planificación del procesamiento en paralelo de los ZIP de Agrobuitron
+Varios ZIP con XML de distintos tamaños: el trabajo se reparte del más grande
+al más pequeño y los resultados vuelven en el orden elegido por el usuario
+"""
+import zipfile
+
+from src.infrastructure.processing import work_scheduler
+from src.infrastructure.processing.work_scheduler import InvoiceWorkScheduler
+from testing_support import make_invoice
+
+
+# Uncompressed size of each XML member, per ZIP in selection order
+ARCHIVES = {
+    'a.zip': {'a1.xml': 100, 'a2.xml': 100},
+    'b.zip': {'b1.xml': 5000, 'b2.xml': 100},
+    'c.zip': {'c1.xml': 100, 'c2.xml': 100, 'leeme.txt': 100},
+}
+
+
+class MemberNameParser:
+    """One invoice per XML, numbered with the member name"""
+
+    def create_date_parser(self):
+        return None
+
+    def parse_xml_content(self, content, member, zip_name, date_parser=None):
+        return make_invoice(member, buyer_name=zip_name, products=0)
+
+
+def _zip_files(tmp_path):
+    paths = []
+    for name, members in ARCHIVES.items():
+        path = tmp_path / name
+        with zipfile.ZipFile(path, 'w') as zf:
+            for member, size in members.items():
+                zf.writestr(member, '<Invoice/>'.ljust(size))
+        paths.append(str(path))
+    return paths
+
+
+def test_largest_first_in_user_order_packed_across_archives(tmp_path, monkeypatch):
+    paths = _zip_files(tmp_path)
+    # Forked workers inherit the parser
+    monkeypatch.setattr(work_scheduler, '_worker_parser', MemberNameParser())
+    monkeypatch.setattr(InvoiceWorkScheduler, 'CHUNK_TARGET_BYTES', 1000)
+    monkeypatch.setattr(InvoiceWorkScheduler, 'CHUNK_MAX_UNITS', 3)
+
+    submitted = []
+
+    class RecordingPool(work_scheduler.SupervisedWorkerPool):
+        def submit(self, func, arg):
+            submitted.append([unit.member for unit in arg.units])
+            return super().submit(func, arg)
+    monkeypatch.setattr(work_scheduler, 'SupervisedWorkerPool', RecordingPool)
+
+    # A single worker finishes the tasks in the order they were dispatched
+    scheduler = InvoiceWorkScheduler(max_workers=1)
+    progress = []
+    parsed = list(scheduler.parse(paths, lambda done, total: progress.append((done, total))))
+
+    # b2.xml shares a task with the XMLs of c.zip; the largest task goes first
+    # and the one with a.zip, the first selected, goes last
+    assert submitted == [['b1.xml'], ['b2.xml', 'c1.xml', 'c2.xml'], ['a1.xml', 'a2.xml']]
+
+    assert [path for path, _ in parsed] == paths
+    assert [[invoice.invoice_number for invoice in invoices] for _, invoices in parsed] == [
+        ['a1.xml', 'a2.xml'], ['b1.xml', 'b2.xml'], ['c1.xml', 'c2.xml']
+    ]
+    assert progress[-1] == (6, 6)
+
+
+def test_unreadable_inputs_are_reported_as_failures(tmp_path):
+    broken = tmp_path / 'roto.zip'
+    with zipfile.ZipFile(broken, 'w') as zf:
+        zf.writestr('cortado.xml', '<Invoice><cbc:ID>FE1')
+    not_a_zip = tmp_path / 'falso.zip'
+    not_a_zip.write_bytes(b'no es un zip')
+    paths = [str(broken), str(not_a_zip)]
+
+    # En línea y en procesos de trabajo supervisados
+    for scheduler in (InvoiceWorkScheduler(max_workers=1, file_timeout=None, cpu_timeout=None),
+                      InvoiceWorkScheduler(max_workers=1)):
+        failures = []
+        parsed = list(scheduler.parse(paths, failures=failures))
+        assert parsed == [(str(broken), []), (str(not_a_zip), [])]
+        assert sorted(failure.name for failure in failures) == ['falso.zip', 'roto.zip/cortado.xml']
+        assert work_scheduler.UNREADABLE_XML in [failure.reason for failure in failures]
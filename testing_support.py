@@ -0,0 +1,57 @@
+"""
+Datos y dobles de prueba compartidos por las pruebas
+Encabezado de los archivos de Juan Camilo Rosas, repositorio de reportes en
+memoria, exportador que captura las facturas y fábrica de facturas mínimas
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from src.domain.entities.invoice import Invoice
+from src.domain.entities.product import Product
+
+
+HEADER = "NUMERO DE FACTURA;IDENTIFICACION;NOMBRE CLIENTE;NOMBRE PRODUCTO;CANTIDAD;UNIDAD DE MEDIDA;VALOR BRUTO;FECHA FACTURA;FECHA VENCIMIENTO;IVA\n"
+COLUMNS = HEADER.rstrip('\n').split(';')
+
+
+class MemoryReportRepository:
+    """Keeps the reports of the runs in a list"""
+
+    def __init__(self):
+        self.reports = []
+
+    def create(self, report):
+        self.reports.append(report)
+        return report
+
+
+class CapturingExporter:
+    """Reggis exporter that keeps the exported invoices instead of writing them"""
+
+    def __init__(self):
+        self.invoices = []
+
+    def export_to_reggis_csv(self, invoices, municipality=None, **kwargs):
+        self.invoices = list(invoices)
+        return 'salida.xlsx'
+
+
+def write_jcr_csv(path, rows: str) -> str:
+    """Write a JCR file with the header and the given rows; returns its path"""
+    path.write_text(HEADER + rows, encoding='utf-8')
+    return str(path)
+
+
+def make_invoice(number='FE1', seller_name='AGROBUITRON', municipality='CALI', buyer_name='CLIENTE 1', products=1):
+    """Invoice with `products` lines: line n has quantity n + 1 at 100 each"""
+    invoice = Invoice(
+        invoice_number=number, issue_date=datetime(2024, 5, 10), due_date=None, currency='COP',
+        seller_nit='900', seller_name=seller_name, seller_municipality=municipality,
+        buyer_nit='9001', buyer_name=buyer_name
+    )
+    for line in range(products):
+        invoice.add_product(Product(
+            name=f'ARROZ {line}', underlying_code='1', unit_of_measure='UND', quantity=Decimal(line + 1),
+            unit_price=Decimal('100'), total_price=Decimal(100 * (line + 1)), iva_percentage=Decimal('0')
+        ))
+    return invoice